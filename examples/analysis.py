@@ -0,0 +1,240 @@
+"""
+Vectorised analysis of optimization outcomes.
+
+An outcome is loaded as one dense (signals x time) float64 array (a
+zero-copy view of a columnar outcome written by outcome_store.py, or one
+conversion of a JSON outcome) plus an index that parses every control
+signal name into (process, source node, sink node, scenario). Names join
+those parts with underscores, and the parts may contain underscores too, so
+the process, node and scenario names of the model are used to split them:
+
+    ngchp_ng_ngchp_s1   ->  process ngchp, source ng,   sink None, scenario s1
+    ngchp_ngchp_dh_s1   ->  process ngchp, source None, sink dh,   scenario s1
+
+The side that is the process itself is None, as in the topology inputs; a
+transfer process (dh_tra_dh_dh2_s1) has both nodes and counts as output.
+Everything below works on whole arrays, with no Python loop over values:
+
+    frame = load_frame("optimization_outcome_1", model)
+    day = frame.window("2025-01-01T00:00:00Z", "2025-01-02T00:00:00Z")
+    flows, expected = day.expected()                 # scenario-weighted flows x time
+    processes, produced = day.process_totals("out")  # per process, into nodes
+    frame.select(process="hp1", scenario="s2").values
+
+Needs numpy.
+
+    python analysis.py optimization_outcome_1 --model model_data.json
+"""
+import argparse
+import json
+from typing import Any, Collection, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from outcome_store import INDEX_SUFFIX, OutcomeReader, to_epoch
+
+
+class SignalKey(NamedTuple):
+    process: Optional[str]
+    source: Optional[str]       # node the flow comes from; None when it leaves the process
+    sink: Optional[str]         # node the flow goes to; None when it enters the process
+    scenario: Optional[str]
+
+
+def parse_signal_name(name: str, processes: Collection[str], nodes: Collection[str],
+                      scenarios: Sequence[str]) -> SignalKey:
+    """
+    Split a control signal name; see the module docstring. Pass `scenarios` longest first, so
+    "s1_x" is not taken for "s1". Unparseable names keep only the scenario.
+    """
+    scenario = next((s for s in scenarios if name.endswith("_" + s)), None)
+    if scenario is None and "_" in name:
+        scenario = name.rsplit("_", 1)[1]
+    body = name[:-len(scenario) - 1] if scenario else name
+    cuts = [i for i, c in enumerate(body) if c == "_"]
+    # longest process prefix first; then any split of the rest into two flow ends
+    for i in reversed(cuts):
+        process = body[:i]
+        if process not in processes:
+            continue
+        for j in cuts:
+            if j <= i:
+                continue
+            source, sink = body[i + 1:j], body[j + 1:]
+            if source == sink == process:
+                continue
+            if (source == process or source in nodes) and (sink == process or sink in nodes):
+                return SignalKey(process, None if source == process else source,
+                                 None if sink == process else sink, scenario)
+    return SignalKey(None, None, None, scenario)
+
+
+def _codes(values: Sequence[Any]) -> Tuple[List[Any], np.ndarray]:
+    """Distinct values in first-seen order and the code of every item."""
+    order: Dict[Any, int] = {}
+    codes = np.fromiter((order.setdefault(v, len(order)) for v in values), dtype=np.intp, count=len(values))
+    return list(order), codes
+
+
+class OutcomeFrame:
+    """Control signals as a (signals x time) array with a parsed name index."""
+
+    def __init__(self, values: np.ndarray, time: np.ndarray, names: List[str], keys: List[SignalKey],
+                 weights: Optional[Dict[str, float]] = None):
+        self.values = values
+        self.time = time            # POSIX seconds, UTC
+        self.names = names
+        self.keys = keys
+        self.weights = weights or {}
+        self.row = {n: i for i, n in enumerate(names)}
+        self.processes, self.process_code = _codes([k.process for k in keys])
+        self.scenarios, self.scenario_code = _codes([k.scenario for k in keys])
+        self.flows, self.flow_code = _codes([k[:3] for k in keys])
+        self.is_output = np.fromiter((k.sink is not None for k in keys), dtype=bool, count=len(keys))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _subset(self, rows=slice(None), cols=slice(None)) -> "OutcomeFrame":
+        index = range(len(self.names))[rows] if isinstance(rows, slice) else np.flatnonzero(rows)
+        return OutcomeFrame(self.values[rows, cols], self.time[cols], [self.names[i] for i in index],
+                            [self.keys[i] for i in index], self.weights)
+
+    def signal(self, name: str) -> np.ndarray:
+        return self.values[self.row[name]]
+
+    def window(self, start: Union[str, float, None] = None, end: Union[str, float, None] = None) -> "OutcomeFrame":
+        """Time steps with start <= t < end (ISO strings or POSIX seconds); a view, not a copy."""
+        lo = 0 if start is None else int(np.searchsorted(self.time, _epoch(start), side="left"))
+        hi = len(self.time) if end is None else int(np.searchsorted(self.time, _epoch(end), side="left"))
+        return self._subset(cols=slice(lo, hi))
+
+    def select(self, process: Optional[str] = None, scenario: Optional[str] = None,
+               node: Optional[str] = None) -> "OutcomeFrame":
+        """Signals matching every given filter."""
+        mask = np.ones(len(self.names), dtype=bool)
+        if process is not None:
+            mask &= self.process_code == _code(self.processes, process)
+        if scenario is not None:
+            mask &= self.scenario_code == _code(self.scenarios, scenario)
+        if node is not None:
+            mask &= np.fromiter((node in (k.source, k.sink) for k in self.keys), dtype=bool, count=len(self.keys))
+        return self._subset(rows=mask)
+
+    def row_weights(self) -> np.ndarray:
+        """Per-signal scenario weight, normalised over the scenarios in the frame (equal if unknown)."""
+        w = np.array([self.weights.get(s, 1.0 if not self.weights else 0.0) for s in self.scenarios])
+        total = w.sum()
+        w = w / total if total else np.full(len(self.scenarios), 1.0 / max(1, len(self.scenarios)))
+        return w[self.scenario_code]
+
+    def expected(self) -> Tuple[List[Tuple], np.ndarray]:
+        """Scenario-weighted expectation of every flow: ([(process, source, sink)], flows x time)."""
+        out = _group_sum(self.values, self.row_weights(), self.flow_code, len(self.flows))
+        return self.flows, out
+
+    def process_totals(self, direction: str = "out", expected: bool = True) -> Tuple[List[str], np.ndarray]:
+        """
+        Sum of each process's flows into nodes ("out") or from nodes ("in") per time step:
+        (process names, processes x time). With expected=False, scenarios are summed unweighted.
+        """
+        if direction not in ("in", "out"):
+            raise ValueError(f"direction must be 'in' or 'out', got {direction!r}")
+        rows = self.is_output if direction == "out" else ~self.is_output
+        weights = self.row_weights() if expected else np.ones(len(self.names))
+        out = _group_sum(self.values[rows], weights[rows], self.process_code[rows], len(self.processes))
+        return self.processes, out
+
+    def step_hours(self) -> np.ndarray:
+        """Length of every time step in hours (the last repeats the one before)."""
+        if len(self.time) < 2:
+            return np.ones(len(self.time))
+        d = np.diff(self.time) / 3600.0
+        return np.append(d, d[-1])
+
+    def energy(self, values: Optional[np.ndarray] = None) -> np.ndarray:
+        """Time integral (value x step hours) of every row of `values` (default: the signals)."""
+        return (self.values if values is None else values) @ self.step_hours()
+
+
+def _group_sum(values: np.ndarray, weights: np.ndarray, codes: np.ndarray, groups: int) -> np.ndarray:
+    """(groups x time) sums of weighted rows by group code, via one sort and np.add.reduceat."""
+    out = np.zeros((groups, values.shape[1]))
+    if not len(codes) or not values.shape[1]:
+        return out
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    out[sorted_codes[starts]] = np.add.reduceat(values[order] * weights[order, None], starts, axis=0)
+    return out
+
+
+def _epoch(t: Union[str, float]) -> float:
+    return to_epoch(t) if isinstance(t, str) else float(t)
+
+
+def _code(categories: List[Any], value: Any) -> int:
+    return categories.index(value) if value in categories else -1
+
+
+def _model_names(model: Optional[Dict[str, Any]]):
+    model = model or {}
+    # the server adds a <node>_<market>_trade_process for every market
+    processes = [p["name"] for p in model.get("processes", [])]
+    processes += [f"{m['node']}_{m['name']}_trade_process" for m in model.get("markets", [])]
+    # market flows name the market where a node would be
+    nodes = [n["name"] for n in model.get("nodes", [])] + [m["name"] for m in model.get("markets", [])]
+    scenarios = sorted((s["name"] for s in model.get("scenarios", [])), key=len, reverse=True)
+    weights = {s["name"]: s["weight"] for s in model.get("scenarios", [])}
+    return set(processes), set(nodes), scenarios, weights
+
+
+def frame_from_arrays(values: np.ndarray, time: np.ndarray, names: List[str],
+                      model: Optional[Dict[str, Any]] = None) -> OutcomeFrame:
+    processes, nodes, scenarios, weights = _model_names(model)
+    keys = [parse_signal_name(n, processes, nodes, scenarios) for n in names]
+    return OutcomeFrame(values, time, names, keys, weights)
+
+
+def load_frame(path: str, model: Optional[Dict[str, Any]] = None) -> OutcomeFrame:
+    """Load a columnar outcome (base or index path) or a JSON outcome file into an OutcomeFrame."""
+    if path.endswith(".json") and not path.endswith(INDEX_SUFFIX):
+        with open(path, "r", encoding="utf-8") as f:
+            outcome = json.load(f).get("outcome") or {}
+        signals = outcome.get("controlSignals", [])
+        time = np.array([to_epoch(t) for t in outcome.get("time", [])])
+        values = np.array([cs["signal"] for cs in signals], dtype=np.float64).reshape(len(signals), len(time))
+        return frame_from_arrays(values, time, [cs["name"] for cs in signals], model)
+    reader = OutcomeReader(path)
+    if reader.index.get("typename") != "OptimizationOutcome":
+        raise ValueError(f"{path} is not an optimization outcome")
+    return frame_from_arrays(reader.matrix(), reader.array("time"), reader.signal_names, model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise an optimization outcome per process.")
+    parser.add_argument("outcome", help="columnar outcome base / index path, or an outcome JSON file")
+    parser.add_argument("--model", default="model_data.json", help="model file for names and scenario weights")
+    parser.add_argument("--start", default=None, help="first time step (ISO 8601)")
+    parser.add_argument("--end", default=None, help="end of the window, exclusive (ISO 8601)")
+    args = parser.parse_args()
+
+    with open(args.model, "r", encoding="utf-8") as f:
+        model = json.load(f)
+    frame = load_frame(args.outcome, model).window(args.start, args.end)
+    unparsed = sum(k.process is None for k in frame.keys)
+    print(f"{len(frame)} signals x {frame.values.shape[1]} steps, scenarios {', '.join(map(str, frame.scenarios))}"
+          + (f"; {unparsed} names not matched to a process" if unparsed else ""))
+    produced = dict(zip(*frame.process_totals("out")))
+    consumed = dict(zip(*frame.process_totals("in")))
+    print(f"{'process':<28}{'expected out':>14}{'expected in':>14}")
+    for process in frame.processes:
+        if process is None:
+            continue
+        out_e = frame.energy(produced[process][None, :])[0]
+        in_e = frame.energy(consumed[process][None, :])[0]
+        print(f"{process:<28}{out_e:>14.3f}{in_e:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
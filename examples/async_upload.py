@@ -0,0 +1,74 @@
+"""
+Asyncio executor for input_data.py's --async mode.
+
+input_data.upload_model_async still runs sections one after another; inside a
+section the aliased batches are sent concurrently, at most `concurrency` in
+flight. asyncio.gather keeps results in op order, so logs and error reports
+are identical to the sequential mode.
+"""
+import asyncio
+from typing import Iterable, List
+
+from gql.transport.exceptions import TransportQueryError
+
+from batching import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY, Op, OpResult, build_document, chunked, map_results, parse_document
+
+
+class AsyncBatchExecutor:
+    """Async counterpart of batching.BatchExecutor sharing one gql async session."""
+
+    def __init__(self, session, batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY, journal=None):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+        self.session = session
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.journal = journal
+
+    async def _send(self, ops: List[Op]) -> List[OpResult]:
+        source, variables = build_document(ops)
+        try:
+            data = await self.session.execute(parse_document(source), variable_values=variables)
+            results = map_results(ops, data)
+        except TransportQueryError as e:
+            results = map_results(ops, e.data, e.errors)
+        if self.journal is not None:
+            self.journal.record(ops, results)
+        return results
+
+    async def _send_and_release(self, ops: List[Op]) -> List[OpResult]:
+        try:
+            return await self._send(ops)
+        finally:
+            self.semaphore.release()
+
+    async def execute_batch(self, ops: List[Op]) -> List[OpResult]:
+        async with self.semaphore:
+            return await self._send(ops)
+
+    async def execute(self, ops: Iterable[Op], concurrent: bool = True) -> List[OpResult]:
+        if self.journal is not None:
+            ops = self.journal.pending(ops)
+        if not concurrent:
+            results = []
+            for batch in chunked(ops, self.batch_size):
+                results.extend(await self.execute_batch(batch))
+            return results
+        # take a slot before pulling the next batch, so a lazy op stream
+        # (--stream) is never read further ahead than `concurrency` batches
+        tasks = []
+        try:
+            for batch in chunked(ops, self.batch_size):
+                await self.semaphore.acquire()
+                tasks.append(asyncio.ensure_future(self._send_and_release(batch)))
+            done = await asyncio.gather(*tasks)
+        except BaseException:
+            # one batch failed: stop the others before the caller closes the session under them
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return [r for batch_results in done for r in batch_results]
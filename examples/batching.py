@@ -0,0 +1,173 @@
+"""
+Aliased multi-mutation batching.
+
+Packs many mutations of one section into a single GraphQL document, e.g.
+
+    mutation Batch($m0_node: NewNode!, $m1_node: NewNode!) {
+      m0: createNode(node: $m0_node) { errors { field message } }
+      m1: createNode(node: $m1_node) { errors { field message } }
+    }
+
+so a section of N entities costs ceil(N / batch_size) round trips instead of N.
+Mutation root fields are executed serially by the server, so the order inside
+one document is the order the ops were queued in.
+"""
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from gql import gql
+from gql.transport.exceptions import TransportQueryError
+
+from utilities import json_dumps, jsonable
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 8   # in-flight requests in async mode
+
+# selection sets of the two result types used by the mutations
+ERRORS = "errors { field message }"     # ValidationErrors
+MESSAGE = "message"                      # MaybeError
+
+
+class MutationSpec(NamedTuple):
+    """A mutation field: its name, argument name -> GraphQL type, and selection set."""
+    field: str
+    args: Dict[str, str]
+    selection: str = ERRORS
+
+
+class Op(NamedTuple):
+    """One mutation call waiting to be sent; `label` identifies the source entity."""
+    spec: MutationSpec
+    variables: Dict[str, Any]
+    label: str
+
+
+class OpResult(NamedTuple):
+    """Result of one aliased field, mapped back to the op that produced it."""
+    label: str
+    field: str
+    result: Any
+    errors: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def alias(i: int) -> str:
+    return f"m{i}"
+
+
+def build_document(ops: List[Op]) -> Tuple[str, Dict[str, Any]]:
+    """Return the aliased mutation source for `ops` and its flattened variables."""
+    var_defs = []
+    fields = []
+    variables = {}
+    for i, op in enumerate(ops):
+        a = alias(i)
+        call_args = []
+        for arg, gql_type in op.spec.args.items():
+            var = f"{a}_{arg}"
+            var_defs.append(f"${var}: {gql_type}")
+            call_args.append(f"{arg}: ${var}")
+            variables[var] = op.variables.get(arg)
+        call = f"{a}: {op.spec.field}"
+        if call_args:
+            call += "(" + ", ".join(call_args) + ")"
+        if op.spec.selection:
+            call += " { " + op.spec.selection + " }"
+        fields.append(call)
+    header = "mutation Batch"
+    if var_defs:
+        header += "(" + ", ".join(var_defs) + ")"
+    return header + " {\n  " + "\n  ".join(fields) + "\n}", variables
+
+
+@lru_cache(maxsize=256)
+def parse_document(source: str):
+    # full batches of one section produce identical text, and fixed queries recur; parse each once
+    return gql(source)
+
+
+def wire_variables(client, variables: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    `variables` as the client's transport can send them: float buffers stay buffers when it
+    serialises with utilities.json_dumps (connection.make_transport), else they become lists.
+    """
+    if getattr(getattr(client, "transport", None), "json_serialize", None) is json_dumps:
+        return variables
+    return jsonable(variables)
+
+
+def result_errors(result: Any) -> List[str]:
+    """Error messages carried by a ValidationErrors / MaybeError payload."""
+    if not isinstance(result, dict):
+        return []
+    msgs = [f"{e.get('field')}: {e.get('message')}" for e in result.get("errors") or []]
+    if result.get("message") is not None:
+        msgs.append(result["message"])
+    return msgs
+
+
+def map_results(ops: List[Op], data: Optional[Dict[str, Any]],
+                gql_errors: Optional[List[Dict[str, Any]]] = None) -> List[OpResult]:
+    """Split a batch response back into one OpResult per op, in op order."""
+    data = data or {}
+    per_alias: Dict[str, List[str]] = {}
+    unplaced = []
+    for err in gql_errors or []:
+        path = err.get("path") or []
+        if path:
+            per_alias.setdefault(str(path[0]), []).append(err.get("message", str(err)))
+        else:
+            unplaced.append(err.get("message", str(err)))
+
+    results = []
+    for i, op in enumerate(ops):
+        a = alias(i)
+        res = data.get(a)
+        errs = result_errors(res) + per_alias.get(a, []) + unplaced
+        results.append(OpResult(op.label, op.spec.field, res, errs))
+    return results
+
+
+class BatchExecutor:
+    """Sends ops `batch_size` at a time as aliased mutation documents."""
+
+    def __init__(self, client, batch_size: int = DEFAULT_BATCH_SIZE, journal=None):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        self.client = client
+        self.batch_size = batch_size
+        self.journal = journal      # journal.MutationJournal: skip applied ops, record new ones
+
+    def execute_batch(self, ops: List[Op]) -> List[OpResult]:
+        source, variables = build_document(ops)
+        try:
+            variables = wire_variables(self.client, variables)
+            data = self.client.execute(parse_document(source), variable_values=variables)
+            return map_results(ops, data)
+        except TransportQueryError as e:
+            # field-level GraphQL errors: keep the partial data, attach errors by alias
+            return map_results(ops, e.data, e.errors)
+
+    def execute(self, ops: Iterable[Op]) -> List[OpResult]:
+        if self.journal is not None:
+            ops = self.journal.pending(ops)
+        results = []
+        for chunk in chunked(ops, self.batch_size):
+            chunk_results = self.execute_batch(chunk)
+            if self.journal is not None:
+                self.journal.record(chunk, chunk_results)
+            results.extend(chunk_results)
+        return results
@@ -0,0 +1,181 @@
+"""
+Offline loader benchmark against the in-process stand-in server.
+
+For every model size, a fresh StandIn (standin.py) is served on a free local
+port and the loader scripts are run against it as subprocesses, so the
+timings are end to end including interpreter start-up:
+
+  * input_data.py with --metrics, which also gives per-section latency and
+    byte counts,
+  * build_model.py (via HERTTA_GRAPHQL_URL), timed per operation on the
+    server side. It sends a fixed example model, so only latency settings
+    change its numbers.
+
+Model sizes are copies of model_data.json: size k holds k renamed copies of
+every node, process, group, market, topology and constraint, sharing the
+scenarios, risk parameters and reserve types. With --generated, size k is
+instead a gen_model.py model with k nodes and k processes and --steps long
+series. Results go to a JSON file so runs from different versions can be
+compared number by number.
+
+    python bench_loader.py --sizes 1 10 50 --latency 0.002 --out bench_loader.json
+    python bench_loader.py --generated --sizes 50 200 --steps 8760
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from standin import StandIn, serve
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# sections holding named entities; copies of them are renamed
+REPLICATED_SECTIONS = (
+    "nodes", "node_states", "processes", "node_groups", "process_groups", "markets", "topologies",
+    "gen_constraints", "node_diffusions", "node_delays", "node_histories", "inflow_blocks",
+)
+NAMED_SECTIONS = ("nodes", "processes", "node_groups", "process_groups", "markets", "gen_constraints",
+                  "inflow_blocks")
+
+
+def _renamed(x, names, suffix):
+    if isinstance(x, str):
+        return x + suffix if x in names else x
+    if isinstance(x, dict):
+        return {k: _renamed(v, names, suffix) for k, v in x.items()}
+    if isinstance(x, list):
+        return [_renamed(v, names, suffix) for v in x]
+    return x
+
+
+def replicate(data: Dict[str, Any], copies: int) -> Dict[str, Any]:
+    """`data` with `copies` copies of every named entity; copy i > 0 gets the suffix _i."""
+    names = {item["name"] for section in NAMED_SECTIONS for item in data.get(section, [])}
+    out = dict(data)
+    for section in REPLICATED_SECTIONS:
+        items = data.get(section, [])
+        out[section] = list(items) + [_renamed(item, names, f"_{i}") for i in range(1, copies) for item in items]
+    return out
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run(args: List[str], cwd: str, env: Dict[str, str]) -> float:
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable] + args, cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"{args[0]} failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    return elapsed
+
+
+def _server_side(standin: StandIn) -> Dict[str, Dict[str, float]]:
+    ops: Dict[str, Dict[str, float]] = {}
+    for operation, seconds in standin.log:
+        entry = ops.setdefault(operation, {"requests": 0, "seconds": 0.0})
+        entry["requests"] += 1
+        entry["seconds"] += seconds
+    return ops
+
+
+def generated(size: int, steps: int) -> Dict[str, Any]:
+    from gen_model import generate_model
+    return generate_model(nodes=size, processes=size, markets=max(1, size // 10), scenarios=3,
+                          constraints=max(1, size // 20), factors=size // 2, steps=steps)
+
+
+def bench_size(model: Dict[str, Any], size: int, workdir: str, standin_args: Dict[str, float],
+               loader_args: List[str]) -> List[Dict[str, Any]]:
+    model_path = os.path.join(workdir, f"model_x{size}.json")
+    with open(model_path, "w", encoding="utf-8") as f:
+        json.dump(model, f)
+    entities = sum(len(model.get(s, [])) for s in REPLICATED_SECTIONS)
+    results = []
+
+    standin = StandIn(**standin_args)
+    server, url = serve(standin)
+    try:
+        prefix = os.path.join(workdir, f"metrics_x{size}")
+        seconds = _run([os.path.join(HERE, "input_data.py"), "--model", model_path, "--url", url,
+                        "--metrics", prefix] + loader_args, workdir, dict(os.environ))
+        with open(prefix + ".json", "r", encoding="utf-8") as f:
+            sections = json.load(f)["summary"]
+        results.append({"script": "input_data.py", "size": size, "entities": entities,
+                        "modelBytes": os.path.getsize(model_path), "seconds": seconds,
+                        "requests": standin.requests, "sections": sections})
+    finally:
+        server.shutdown()
+
+    standin = StandIn(**standin_args)
+    server, url = serve(standin)
+    try:
+        env = dict(os.environ, HERTTA_GRAPHQL_URL=url)
+        seconds = _run([os.path.join(HERE, "build_model.py")], workdir, env)
+        results.append({"script": "build_model.py", "size": size, "seconds": seconds,
+                        "requests": standin.requests, "sections": _server_side(standin)})
+    finally:
+        server.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the loader scripts against a local stand-in server.")
+    parser.add_argument("--model", default=os.path.join(HERE, "model_data.json"))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50],
+                        help="copies of the model to upload per run")
+    parser.add_argument("--generated", action="store_true",
+                        help="benchmark gen_model.py models with SIZE nodes instead of copies of --model")
+    parser.add_argument("--steps", type=int, default=24, help="series length of --generated models")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in seconds per request")
+    parser.add_argument("--field-latency", type=float, default=0.0, help="stand-in seconds per root field")
+    parser.add_argument("--batch-size", type=int, default=None, help="passed to input_data.py")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="pass --async to input_data.py")
+    parser.add_argument("--out", default="bench_loader.json")
+    args = parser.parse_args()
+
+    with open(args.model, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    standin_args = {"latency": args.latency, "field_latency": args.field_latency}
+    loader_args = []
+    if args.batch_size:
+        loader_args += ["--batch-size", str(args.batch_size)]
+    if args.use_async:
+        loader_args.append("--async")
+
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            model = generated(size, args.steps) if args.generated else replicate(base, size)
+            for r in bench_size(model, size, workdir, standin_args, loader_args):
+                print(f"{r['script']:<16} x{size:<4} {r['seconds']:8.3f} s  {r['requests']:6} requests")
+                runs.append(r)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "standin": standin_args,
+        "loaderArgs": loader_args,
+        "models": f"gen_model.py, {args.steps} steps" if args.generated else os.path.basename(args.model),
+        "runs": runs,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print("Wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
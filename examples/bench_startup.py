@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark for the command-line entry point.
+
+A StandIn (standin.py) is served on a free local port with one finished job,
+and every command below is run `--repeat` times as a fresh interpreter; the
+table gives the minimum and median wall time of each:
+
+  * python -c pass, the interpreter floor,
+  * hertta.py status, which imports only the standard library,
+  * the same status check made the way the scripts do it: import
+    input_data.py, build a gql client from schema.graphql and poll with
+    jobs.wait_for_job,
+  * hertta.py optimize, which pays for gql where it is needed.
+
+    python bench_startup.py --repeat 20 --out bench_startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from standin import StandIn, serve
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPT_STATUS = """
+import sys
+import input_data
+from connection import make_client
+from jobs import print_status, wait_for_job
+wait_for_job(make_client(sys.argv[1]), int(sys.argv[2]), on_status=print_status)
+"""
+
+
+def commands(url: str, job_id: int) -> Dict[str, List[str]]:
+    hertta = os.path.join(HERE, "hertta.py")
+    return {
+        "python -c pass": [sys.executable, "-c", "pass"],
+        "hertta status": [sys.executable, hertta, "status", str(job_id), "--url", url],
+        "input_data + gql status": [sys.executable, "-c", SCRIPT_STATUS, url, str(job_id)],
+        "hertta optimize": [sys.executable, hertta, "optimize", "--url", url],
+    }
+
+
+def time_command(argv: List[str], cwd: str) -> float:
+    started = time.perf_counter()
+    env = dict(os.environ, PYTHONPATH=HERE)    # the -c script imports the modules here
+    subprocess.run(argv, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time cold starts of hertta.py against a local stand-in server.")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--out", default=None, help="write the timings to this JSON file")
+    args = parser.parse_args()
+
+    standin = StandIn()
+    server, url = serve(standin)
+    try:
+        job_id = standin.start_job("optimization")
+        results = {}
+        with tempfile.TemporaryDirectory() as workdir:     # optimize writes its outcome here
+            for name, argv in commands(url, job_id).items():
+                time_command(argv, workdir)     # warm the page cache and __pycache__
+                seconds = [time_command(argv, workdir) for _ in range(args.repeat)]
+                results[name] = {"min": min(seconds), "median": statistics.median(seconds), "runs": seconds}
+    finally:
+        server.shutdown()
+
+    print(f"{'command':<28}{'min ms':>10}{'median ms':>12}")
+    for name, r in results.items():
+        print(f"{name:<28}{r['min'] * 1000:>10.1f}{r['median'] * 1000:>12.1f}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "repeat": args.repeat, "results": results}, f, indent=1)
+        print("Wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
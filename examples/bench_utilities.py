@@ -0,0 +1,103 @@
+"""
+Micro-benchmark: pruning / normalising series-heavy payloads.
+
+Compares the list-based prune_nones / normalize_value_inputs the loader used
+to have against the current utilities on a market-shaped payload with
+8760-point series, including JSON serialisation of the result.
+
+    python bench_utilities.py [--steps 8760] [--scenarios 3] [--repeat 20]
+"""
+import argparse
+import json
+import random
+import timeit
+
+from utilities import json_dumps, normalize_value_inputs, prune_nones
+
+
+# ---------- previous implementations, kept for comparison ----------
+def prune_nones_lists(x):
+    if isinstance(x, dict):
+        return {k: prune_nones_lists(v) for k, v in x.items() if v is not None}
+    if isinstance(x, list):
+        return [prune_nones_lists(v) for v in x]
+    return x
+
+def normalize_value_inputs_lists(arr):
+    norm = []
+    for v in arr or []:
+        vi = {}
+        if v.get("scenario") is not None:
+            vi["scenario"] = v["scenario"]
+        if v.get("series") is not None:
+            vi["series"] = [float(x) for x in v["series"]]
+        if v.get("constant") is not None:
+            vi["constant"] = float(v["constant"])
+        norm.append(vi)
+    return norm
+
+
+def make_market(steps, scenarios):
+    rnd = random.Random(42)
+    def values():
+        return [{"scenario": f"s{i + 1}", "series": [rnd.randint(20, 90) for _ in range(steps)]}
+                for i in range(scenarios)]
+    return {
+        "name": "npe", "mType": "ENERGY", "node": "elc", "processGroup": "p1", "direction": None,
+        "isBid": True, "isLimited": False, "minBid": 0, "maxBid": 0, "fee": 0,
+        "realisation": values(), "price": values(), "upPrice": values(), "downPrice": values(),
+        "reserveActivationPrice": [],
+    }
+
+
+def old_path(mkt):
+    out = prune_nones_lists(mkt)
+    for k in ("realisation", "price", "upPrice", "downPrice"):
+        out[k] = normalize_value_inputs_lists(out[k])
+    return json.dumps(out)
+
+def new_path(mkt):
+    out = prune_nones(mkt)
+    for k in ("realisation", "price", "upPrice", "downPrice"):
+        out[k] = normalize_value_inputs(out[k])
+    return json_dumps(out)
+
+
+def bench(label, fn, repeat):
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    print(f"  {label:<34} {best * 1000:9.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=8760)
+    parser.add_argument("--scenarios", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    mkt = make_market(args.steps, args.scenarios)
+    points = 4 * args.scenarios * args.steps
+    print(f"market payload: 4 value lists x {args.scenarios} scenarios x {args.steps} steps = {points} floats")
+
+    assert json.loads(old_path(mkt)) == json.loads(new_path(mkt))
+
+    print("prune_nones")
+    a = bench("recursive, copies every float", lambda: prune_nones_lists(mkt), args.repeat)
+    b = bench("iterative, numeric leaves shared", lambda: prune_nones(mkt), args.repeat)
+    print(f"  speedup x{a / b:.1f}")
+
+    series = mkt["price"]
+    print("normalize_value_inputs")
+    a = bench("[float(x) for x in series]", lambda: normalize_value_inputs_lists(series), args.repeat)
+    b = bench("array('d', series)", lambda: normalize_value_inputs(series), args.repeat)
+    print(f"  speedup x{a / b:.1f}")
+
+    print("prune + normalise + serialise")
+    a = bench("lists", lambda: old_path(mkt), args.repeat)
+    b = bench("float buffers", lambda: new_path(mkt), args.repeat)
+    print(f"  speedup x{a / b:.1f}")
+
+
+if __name__ == "__main__":
+    main()
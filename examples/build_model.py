@@ -1,13 +1,8 @@
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
+from gql import gql
+from connection import make_client
 
-transport = RequestsHTTPTransport(
-    url="http://localhost:3030/graphql",
-    verify=True,
-    retries=3,
-)
-
-client = Client(transport=transport, fetch_schema_from_transport=True)
+# schema comes from the local schema.graphql, so no introspection on start
+client = make_client()
 
 # Example query to fetch schema or model info
 # query = gql("""
@@ -0,0 +1,201 @@
+"""
+Input coercers generated from the `input` types of schema.graphql.
+
+For every input type (NewNode, NewProcess, ValueInput, PointInput, ...) one
+specialised function is generated that, in a single pass over the raw dict:
+
+  * keeps only the fields the type declares,
+  * drops nulls,
+  * casts Float fields to float and [Float] fields to array('d'),
+  * casts Int fields with utilities.to_int, which rejects 2.7 instead of
+    truncating it,
+  * coerces nested input objects with their own coercer,
+  * fills missing non-null list fields with [].
+
+Alongside COERCERS the module carries REQUIRED (type -> its non-null scalar
+and object fields) and ENUM_FIELDS (type -> field -> allowed enum values),
+which preflight.py checks models against.
+
+The generated module is written to the cache directory under a name derived
+from the SDL's hash and imported from there (so later runs load its .pyc
+and never parse the SDL). Editing schema.graphql produces a new module.
+
+    COERCE = load_coercers()
+    node_input = COERCE["NewNode"](raw_node)
+
+Modules that build ops at import time use LazyCoercers instead, which loads
+the module on its first lookup, so importing them reads no SDL.
+"""
+import hashlib
+import importlib.util
+import os
+import types
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from connection import CACHE_DIR, SCHEMA_PATH
+
+GENERATOR_VERSION = "3"
+
+# input types whose coercion is hand-written in utilities.py
+CUSTOM_COERCERS = {"PointInput": "normalize_point"}
+
+_SCALAR_CASTS = {"Float": "float({})", "Int": "to_int({})"}
+
+_loaded: Dict[str, Any] = {}
+
+
+def _unwrap(type_node):
+    """(non_null, is_list, item_non_null, named type) for a field type node."""
+    non_null = type_node.kind == "non_null_type"
+    if non_null:
+        type_node = type_node.type
+    if type_node.kind != "list_type":
+        return non_null, False, False, type_node.name.value
+    item = type_node.type
+    item_non_null = item.kind == "non_null_type"
+    if item_non_null:
+        item = item.type
+    return non_null, True, item_non_null, item.name.value
+
+
+def _field_lines(name, type_node, input_types):
+    non_null, is_list, _, named = _unwrap(type_node)
+    if named in input_types:
+        fn = CUSTOM_COERCERS.get(named, f"coerce_{named}")
+        item = f"{fn}({{}})"
+    else:
+        item = _SCALAR_CASTS.get(named, "{}")
+
+    if not is_list:
+        expr = item.format("v")
+    elif named == "Float":
+        expr = "float_series(v)"
+    elif item == "{}":
+        expr = "list(v)"
+    else:
+        expr = f"[{item.format('x')} for x in v if x is not None]"
+
+    lines = [f'    v = d.get("{name}")']
+    if is_list and non_null:
+        lines.append(f'    out["{name}"] = {expr} if v is not None else []')
+    else:
+        lines += ["    if v is not None:", f'        out["{name}"] = {expr}']
+    return lines
+
+
+def generate_source(sdl: str, digest: str = "") -> str:
+    """Python source of the coercer module for the input types of `sdl`."""
+    from graphql import parse
+
+    doc = parse(sdl)
+    inputs = [d for d in doc.definitions if d.kind == "input_object_type_definition"]
+    input_types = {d.name.value for d in inputs}
+    enums = {d.name.value: [v.name.value for v in d.values]
+             for d in doc.definitions if d.kind == "enum_type_definition"}
+
+    out = [
+        f"# Generated by coercers.py from schema.graphql (sha256 {digest[:16]}). Do not edit.",
+        "from utilities import float_series, to_int, " + ", ".join(sorted(set(CUSTOM_COERCERS.values()))),
+        "",
+    ]
+    for d in inputs:
+        type_name = d.name.value
+        if type_name in CUSTOM_COERCERS:
+            continue
+        out += ["", f"def coerce_{type_name}(d):", "    out = {}"]
+        for field in d.fields:
+            out += _field_lines(field.name.value, field.type, input_types)
+        out += ["    return out", ""]
+
+    names = {d.name.value: CUSTOM_COERCERS.get(d.name.value, f"coerce_{d.name.value}") for d in inputs}
+    out += ["", "COERCERS = {"]
+    out += [f'    "{t}": {fn},' for t, fn in names.items()]
+    out += ["}", ""]
+
+    out += ["REQUIRED = {"]
+    for d in inputs:
+        required = [f.name.value for f in d.fields if _unwrap(f.type)[0] and not _unwrap(f.type)[1]]
+        out.append(f'    "{d.name.value}": {tuple(required)!r},')
+    out += ["}", ""]
+
+    out += ["ENUM_FIELDS = {"]
+    for d in inputs:
+        fields = {f.name.value: enums[_unwrap(f.type)[3]] for f in d.fields if _unwrap(f.type)[3] in enums}
+        if fields:
+            out.append(f'    "{d.name.value}": {{')
+            out += [f'        "{name}": frozenset({values!r}),' for name, values in fields.items()]
+            out.append("    },")
+    out += ["}", ""]
+    return "\n".join(out)
+
+
+def _import(path: str, module_name: str):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_module(schema_path: str = SCHEMA_PATH, cache_dir: Optional[str] = CACHE_DIR):
+    """The generated module for this SDL, generating and caching it on first use."""
+    with open(schema_path, "rb") as f:
+        sdl = f.read()
+    digest = hashlib.sha256(sdl + GENERATOR_VERSION.encode()).hexdigest()
+    if digest in _loaded:
+        return _loaded[digest]
+
+    module_name = f"coercers_{digest[:16]}"
+    if cache_dir is None:
+        module = types.ModuleType(module_name)
+        exec(compile(generate_source(sdl.decode("utf-8"), digest), module_name, "exec"), module.__dict__)
+    else:
+        path = os.path.join(cache_dir, module_name + ".py")
+        if not os.path.exists(path):
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(generate_source(sdl.decode("utf-8"), digest))
+            os.replace(tmp, path)
+        module = _import(path, module_name)
+    _loaded[digest] = module
+    return module
+
+
+def load_coercers(schema_path: str = SCHEMA_PATH, cache_dir: Optional[str] = CACHE_DIR) -> Dict[str, Callable]:
+    """Type name -> coercer."""
+    return load_module(schema_path, cache_dir).COERCERS
+
+
+class LazyCoercers(Mapping):
+    """load_coercers() deferred to the first lookup."""
+
+    def __init__(self, schema_path: str = SCHEMA_PATH, cache_dir: Optional[str] = CACHE_DIR):
+        self.schema_path = schema_path
+        self.cache_dir = cache_dir
+        self._coercers: Optional[Dict[str, Callable]] = None
+
+    def _load(self) -> Dict[str, Callable]:
+        if self._coercers is None:
+            self._coercers = load_coercers(self.schema_path, self.cache_dir)
+        return self._coercers
+
+    def __getitem__(self, type_name: str) -> Callable:
+        return self._load()[type_name]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+
+def required_fields(schema_path: str = SCHEMA_PATH, cache_dir: Optional[str] = CACHE_DIR) -> Dict[str, Tuple[str, ...]]:
+    """Type name -> fields that must be present and non-null (lists excluded: they default to [])."""
+    return load_module(schema_path, cache_dir).REQUIRED
+
+
+if __name__ == "__main__":
+    with open(SCHEMA_PATH, "rb") as f:
+        sdl = f.read()
+    print(generate_source(sdl.decode("utf-8"), hashlib.sha256(sdl + GENERATOR_VERSION.encode()).hexdigest()))
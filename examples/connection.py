@@ -0,0 +1,172 @@
+"""
+Client construction for the example scripts.
+
+Clients get their schema without an introspection round trip whenever
+possible:
+
+  1. the local SDL file shipped next to the scripts (schema.graphql), or
+  2. an introspection cache: <cache_dir>/<schema hash>.json holds the result,
+     and <cache_dir>/index.json maps each server URL to its current hash and
+     fetch time.
+
+Introspection only runs when neither is available or the cache entry for
+the URL is older than `max_age` seconds.
+
+gql and its transports are imported on first use, so importing this module
+(for DEFAULT_URL, say) stays cheap. A client validates each document object
+against its schema once; gql would otherwise re-validate it on every execute.
+
+HERTTA_GRAPHQL_URL overrides the default server URL.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+DEFAULT_URL = os.environ.get("HERTTA_GRAPHQL_URL", "http://localhost:3030/graphql")
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.graphql")
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "hertta-gql")
+DEFAULT_MAX_AGE = 24 * 3600
+VALIDATED_DOCUMENTS = 1024   # per client; batch documents are memoised by batching.parse_document
+
+
+@lru_cache(maxsize=None)
+def _buffer_requests_transport():
+    """RequestsHTTPTransport subclass whose request bodies are written by utilities.json_dumps."""
+    import requests
+    from gql.transport.requests import RequestsHTTPTransport
+    from utilities import json_dumps
+
+    class BufferSession(requests.Session):
+        def request(self, method, url, json=None, **kwargs):
+            if json is not None:
+                kwargs["data"] = json_dumps(json).encode("utf-8")
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Type": "application/json"}
+            return super().request(method, url, **kwargs)
+
+    class BufferRequestsHTTPTransport(RequestsHTTPTransport):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # set per instance, as on the aiohttp transport (batching checks it): gql 4's __init__
+            # assigns json.dumps here, and gql 3 has no json_serialize argument to pass it through
+            self.json_serialize = json_dumps
+
+        def connect(self):
+            super().connect()
+            self.session.__class__ = BufferSession      # same state, only request() differs
+
+    return BufferRequestsHTTPTransport
+
+
+def make_transport(url: str = DEFAULT_URL, use_async: bool = False, retries: int = 3):
+    """
+    Both transports write float buffers (array('d'), ndarrays) into the request body
+    with utilities.json_dumps. The aiohttp transport never retries; async callers retry
+    per request themselves (input_data.upload_model_async takes `retries`), so `retries`
+    only configures requests.
+    """
+    if use_async:
+        from gql.transport.aiohttp import AIOHTTPTransport
+        from utilities import json_dumps
+        return AIOHTTPTransport(url=url, json_serialize=json_dumps)
+    return _buffer_requests_transport()(url=url, verify=True, retries=retries)
+
+
+def schema_hash(introspection: Dict[str, Any]) -> str:
+    canonical = json.dumps(introspection, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _read_index(cache_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(cache_dir, "index.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json_atomic(path: str, obj: Any) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def load_cached_introspection(url: str, cache_dir: str = CACHE_DIR,
+                              max_age: float = DEFAULT_MAX_AGE) -> Optional[Dict[str, Any]]:
+    """Cached introspection result for `url`, or None if missing or stale."""
+    entry = _read_index(cache_dir).get(url)
+    if not entry or time.time() - entry.get("fetchedAt", 0) > max_age:
+        return None
+    try:
+        with open(os.path.join(cache_dir, entry["hash"] + ".json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_introspection(url: str, introspection: Dict[str, Any], cache_dir: str = CACHE_DIR) -> str:
+    os.makedirs(cache_dir, exist_ok=True)
+    digest = schema_hash(introspection)
+    path = os.path.join(cache_dir, digest + ".json")
+    if not os.path.exists(path):
+        _write_json_atomic(path, introspection)
+    index = _read_index(cache_dir)
+    index[url] = {"hash": digest, "fetchedAt": time.time()}
+    _write_json_atomic(os.path.join(cache_dir, "index.json"), index)
+    return digest
+
+
+def refresh_introspection(url: str = DEFAULT_URL, cache_dir: str = CACHE_DIR) -> Dict[str, Any]:
+    """Introspect the server now and store the result in the cache."""
+    from gql import Client
+
+    client = Client(transport=make_transport(url), fetch_schema_from_transport=True)
+    with client:
+        pass
+    save_introspection(url, client.introspection, cache_dir)
+    return client.introspection
+
+
+def _memoise_validation(client):
+    """Make client.validate skip document objects it has already accepted."""
+    validate = client.validate
+    # id -> document; holding the document keeps its id from being reused by another one
+    validated: "OrderedDict[int, Any]" = OrderedDict()
+
+    def validate_once(document):
+        key = id(document)
+        if validated.get(key) is document:
+            validated.move_to_end(key)
+            return
+        validate(document)
+        validated[key] = document
+        if len(validated) > VALIDATED_DOCUMENTS:
+            validated.popitem(last=False)
+
+    client.validate = validate_once
+    return client
+
+
+def make_client(url: str = DEFAULT_URL, schema_path: Optional[str] = SCHEMA_PATH,
+                cache_dir: str = CACHE_DIR, max_age: float = DEFAULT_MAX_AGE,
+                use_async: bool = False, retries: int = 3):
+    """
+    Client for `url` whose schema comes from `schema_path` (pass None to skip the
+    SDL file) or the introspection cache; introspects only on a cache miss.
+    `retries` applies to the requests transport.
+    """
+    from gql import Client
+
+    transport = make_transport(url, use_async, retries)
+    if schema_path and os.path.exists(schema_path):
+        with open(schema_path, "r", encoding="utf-8") as f:
+            return _memoise_validation(Client(transport=transport, schema=f.read()))
+
+    introspection = load_cached_introspection(url, cache_dir, max_age)
+    if introspection is None:
+        introspection = refresh_introspection(url, cache_dir)
+    return _memoise_validation(Client(transport=transport, introspection=introspection))
@@ -0,0 +1,203 @@
+"""
+Synthetic model generator for scaling tests.
+
+Writes a model file shaped like model_data.json at any size. Every name a
+section refers to exists: processes are wired between generated nodes with
+one topology in and one out, groups hold existing members, markets sit on a
+node (energy) or node group (reserve) and a process group, and every
+constraint factor points at a process-node pair that has a topology. All
+series have exactly as many values as the timeline has steps, so the result
+passes preflight.py.
+
+    python gen_model.py --nodes 200 --processes 400 --markets 20 --scenarios 5 \\
+        --factors 100 --steps 8760 --out model_big.json
+"""
+import argparse
+import json
+import math
+import random
+from typing import Any, Dict, List, Optional
+
+from preflight import validate_model
+
+MAX_STEPS = 35040   # a year at 15 minute resolution
+
+
+def _duration(seconds: int) -> Dict[str, int]:
+    return {"hours": seconds // 3600, "minutes": seconds % 3600 // 60, "seconds": seconds % 60}
+
+
+class _Series:
+    """Daily profiles plus noise, built from one precomputed sine period and noise pool."""
+
+    NOISE_POOL = 997
+
+    def __init__(self, rnd: random.Random, steps: int, steps_per_day: float):
+        self.rnd = rnd
+        self.steps = steps
+        self.period = max(1, round(steps_per_day))
+        self.wave = [math.sin(2 * math.pi * t / self.period) for t in range(steps + self.period)]
+        self.noise = [rnd.gauss(0, 1) for _ in range(steps + self.NOISE_POOL)]
+
+    def __call__(self, base: float, amplitude: float, noise: float = 0.05) -> List[float]:
+        """A daily profile around `base`, rounded to 3 decimals."""
+        k = self.rnd.randrange(self.period)
+        j = self.rnd.randrange(self.NOISE_POOL)
+        sd = noise * (abs(base) + 1)
+        return [round(base + amplitude * a + sd * z, 3)
+                for a, z in zip(self.wave[k:k + self.steps], self.noise[j:j + self.steps])]
+
+
+def generate_model(nodes: int = 10, processes: int = 12, markets: int = 2, scenarios: int = 3,
+                   constraints: int = 1, factors: int = 2, steps: int = 24, step_minutes: int = 60,
+                   storage_share: float = 0.2, start: str = "2025-01-01T00:00:00Z",
+                   seed: Optional[int] = 0) -> Dict[str, Any]:
+    """Build a consistent model dict; see the module docstring for what is linked to what."""
+    if nodes < 2 or processes < 1:
+        raise ValueError("A model needs at least 2 nodes and 1 process")
+    if factors and constraints < 1:
+        raise ValueError("Constraint factors need at least one constraint")
+    if not 1 <= steps <= MAX_STEPS:
+        raise ValueError(f"steps must be between 1 and {MAX_STEPS}")
+    rnd = random.Random(seed)
+    series = _Series(rnd, steps, 24 * 60 / step_minutes)
+    scenario_names = [f"s{i + 1}" for i in range(max(scenarios, 1))]
+    weights = [rnd.uniform(0.5, 1.5) for _ in scenario_names]
+
+    def per_scenario(base, amplitude, noise=0.05):
+        return [{"scenario": s, "series": series(base, amplitude, noise)} for s in scenario_names]
+
+    # ---------- nodes: a few commodities, the rest balance nodes, some with storage ----------
+    commodities = max(1, nodes // 10)
+    node_list, node_states = [], []
+    for i in range(nodes):
+        name = f"n{i}"
+        is_commodity = i < commodities
+        node = {"name": name, "isCommodity": is_commodity, "isMarket": False, "isRes": False,
+                "cost": [{"constant": round(rnd.uniform(5, 40), 2)}] if is_commodity else [],
+                "inflow": [] if is_commodity else per_scenario(-rnd.uniform(1, 10), rnd.uniform(0.5, 3))}
+        node_list.append(node)
+        if not is_commodity and rnd.random() < storage_share:
+            cap = round(rnd.uniform(5, 50), 1)
+            node_states.append({"nodeName": name, "state": {
+                "inMax": round(cap / 4, 2), "outMax": round(cap / 4, 2), "stateLossProportional": 0.001,
+                "stateMin": 0.0, "stateMax": cap, "initialState": round(cap / 2, 2),
+                "isScenarioIndependent": False, "isTemp": False, "tEConversion": 1.0, "residualValue": 0.0}})
+    balance = [n["name"] for n in node_list[commodities:]]
+
+    # ---------- processes: source node -> process -> sink node ----------
+    process_list, topologies = [], []
+    for i in range(processes):
+        name = f"p{i}"
+        is_res = rnd.random() < 0.2
+        process_list.append({
+            "name": name, "conversion": "UNIT", "isCfFix": False, "isOnline": False, "isRes": is_res,
+            "eff": round(rnd.uniform(0.3, 1.0), 3), "loadMin": 0.0, "loadMax": 1.0, "startCost": 0.0,
+            "minOnline": 0.0, "minOffline": 0.0, "maxOnline": 0.0, "maxOffline": 0.0,
+            "initialState": False, "isScenarioIndependent": False,
+            "cf": [], "effTs": [], "effOpsFun": [],
+        })
+        src = node_list[rnd.randrange(nodes)]["name"]
+        sink = rnd.choice([b for b in balance if b != src] or balance)
+        cap = round(rnd.uniform(1, 50), 1)
+        for source_node, sink_node in ((src, None), (None, sink)):
+            topologies.append({"processName": name, "sourceNodeName": source_node, "sinkNodeName": sink_node,
+                               "capacity": cap, "vomCost": round(rnd.uniform(0, 5), 2), "rampUp": 0.5,
+                               "rampDown": 0.5, "initialLoad": 0.0, "initialFlow": 0.0, "capTs": []})
+
+    # ---------- groups ----------
+    group_count = max(1, markets)
+    node_groups = [{"name": f"ng{g}", "nodes": balance[g::group_count]} for g in range(group_count)]
+    node_groups = [g for g in node_groups if g["nodes"]]
+    process_groups = [{"name": f"pg{g}", "processes": [p["name"] for p in process_list[g::group_count]]}
+                      for g in range(group_count)]
+    process_groups = [g for g in process_groups if g["processes"]]
+
+    # ---------- markets: every fourth one is an upward reserve market on a node group ----------
+    market_list = []
+    for i in range(markets):
+        reserve = i % 4 == 3
+        price = rnd.uniform(20, 80)
+        market_list.append({
+            "name": f"m{i}", "mType": "RESERVE" if reserve else "ENERGY",
+            "node": node_groups[i % len(node_groups)]["name"] if reserve else balance[i % len(balance)],
+            "processGroup": process_groups[i % len(process_groups)]["name"],
+            "direction": "UP" if reserve else None, "reserveType": "fast" if reserve else None,
+            "isBid": True, "isLimited": False, "minBid": 0.0, "maxBid": 0.0, "fee": 0.0,
+            "realisation": per_scenario(0.0, 0.1, 0.0) if reserve else [],
+            "price": per_scenario(price, price / 3),
+            "upPrice": per_scenario(price * 1.1, price / 3),
+            "downPrice": per_scenario(price * 0.9, price / 3),
+            "reserveActivationPrice": [{"constant": round(price, 2)}] if reserve else [],
+        })
+
+    # ---------- generic constraints: factors on existing process-node topologies ----------
+    gen_constraints = [{"name": f"c{i}", "gcType": rnd.choice(["LESS_THAN", "GREATER_THAN"]), "isSetpoint": False,
+                        "penalty": 1000.0, "constant": [{"constant": round(rnd.uniform(0, 100), 1)}],
+                        "flow_factors": []}
+                       for i in range(constraints if factors else 0)]
+    pairs = [(t["processName"], t["sourceNodeName"] or t["sinkNodeName"]) for t in topologies]
+    rnd.shuffle(pairs)
+    for i, (process_name, node_name) in enumerate(pairs[:factors]):
+        gen_constraints[i % len(gen_constraints)]["flow_factors"].append({
+            "processName": process_name, "sourceOrSinkNodeName": node_name,
+            "factor": per_scenario(1.0, 0.2, 0.01)})
+
+    total = sum(weights)
+    return {
+        "settings": {"location": {"country": "Finland", "place": "Helsinki"}},
+        "timeline": {"duration": _duration((steps - 1) * step_minutes * 60),
+                     "step": _duration(step_minutes * 60),
+                     "start": {"customStartTime": start}},
+        "setup": {"useMarketBids": True, "useReserves": any(m["mType"] == "RESERVE" for m in market_list),
+                  "useReserveRealisation": True, "useNodeDummyVariables": True, "useRampDummyVariables": True,
+                  "commonTimesteps": 0, "commonScenarioName": "",
+                  "nodeDummyVariableCost": 10000.0, "rampDummyVariableCost": 10000.0},
+        "nodes": node_list,
+        "node_states": node_states,
+        "processes": process_list,
+        "node_groups": node_groups,
+        "process_groups": process_groups,
+        "markets": market_list,
+        "scenarios": [{"name": s, "weight": round(w / total, 4)} for s, w in zip(scenario_names, weights)],
+        "topologies": topologies,
+        "gen_constraints": gen_constraints,
+        "reserve_types": [{"name": "fast", "rampRate": 1.0}],
+        "risk": [{"parameter": "alfa", "value": 0.1}, {"parameter": "beta", "value": 0.0}],
+        "node_diffusions": [],
+        "node_delays": [],
+        "node_histories": [],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic model file for scaling tests.")
+    parser.add_argument("--nodes", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=12)
+    parser.add_argument("--markets", type=int, default=2)
+    parser.add_argument("--scenarios", type=int, default=3)
+    parser.add_argument("--constraints", type=int, default=1)
+    parser.add_argument("--factors", type=int, default=2, help="flow factors, spread over the constraints")
+    parser.add_argument("--steps", type=int, default=24, help=f"series length, at most {MAX_STEPS}")
+    parser.add_argument("--step-minutes", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-check", action="store_true", help="skip the preflight check of the result")
+    parser.add_argument("--out", default="model_generated.json")
+    args = parser.parse_args()
+
+    model = generate_model(nodes=args.nodes, processes=args.processes, markets=args.markets,
+                           scenarios=args.scenarios, constraints=args.constraints, factors=args.factors,
+                           steps=args.steps, step_minutes=args.step_minutes, seed=args.seed)
+    if not args.no_check:
+        problems = validate_model(model)
+        if problems:
+            raise SystemExit("Generated model is inconsistent:\n" + "\n".join(f"  {p}" for p in problems))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(model, f, separators=(",", ":"))
+    print(f"Wrote {args.out}: {len(model['nodes'])} nodes, {len(model['processes'])} processes, "
+          f"{len(model['topologies'])} topologies, {len(model['markets'])} markets, "
+          f"{len(model['scenarios'])} scenarios x {args.steps} steps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+One command-line entry point for the everyday tasks:
+
+    python -m hertta upload --model model_data.json [--sync]
+    python -m hertta optimize [--outcome-format json]
+    python -m hertta fetch-prices
+    python -m hertta status 12 13
+
+(run from this directory, or put it on PYTHONPATH). Start-up is kept short:
+this module imports only the standard library and connection.py, and each
+subcommand imports what it needs when it runs. `status` does not need gql at
+all; it posts one aliased jobStatus query with urllib. The other commands
+build a gql client, whose documents are parsed on first use and validated
+once (see connection.py and batching.parse_document).
+
+bench_startup.py measures the cold-start time of these commands.
+"""
+import argparse
+import json
+import sys
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from connection import DEFAULT_URL, SCHEMA_PATH
+
+
+def post(url: str, query: str, variables: Optional[Dict[str, Any]] = None, timeout: float = 30.0) -> Dict[str, Any]:
+    """POST one GraphQL request with the standard library; returns `data`, raises on errors."""
+    body = json.dumps({"query": query, "variables": variables or {}}).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        result = json.load(response)
+    if result.get("errors"):
+        raise RuntimeError("; ".join(e.get("message", str(e)) for e in result["errors"]))
+    return result["data"]
+
+
+def job_statuses(url: str, job_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Job id -> {"state", "message"} with one aliased query, as jobs.wait_for_jobs polls."""
+    fields = "\n".join(f"  j{i}: jobStatus(jobId: {i}) {{ state message }}" for i in job_ids)
+    data = post(url, f"query JobStatuses {{\n{fields}\n}}")
+    return {i: data[f"j{i}"] for i in job_ids}
+
+
+def _client(args):
+    from connection import make_client
+    return make_client(args.url, schema_path=args.schema or None)
+
+
+# ---------- SUBCOMMANDS ----------
+def cmd_status(args) -> int:
+    statuses = job_statuses(args.url, args.job_ids)
+    for job_id, status in statuses.items():
+        print(f"Job {job_id}: {status['state']}" + (f" | {status['message']}" if status.get("message") else ""))
+    return 1 if any(s["state"] == "FAILED" for s in statuses.values()) else 0
+
+
+def cmd_upload(args) -> int:
+    from batching import DEFAULT_BATCH_SIZE, BatchExecutor
+    from preflight import PreflightError, check_model
+    from series_refs import load_model
+
+    data = load_model(args.model, stream=args.stream)
+    if not args.no_preflight:
+        try:
+            check_model(data)
+        except PreflightError as e:
+            print(e, file=sys.stderr)
+            return 2
+    client = _client(args)
+    executor = BatchExecutor(client, batch_size=args.batch_size or DEFAULT_BATCH_SIZE)
+    if args.sync:
+        from model_sync import sync_model
+        sync_model(client, executor, data, snapshot_path=args.sync_state, dry_run=args.dry_run)
+    else:
+        from input_data import upload_model
+        upload_model(executor, data)
+    return 0
+
+
+def cmd_optimize(args) -> int:
+    from input_data import run_optimization
+
+    payload = run_optimization(_client(args), deadline=args.job_timeout, outcome_format=args.outcome_format)
+    return 0 if payload["state"] == "FINISHED" else 1
+
+
+def cmd_fetch_prices(args) -> int:
+    from jobs import fetch_outcome, print_status, start_job, wait_for_job
+    from outcome_store import save_outcome
+
+    client = _client(args)
+    job_id = start_job(client, "electricity_price")
+    print(f"Electricity price fetch started. id={job_id}")
+    job = wait_for_job(client, job_id, deadline=args.job_timeout, on_status=print_status)
+    payload = {"jobId": job_id, "state": job.state}
+    if job.finished:
+        payload["outcome"] = fetch_outcome(client, job_id)
+    else:
+        payload["message"] = job.message
+    base = f"electricity_price_outcome_{job_id}"
+    path = save_outcome(base, payload, args.outcome_format)
+    print(f"Job {job_id} {job.state} after {job.elapsed:.2f}s; wrote {path}")
+    return 0 if job.finished else 1
+
+
+# ---------- ARGUMENTS ----------
+def _server_args(p, schema: bool = True):
+    p.add_argument("--url", default=DEFAULT_URL)
+    if schema:
+        p.add_argument("--schema", default=SCHEMA_PATH,
+                       help="local SDL file; pass '' to use the introspection cache instead")
+
+
+def _job_args(p):
+    p.add_argument("--job-timeout", type=float, default=300.0, help="seconds to wait for the job")
+    p.add_argument("--outcome-format", choices=("binary", "json"), default="binary",
+                   help="binary: float64 columns + index (outcome_store.py); json: one indented JSON file")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="hertta", description="Upload, optimise and inspect Hertta models.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("upload", help="send a model file to the server")
+    _server_args(p)
+    p.add_argument("--model", default="model_data.json")
+    p.add_argument("--batch-size", type=int, default=None, help="mutations per aliased request")
+    p.add_argument("--stream", action="store_true", help="parse and send the model file one item at a time")
+    p.add_argument("--sync", action="store_true", help="send only the difference to the server's current model")
+    p.add_argument("--sync-state", default=None, help="snapshot file for --sync (see model_sync.py)")
+    p.add_argument("--dry-run", action="store_true", help="with --sync: print the plan, send nothing")
+    p.add_argument("--no-preflight", action="store_true", help="skip the local validation of the model")
+    p.set_defaults(run=cmd_upload)
+
+    p = commands.add_parser("optimize", help="optimise the model on the server and write the outcome")
+    _server_args(p)
+    _job_args(p)
+    p.set_defaults(run=cmd_optimize)
+
+    p = commands.add_parser("fetch-prices", help="run an electricity price fetch and write its outcome")
+    _server_args(p)
+    _job_args(p)
+    p.set_defaults(run=cmd_fetch_prices)
+
+    p = commands.add_parser("status", help="print the state of jobs")
+    _server_args(p, schema=False)
+    p.add_argument("job_ids", type=int, nargs="+", metavar="JOB_ID")
+    p.set_defaults(run=cmd_status)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,25 @@
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
-import json
-from utilities import prune_nones, pick_keys, normalize_points, normalize_value_inputs
-
-transport = RequestsHTTPTransport(
-    url="http://localhost:3030/graphql",
-    verify=True,
-    retries=3,
-)
-
-client = Client(transport=transport, fetch_schema_from_transport=True)
-
-with open('model_data.json', 'r') as f:
-    data = json.load(f)
+import argparse
+import asyncio
+from contextlib import nullcontext
+from coercers import LazyCoercers
+from batching import BatchExecutor, MutationSpec, Op, MESSAGE, DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY
+from connection import DEFAULT_URL, SCHEMA_PATH, make_client, refresh_introspection
+from jobs import fetch_outcome, print_status, start_job, wait_for_job
+from outcome_store import save_outcome
+from preflight import PreflightError, check_model
+from series_refs import load_model
+
+# Every section below turns its part of model_data.json into a stream of Ops
+# (mutation spec + variables + label); BatchExecutor packs them into aliased
+# multi-mutation documents. SECTIONS fixes the order sections are sent in.
+#
+# Input objects are cleaned by coercers generated from schema.graphql: one pass
+# keeps the type's fields, drops nulls, casts floats and fills [] defaults. They
+# are loaded on the first lookup, not at import.
+COERCE = LazyCoercers()
 
 # ---------- SETTINGS ----------
-update_settings_mut = gql("""
-mutation UpdateSettings($settings: SettingsInput!) {
-  updateSettings(settingsInput: $settings) {
+UPDATE_SETTINGS = MutationSpec("updateSettings", {"settingsInput": "SettingsInput!"}, """
     __typename
     ... on Settings {
       priceFetcherScript
@@ -27,112 +29,57 @@ mutation UpdateSettings($settings: SettingsInput!) {
     ... on ValidationErrors {
       errors { field message }
     }
-  }
-}
 """)
 
-settings_input = prune_nones(data.get("settings", {}))
-if settings_input:
-    res = client.execute(update_settings_mut, variable_values={"settings": settings_input})
-    print("UpdateSettings result:", res)
-else:
-    print("No 'settings' block found in data; skipping updateSettings.")
+def settings_ops(data):
+    settings_input = COERCE["SettingsInput"](data.get("settings", {}))
+    if settings_input:
+        yield Op(UPDATE_SETTINGS, {"settingsInput": settings_input}, "settings")
 
 # ---------- TIME LINE ----------
-update_timeline_mut = gql("""
-mutation UpdateTimeLine($tl: TimeLineUpdate!) {
-  updateTimeLine(timeLineInput: $tl) {
-    errors { field message }
-  }
-}
-""")
+UPDATE_TIMELINE = MutationSpec("updateTimeLine", {"timeLineInput": "TimeLineUpdate!"})
 
-timeline_input = prune_nones(data.get("timeline", {}))
-if timeline_input:
-    res = client.execute(update_timeline_mut, variable_values={"tl": timeline_input})
-    print("UpdateTimeLine result:", res)
-else:
-    print("No 'timeline' block found in data; skipping updateTimeLine.")
+def timeline_ops(data):
+    timeline_input = COERCE["TimeLineUpdate"](data.get("timeline", {}))
+    if timeline_input:
+        yield Op(UPDATE_TIMELINE, {"timeLineInput": timeline_input}, "timeline")
 
 # ---------- CREATE SETUP ----------
+CREATE_SETUP = MutationSpec("createInputDataSetup", {"setupUpdate": "InputDataSetupInput!"})
 
-create_setup_mut = gql("""
-mutation($s: InputDataSetupInput!) {
-  createInputDataSetup(setupUpdate: $s) {
-    errors { field message }
-  }
-}
-""")
-
-setup_input = prune_nones(data.get("setup", {}))
-res = client.execute(create_setup_mut, variable_values={"s": setup_input})
-print("CreateInputDataSetup result:", res)
-
+def setup_ops(data):
+    setup_input = COERCE["InputDataSetupInput"](data.get("setup", {}))
+    yield Op(CREATE_SETUP, {"setupUpdate": setup_input}, "setup")
 
 # ---------- NODES ----------
-create_node_mutation = gql("""
-mutation CreateNode($node: NewNode!) {
-  createNode(node: $node) {
-    errors { field message }
-  }
-}
-""")
-
-NODE_KEYS = {"name","isCommodity","isMarket","isRes","cost","inflow"}
+CREATE_NODE = MutationSpec("createNode", {"node": "NewNode!"})
 
-nodes = data.get('nodes', [])
-for raw in nodes:
-    node_input = pick_keys(raw, NODE_KEYS)
-    node_input.setdefault("cost", [])
-    node_input.setdefault("inflow", [])
-    node_input = prune_nones(node_input)
-    result = client.execute(create_node_mutation, variable_values={"node": node_input})
-    print(f"CreateNode result for {raw.get('name')}:", result)
+def node_ops(data):
+    for raw in data.get('nodes', []):
+        node_input = COERCE["NewNode"](raw)
+        yield Op(CREATE_NODE, {"node": node_input}, raw.get("name"))
 
 # ---------- NODE STATE ----------
-set_node_state_mutation = gql("""
-mutation SetNodeState($nodeName: String!, $state: NewState) {
-  setNodeState(state: $state, nodeName: $nodeName) {
-    errors { field message }
-  }
-}
-""")
+SET_NODE_STATE = MutationSpec("setNodeState", {"nodeName": "String!", "state": "NewState"})
 
-node_states = data.get("node_states", [])
-for entry in node_states:
-    node_name = entry["nodeName"]
-    state = entry["state"]
+NODE_STATE_REQUIRED_FIELDS = [
+    "inMax","outMax","stateLossProportional","stateMin","stateMax",
+    "initialState","isScenarioIndependent","isTemp","tEConversion","residualValue"
+]
 
-    required_fields = [
-        "inMax","outMax","stateLossProportional","stateMin","stateMax",
-        "initialState","isScenarioIndependent","isTemp","tEConversion","residualValue"
-    ]
-    missing = [k for k in required_fields if k not in state]
-    if missing:
-        raise ValueError(f"State for node {node_name!r} missing fields: {', '.join(missing)}")
+def node_state_ops(data):
+    for entry in data.get("node_states", []):
+        node_name = entry["nodeName"]
+        state = entry["state"]
 
-    res = client.execute(
-        set_node_state_mutation,
-        variable_values={"nodeName": node_name, "state": state}
-    )
-    print(f"SetNodeState result for {node_name}:", res)
+        missing = [k for k in NODE_STATE_REQUIRED_FIELDS if k not in state]
+        if missing:
+            raise ValueError(f"State for node {node_name!r} missing fields: {', '.join(missing)}")
 
+        yield Op(SET_NODE_STATE, {"nodeName": node_name, "state": COERCE["NewState"](state)}, node_name)
 
 # ---------- PROCESSES ----------
-create_process_mutation = gql("""
-mutation CreateProcess($process: NewProcess!) {
-  createProcess(process: $process) {
-    errors { field message }
-  }
-}
-""")
-
-PROCESS_KEYS = {
-    "name","conversion","isCfFix","isOnline","isRes","eff",
-    "loadMin","loadMax","startCost","minOnline","maxOnline",
-    "minOffline","maxOffline","initialState","isScenarioIndependent",
-    "cf","effTs","effOpsFun"
-}
+CREATE_PROCESS = MutationSpec("createProcess", {"process": "NewProcess!"})
 
 REQUIRED_PROCESS_FIELDS = {
     "name","conversion","isCfFix","isOnline","isRes","eff",
@@ -140,472 +87,454 @@ REQUIRED_PROCESS_FIELDS = {
     "minOffline","maxOffline","initialState","isScenarioIndependent"
 }
 
-processes = data.get('processes', [])
-for raw in processes:
-
-    missing = [k for k in REQUIRED_PROCESS_FIELDS if raw.get(k) is None]
-    if missing:
-        raise ValueError(f"Process {raw.get('name')!r}: missing required fields: {', '.join(missing)}")
-
-    proc_input = pick_keys(raw, PROCESS_KEYS)
-
-    proc_input.setdefault("cf", [])
-    proc_input.setdefault("effTs", [])
-    proc_input.setdefault("effOpsFun", [])
-
-    proc_input["effOpsFun"] = normalize_points(proc_input["effOpsFun"])
-
-    proc_input = prune_nones(proc_input)
+def process_ops(data):
+    for raw in data.get('processes', []):
+        missing = [k for k in REQUIRED_PROCESS_FIELDS if raw.get(k) is None]
+        if missing:
+            raise ValueError(f"Process {raw.get('name')!r}: missing required fields: {', '.join(missing)}")
 
-    add_process_result = client.execute(
-        create_process_mutation,
-        variable_values={"process": proc_input}
-    )
-    print(f"CreateProcess result for {raw.get('name')}:", add_process_result)
+        proc_input = COERCE["NewProcess"](raw)
+        yield Op(CREATE_PROCESS, {"process": proc_input}, raw.get("name"))
 
 # ---------- NODE GROUPS ----------
-create_node_group_mutation = gql("""
-mutation CreateNodeGroup($name: String!) {
-  createNodeGroup(name: $name) { message }
-}
-""")
+CREATE_NODE_GROUP = MutationSpec("createNodeGroup", {"name": "String!"}, MESSAGE)
 
-node_groups = data.get('node_groups', [])
-for ng in node_groups:
-    result = client.execute(create_node_group_mutation, variable_values={"name": ng["name"]})
-    print(f"CreateNodeGroup result for {ng.get('name')}:", result)
+def node_group_ops(data):
+    for ng in data.get('node_groups', []):
+        yield Op(CREATE_NODE_GROUP, {"name": ng["name"]}, ng["name"])
 
 # ---------- PROCESS GROUPS ----------
-create_process_group_mutation = gql("""
-mutation CreateProcessGroup($name: String!) {
-  createProcessGroup(name: $name) { message }
-}
-""")
+CREATE_PROCESS_GROUP = MutationSpec("createProcessGroup", {"name": "String!"}, MESSAGE)
 
-process_groups = data.get('process_groups', [])
-for pg in process_groups:
-    result = client.execute(create_process_group_mutation, variable_values={"name": pg["name"]})
-    print(f"CreateProcessGroup result for {pg.get('name')}:", result)
+def process_group_ops(data):
+    for pg in data.get('process_groups', []):
+        yield Op(CREATE_PROCESS_GROUP, {"name": pg["name"]}, pg["name"])
 
 # ---------- ADD MEMBERS TO NODE GROUPS ----------
-add_node_to_group_mutation = gql("""
-mutation AddNodeToGroup($nodeName: String!, $groupName: String!) {
-  addNodeToGroup(nodeName: $nodeName, groupName: $groupName) { message }
-}
-""")
+ADD_NODE_TO_GROUP = MutationSpec("addNodeToGroup", {"nodeName": "String!", "groupName": "String!"}, MESSAGE)
 
-# Use the already-read 'node_groups' from data (created above)
-for ng in node_groups:
-    members = ng.get("nodes", []) or []
-    if not members:
-        continue
-    gname = ng["name"]
-    for node_name in members:
-        res = client.execute(
-            add_node_to_group_mutation,
-            variable_values={"nodeName": node_name, "groupName": gname}
-        )
-        print(f"addNodeToGroup result: node={node_name} -> group={gname}: {res}")
+def node_group_member_ops(data):
+    for ng in data.get('node_groups', []):
+        gname = ng["name"]
+        for node_name in ng.get("nodes", []) or []:
+            yield Op(ADD_NODE_TO_GROUP, {"nodeName": node_name, "groupName": gname},
+                     f"node={node_name} -> group={gname}")
 
 # ---------- ADD MEMBERS TO PROCESS GROUPS ----------
-add_process_to_group_mutation = gql("""
-mutation AddProcessToGroup($processName: String!, $groupName: String!) {
-  addProcessToGroup(processName: $processName, groupName: $groupName) { message }
-}
-""")
-
-# Use the already-read 'process_groups' from data (created above)
-for pg in process_groups:
-    members = pg.get("processes", []) or []
-    if not members:
-        continue
-    gname = pg["name"]
-    for proc_name in members:
-        res = client.execute(
-            add_process_to_group_mutation,
-            variable_values={"processName": proc_name, "groupName": gname}
-        )
-        print(f"addProcessToGroup result: process={proc_name} -> group={gname}: {res}")
+ADD_PROCESS_TO_GROUP = MutationSpec("addProcessToGroup", {"processName": "String!", "groupName": "String!"}, MESSAGE)
 
+def process_group_member_ops(data):
+    for pg in data.get('process_groups', []):
+        gname = pg["name"]
+        for proc_name in pg.get("processes", []) or []:
+            yield Op(ADD_PROCESS_TO_GROUP, {"processName": proc_name, "groupName": gname},
+                     f"process={proc_name} -> group={gname}")
 
 # ---------- SCENARIOS ----------
-create_scenario_mutation = gql("""
-mutation CreateScenario($name: String!, $weight: Float!) {
-  createScenario(name: $name, weight: $weight) { message }
-}
-""")
+CREATE_SCENARIO = MutationSpec("createScenario", {"name": "String!", "weight": "Float!"}, MESSAGE)
 
-scenarios = data.get("scenarios", [{"name": "ExampleScenario", "weight": 1.0}])
-for sc in scenarios:
-    vars_ = {"name": sc["name"], "weight": float(sc.get("weight", 1.0))}
-    add_scenario_result = client.execute(create_scenario_mutation, variable_values=vars_)
-    print(f"CreateScenario result for {sc['name']}:", add_scenario_result)
+def scenario_ops(data):
+    for sc in data.get("scenarios", [{"name": "ExampleScenario", "weight": 1.0}]):
+        vars_ = {"name": sc["name"], "weight": float(sc.get("weight", 1.0))}
+        yield Op(CREATE_SCENARIO, vars_, sc["name"])
 
 # ---------- MARKETS ----------
-create_market_mutation = gql("""
-mutation CreateMarket($market: NewMarket!) {
-  createMarket(market: $market) { errors { field message } }
-}
-""")
+CREATE_MARKET = MutationSpec("createMarket", {"market": "NewMarket!"})
 
-MARKET_KEYS = {
-    "name","mType","node","processGroup","direction",
-    "realisation","reserveType","isBid","isLimited",
-    "minBid","maxBid","fee","price","upPrice","downPrice","reserveActivationPrice"
-}
-
-markets = data.get("markets", [])
-for raw in markets:
-    mkt = pick_keys(raw, MARKET_KEYS)
-
-    mkt.setdefault("realisation", [])
-    mkt.setdefault("price", [])
-    mkt.setdefault("upPrice", [])
-    mkt.setdefault("downPrice", [])
-    mkt.setdefault("reserveActivationPrice", [])
-
-    mkt = prune_nones(mkt)
-    add_market_result = client.execute(create_market_mutation, variable_values={"market": mkt})
-    print(f"CreateMarket result for {raw.get('name')}:", add_market_result)
+def market_ops(data):
+    for raw in data.get("markets", []):
+        mkt = COERCE["NewMarket"](raw)
+        yield Op(CREATE_MARKET, {"market": mkt}, raw.get("name"))
 
 # ---------- RISKS ----------
-create_risk_mutation = gql("""
-mutation CreateRisk($risk: NewRisk!) {
-  createRisk(risk: $risk) { errors { field message } }
-}
-""")
-
-RISK_KEYS = {"parameter","value"}
+CREATE_RISK = MutationSpec("createRisk", {"risk": "NewRisk!"})
 
-risks = data.get("risk", [])
-for raw in risks:
-    risk = prune_nones(pick_keys(raw, RISK_KEYS))
-    add_risk_result = client.execute(create_risk_mutation, variable_values={"risk": risk})
-    print(f"CreateRisk result for {raw.get('parameter')}:", add_risk_result)
+def risk_ops(data):
+    for raw in data.get("risk", []):
+        risk = COERCE["NewRisk"](raw)
+        yield Op(CREATE_RISK, {"risk": risk}, raw.get("parameter"))
 
 # ---------- NODE DIFFUSION ----------
-create_node_diffusion_mutation = gql("""
-mutation CreateNodeDiffusion($diff: NewNodeDiffusion!) {
-  createNodeDiffusion(newDiffusion: $diff) { errors { field message } }
-}
-""")
-
-NODE_DIFFUSION_KEYS = {"fromNode","toNode","coefficient"}
+CREATE_NODE_DIFFUSION = MutationSpec("createNodeDiffusion", {"newDiffusion": "NewNodeDiffusion!"})
 
-node_diffusions = data.get("node_diffusions", [])
-for raw in node_diffusions:
-    diff = pick_keys(raw, NODE_DIFFUSION_KEYS)
-    diff.setdefault("coefficient", [])
-    diff = prune_nones(diff)
-    add_nodediffusion_result = client.execute(
-        create_node_diffusion_mutation, variable_values={"diff": diff}
-    )
-    print(f"CreateNodeDiffusion result {diff.get('fromNode')} -> {diff.get('toNode')}:", add_nodediffusion_result)
+def node_diffusion_ops(data):
+    for raw in data.get("node_diffusions", []):
+        diff = COERCE["NewNodeDiffusion"](raw)
+        yield Op(CREATE_NODE_DIFFUSION, {"newDiffusion": diff},
+                 f"{diff.get('fromNode')} -> {diff.get('toNode')}")
 
 # ---------- NODE DELAY ----------
-create_node_delay_mutation = gql("""
-mutation CreateNodeDelay($delay: NewNodeDelay!) {
-  createNodeDelay(delay: $delay) { errors { field message } }
-}
-""")
-
-NODE_DELAY_KEYS = {"fromNode","toNode","delay","minDelayFlow","maxDelayFlow"}
+CREATE_NODE_DELAY = MutationSpec("createNodeDelay", {"delay": "NewNodeDelay!"})
 
-node_delays = data.get("node_delays", [])
-for raw in node_delays:
-    dly = prune_nones(pick_keys(raw, NODE_DELAY_KEYS))
-    add_nodedelay_result = client.execute(
-        create_node_delay_mutation, variable_values={"delay": dly}
-    )
-    print(f"CreateNodeDelay result {dly.get('fromNode')} -> {dly.get('toNode')}:", add_nodedelay_result)
+def node_delay_ops(data):
+    for raw in data.get("node_delays", []):
+        dly = COERCE["NewNodeDelay"](raw)
+        yield Op(CREATE_NODE_DELAY, {"delay": dly}, f"{dly.get('fromNode')} -> {dly.get('toNode')}")
 
 # ---------- NODE HISTORY ----------
-create_node_history_mutation = gql("""
-mutation CreateNodeHistory($nodeName: String!) {
-  createNodeHistory(nodeName: $nodeName) { errors { field message } }
-}
-""")
+CREATE_NODE_HISTORY = MutationSpec("createNodeHistory", {"nodeName": "String!"})
 
-add_history_step_mutation = gql("""
-mutation AddStep($nodeName: String!, $step: NewSeries!) {
-  addStepToNodeHistory(nodeName: $nodeName, step: $step) { errors { field message } }
-}
-""")
+ADD_HISTORY_STEP = MutationSpec("addStepToNodeHistory", {"nodeName": "String!", "step": "NewSeries!"})
 
-node_histories = data.get("node_histories", [])
-for raw in node_histories:
-    node_name = raw["nodeName"]
-    res = client.execute(create_node_history_mutation, variable_values={"nodeName": node_name})
-    print(f"CreateNodeHistory result for {node_name}:", res)
+def node_history_ops(data):
+    for raw in data.get("node_histories", []):
+        yield Op(CREATE_NODE_HISTORY, {"nodeName": raw["nodeName"]}, raw["nodeName"])
 
-    for step in raw.get("steps", []):
-        step_clean = prune_nones(step)
-        res2 = client.execute(add_history_step_mutation, variable_values={"nodeName": node_name, "step": step_clean})
-        print(f"AddStepToNodeHistory result for {node_name}:", res2)
+def node_history_step_ops(data):
+    # steps are appended in order, so this section must not be reordered
+    for raw in data.get("node_histories", []):
+        node_name = raw["nodeName"]
+        for i, step in enumerate(raw.get("steps", [])):
+            yield Op(ADD_HISTORY_STEP, {"nodeName": node_name, "step": COERCE["NewSeries"](step)},
+                     f"{node_name} step {i}")
 
 # ---------- RESERVE TYPE ----------
-create_reserve_type_mutation = gql("""
-mutation CreateReserveType($rt: NewReserveType!) {
-  createReserveType(reserveType: $rt) { errors { field message } }
-}
-""")
-
-RESERVE_TYPE_KEYS = {"name","rampRate"}
+CREATE_RESERVE_TYPE = MutationSpec("createReserveType", {"reserveType": "NewReserveType!"})
 
-reserve_types = data.get("reserve_types", [])
-for raw in reserve_types:
-    rt = prune_nones(pick_keys(raw, RESERVE_TYPE_KEYS))
-    add_reservetype_result = client.execute(
-        create_reserve_type_mutation, variable_values={"rt": rt}
-    )
-    print(f"CreateReserveType result for {rt.get('name')}:", add_reservetype_result)
+def reserve_type_ops(data):
+    for raw in data.get("reserve_types", []):
+        rt = COERCE["NewReserveType"](raw)
+        yield Op(CREATE_RESERVE_TYPE, {"reserveType": rt}, rt.get("name"))
 
 # ---------- INFLOW BLOCK ----------
-create_inflow_block_mutation = gql("""
-mutation CreateInflowBlock($ib: NewInflowBlock!) {
-  createInflowBlock(inflowBlock: $ib) { errors { field message } }
-}
-""")
-
-INFLOW_BLOCK_KEYS = {"name","node","data"}
+CREATE_INFLOW_BLOCK = MutationSpec("createInflowBlock", {"inflowBlock": "NewInflowBlock!"})
 
-inflow_blocks = data.get("inflow_blocks", [])
-for raw in inflow_blocks:
-    ib = pick_keys(raw, INFLOW_BLOCK_KEYS)
-    ib.setdefault("data", [])
-    ib = prune_nones(ib)
-    add_inflowblock_result = client.execute(
-        create_inflow_block_mutation, variable_values={"ib": ib}
-    )
-    print(f"CreateInflowBlock result for {ib.get('name')}:", add_inflowblock_result)
+def inflow_block_ops(data):
+    for raw in data.get("inflow_blocks", []):
+        ib = COERCE["NewInflowBlock"](raw)
+        yield Op(CREATE_INFLOW_BLOCK, {"inflowBlock": ib}, ib.get("name"))
 
 # ---------- TOPOLOGIES ----------
-create_topology_mutation = gql("""
-mutation CreateTopology(
-  $processName: String!,
-  $sourceNodeName: String,
-  $sinkNodeName: String,
-  $topology: NewTopology!
-) {
-  createTopology(
-    processName: $processName,
-    sourceNodeName: $sourceNodeName,
-    sinkNodeName: $sinkNodeName,
-    topology: $topology
-  ) {
-    errors { field message }
-  }
-}
-""")
-
-TOPOLOGY_KEYS = {
-    "capacity","vomCost","rampUp","rampDown","initialLoad","initialFlow","capTs"
-}
+CREATE_TOPOLOGY = MutationSpec("createTopology", {
+    "processName": "String!",
+    "sourceNodeName": "String",
+    "sinkNodeName": "String",
+    "topology": "NewTopology!",
+})
+
+def topology_ops(data):
+    for raw in data.get("topologies", []):
+        process_name = raw["processName"]
+        src = raw.get("sourceNodeName")
+        sink = raw.get("sinkNodeName")
 
-topologies = data.get("topologies", [])
-for raw in topologies:
-    process_name = raw["processName"]
-    src = raw.get("sourceNodeName")   
-    sink = raw.get("sinkNodeName")   
-
-    topo = pick_keys(raw, TOPOLOGY_KEYS)
-    topo.setdefault("capTs", [])
-
-    cleaned_capts = []
-    for v in topo["capTs"]:
-        vi = {}
-        if "scenario" in v and v["scenario"] is not None:
-            vi["scenario"] = v["scenario"]
-        if "series" in v and v["series"] is not None:
-            vi["series"] = [float(x) for x in v["series"]]
-        # optional: include constant only if explicitly provided (non-None)
-        if "constant" in v and v["constant"] is not None:
-            vi["constant"] = float(v["constant"])
-        cleaned_capts.append(vi)
-
-    topo["capTs"] = cleaned_capts
-    topo = prune_nones(topo)
-
-    res = client.execute(
-        create_topology_mutation,
-        variable_values={
+        vars_ = {
             "processName": process_name,
             "sourceNodeName": src,
             "sinkNodeName": sink,
-            "topology": topo
-        }
-    )
-    print(f"CreateTopology result for process {process_name} (source={src}, sink={sink}):", res)
-
-    # ---------- GENERIC CONSTRAINT ----------
-create_gen_constraint_mutation = gql("""
-mutation CreateGenConstraint($constraint: NewGenConstraint!) {
-  createGenConstraint(constraint: $constraint) { errors { field message } }
-}
-""")
-
-create_flow_confactor_mutation = gql("""
-mutation CreateFlowConFactor(
-  $constraintName: String!,
-  $processName: String!,
-  $sourceOrSinkNodeName: String!,
-  $factor: [ValueInput!]!
-) {
-  createFlowConFactor(
-    constraintName: $constraintName,
-    processName: $processName,
-    sourceOrSinkNodeName: $sourceOrSinkNodeName,
-    factor: $factor
-  ) { errors { field message } }
-}
-""")
-
-create_state_confactor_mutation = gql("""
-mutation CreateStateConFactor(
-  $constraintName: String!,
-  $nodeName: String!,
-  $factor: [ValueInput!]!
-) {
-  createStateConFactor(
-    constraintName: $constraintName,
-    nodeName: $nodeName,
-    factor: $factor
-  ) { errors { field message } }
-}
-""")
-
-create_online_confactor_mutation = gql("""
-mutation CreateOnlineConFactor(
-  $constraintName: String!,
-  $processName: String!,
-  $factor: [ValueInput!]!
-) {
-  createOnlineConFactor(
-    constraintName: $constraintName,
-    processName: $processName,
-    factor: $factor
-  ) { errors { field message } }
-}
-""")
-
-GEN_CONSTRAINT_KEYS = {"name","gcType","isSetpoint","penalty","constant"}
-
-gen_constraints = data.get("gen_constraints", [])
-for raw in gen_constraints:
-    # 1) create the base constraint
-    gc = pick_keys(raw, GEN_CONSTRAINT_KEYS)
-    gc.setdefault("constant", [])
-    gc["constant"] = normalize_value_inputs(gc["constant"])
-    gc = prune_nones(gc)
-
-    add_gc_res = client.execute(
-        create_gen_constraint_mutation,
-        variable_values={"constraint": gc}
-    )
-    print(f"CreateGenConstraint result for {raw.get('name')}:", add_gc_res)
-
-    cname = raw["name"]
-
-    # 2) add FLOW factors (if any)
-    for ff in raw.get("flow_factors", []):
-        factor = normalize_value_inputs(ff.get("factor", []))
-        vars_ = {
-            "constraintName": cname,
-            "processName": ff["processName"],
-            "sourceOrSinkNodeName": ff["sourceOrSinkNodeName"],
-            "factor": factor
+            "topology": COERCE["NewTopology"](raw)
         }
-        res = client.execute(create_flow_confactor_mutation, variable_values=vars_)
-        print(f"createFlowConFactor {cname} {ff['processName']}->{ff['sourceOrSinkNodeName']}:", res)
+        yield Op(CREATE_TOPOLOGY, vars_, f"process {process_name} (source={src}, sink={sink})")
+
+# ---------- GENERIC CONSTRAINT ----------
+CREATE_GEN_CONSTRAINT = MutationSpec("createGenConstraint", {"constraint": "NewGenConstraint!"})
+
+CREATE_FLOW_CONFACTOR = MutationSpec("createFlowConFactor", {
+    "constraintName": "String!",
+    "processName": "String!",
+    "sourceOrSinkNodeName": "String!",
+    "factor": "[ValueInput!]!",
+})
+
+CREATE_STATE_CONFACTOR = MutationSpec("createStateConFactor", {
+    "constraintName": "String!",
+    "nodeName": "String!",
+    "factor": "[ValueInput!]!",
+})
+
+CREATE_ONLINE_CONFACTOR = MutationSpec("createOnlineConFactor", {
+    "constraintName": "String!",
+    "processName": "String!",
+    "factor": "[ValueInput!]!",
+})
+
+def gen_constraint_ops(data):
+    for raw in data.get("gen_constraints", []):
+        gc = COERCE["NewGenConstraint"](raw)
+        yield Op(CREATE_GEN_CONSTRAINT, {"constraint": gc}, raw.get("name"))
+
+def value_inputs(values):
+    return [COERCE["ValueInput"](v) for v in values or [] if v is not None]
+
+def con_factor_ops(data):
+    for raw in data.get("gen_constraints", []):
+        cname = raw["name"]
+
+        for ff in raw.get("flow_factors", []):
+            vars_ = {
+                "constraintName": cname,
+                "processName": ff["processName"],
+                "sourceOrSinkNodeName": ff["sourceOrSinkNodeName"],
+                "factor": value_inputs(ff.get("factor"))
+            }
+            yield Op(CREATE_FLOW_CONFACTOR, vars_, f"{cname} {ff['processName']}->{ff['sourceOrSinkNodeName']}")
+
+        for sf in raw.get("state_factors", []):
+            vars_ = {
+                "constraintName": cname,
+                "nodeName": sf["nodeName"],
+                "factor": value_inputs(sf.get("factor"))
+            }
+            yield Op(CREATE_STATE_CONFACTOR, vars_, f"{cname} node={sf['nodeName']}")
+
+        for of in raw.get("online_factors", []):
+            vars_ = {
+                "constraintName": cname,
+                "processName": of["processName"],
+                "factor": value_inputs(of.get("factor"))
+            }
+            yield Op(CREATE_ONLINE_CONFACTOR, vars_, f"{cname} process={of['processName']}")
+
+# Upload order. Later sections reference names created by earlier ones.
+SECTIONS = [
+    ("SETTINGS", settings_ops),
+    ("TIME LINE", timeline_ops),
+    ("SETUP", setup_ops),
+    ("NODES", node_ops),
+    ("NODE STATE", node_state_ops),
+    ("PROCESSES", process_ops),
+    ("NODE GROUPS", node_group_ops),
+    ("PROCESS GROUPS", process_group_ops),
+    ("NODE GROUP MEMBERS", node_group_member_ops),
+    ("PROCESS GROUP MEMBERS", process_group_member_ops),
+    ("SCENARIOS", scenario_ops),
+    ("MARKETS", market_ops),
+    ("RISKS", risk_ops),
+    ("NODE DIFFUSION", node_diffusion_ops),
+    ("NODE DELAY", node_delay_ops),
+    ("NODE HISTORY", node_history_ops),
+    ("NODE HISTORY STEPS", node_history_step_ops),
+    ("RESERVE TYPE", reserve_type_ops),
+    ("INFLOW BLOCK", inflow_block_ops),
+    ("TOPOLOGIES", topology_ops),
+    ("GENERIC CONSTRAINT", gen_constraint_ops),
+    ("CONSTRAINT FACTORS", con_factor_ops),
+]
+
+# Sections whose items depend on each other's order; --async sends these one batch at a time.
+ORDERED_SECTIONS = {"NODE HISTORY STEPS"}
+
+def print_results(section, results):
+    if not results:
+        print(f"{section}: nothing to send; skipping.")
+    for r in results:
+        status = "ok" if r.ok else "ERRORS: " + "; ".join(r.errors)
+        print(f"{section} {r.field} result for {r.label}: {status}")
+
+def _tagged(metrics, section):
+    return metrics.tag(section) if metrics is not None else nullcontext()
+
+def upload_model(executor, data, metrics=None, sections=SECTIONS):
+    """Send every section of `data` in `sections` order. Returns {section: [OpResult]}."""
+    report = {}
+    for section, build_ops in sections:
+        with _tagged(metrics, section):
+            results = executor.execute(build_ops(data))
+        print_results(section, results)
+        report[section] = results
+    return report
+
+async def upload_model_async(client, data, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                             metrics=None, sections=SECTIONS, journal=None, retries=3):
+    """
+    Like upload_model, but batches within a section are sent concurrently. The aiohttp
+    transport does not retry, so failed requests are retried up to `retries` times here.
+    """
+    from async_upload import AsyncBatchExecutor
+
+    report = {}
+    async with client as session:
+        if metrics is not None:
+            from instrumentation import InstrumentedSession
+            session = InstrumentedSession(session, metrics, retries=retries)
+        elif retries:
+            from instrumentation import RetryingSession
+            session = RetryingSession(session, retries=retries)
+        executor = AsyncBatchExecutor(session, batch_size=batch_size, concurrency=concurrency, journal=journal)
+        for section, build_ops in sections:
+            with _tagged(metrics, section):
+                results = await executor.execute(build_ops(data), concurrent=section not in ORDERED_SECTIONS)
+            print_results(section, results)
+            report[section] = results
+    return report
 
-    # 3) add STATE factors (if any)
-    for sf in raw.get("state_factors", []):
-        factor = normalize_value_inputs(sf.get("factor", []))
-        vars_ = {
-            "constraintName": cname,
-            "nodeName": sf["nodeName"],
-            "factor": factor
+# ---------- START OPTIMIZATION ----------
+def run_optimization(client, deadline=300.0, max_interval=2.0, outcome_format="binary"):
+    """Start an optimization, wait for it and write its outcome. Returns the outcome payload."""
+    job_id = start_job(client, "optimization")
+    print(f"Optimization job started. id={job_id}")
+
+    job = wait_for_job(client, job_id, deadline=deadline, max_interval=max_interval, on_status=print_status)
+    timings = ", ".join(f"{s}={t:.2f}s" for s, t in job.state_durations.items())
+    print(f"Job {job_id} {job.state} after {job.elapsed:.2f}s, {job.polls} polls"
+          + (f" ({timings})" if timings else "") + (f"; stopped: {job.stopped}" if job.stopped else ""))
+    state = job.state
+
+    if state == "FINISHED":
+        payload = {
+            "jobId": job_id,
+            "state": state,
+            "outcome": fetch_outcome(client, job_id)
         }
-        res = client.execute(create_state_confactor_mutation, variable_values=vars_)
-        print(f"createStateConFactor {cname} node={sf['nodeName']}:", res)
-
-    # 4) add ONLINE factors (if any)
-    for of in raw.get("online_factors", []):
-        factor = normalize_value_inputs(of.get("factor", []))
-        vars_ = {
-            "constraintName": cname,
-            "processName": of["processName"],
-            "factor": factor
+    else:
+        payload = {
+            "jobId": job_id,
+            "state": state,
+            "message": job.message
         }
-        res = client.execute(create_online_confactor_mutation, variable_values=vars_)
-        print(f"createOnlineConFactor {cname} process={of['processName']}:", res)
-
-# ---------- START OPTIMIZATION ----------
-start_opt_mutation = gql("""mutation { startOptimization }""")
-
-res = client.execute(start_opt_mutation)
-job_id = res["startOptimization"]
-print(f"Optimization job started. id={job_id}")
-
-# ---- poll job status and fetch outcome ----
-job_status_q = gql("""
-query JobStatus($id: Int!) {
-  jobStatus(jobId: $id) { state message }
-}
-""")
-
-job_outcome_q = gql("""
-query JobOutcome($id: Int!) {
-  jobOutcome(jobId: $id) {
-    __typename
-    ... on OptimizationOutcome {
-      time
-      controlSignals { name signal }
-    }
-    ... on ElectricityPriceOutcome { time price }
-    ... on WeatherForecastOutcome { time temperature }
-  }
-}
-""")
-
-import time
-import os
-
-state = None
-last_status = None
-
-for _ in range(300):  # ~5 min @ 1s interval; adjust if needed
-    last_status = client.execute(job_status_q, variable_values={"id": job_id})["jobStatus"]
-    state = last_status["state"]
-    print(f"Job {job_id} -> {state}" + (f" | {last_status.get('message')}" if last_status.get("message") else ""))
-    if state in ("FAILED", "FINISHED"):
-        break
-    time.sleep(1)
-
-# Always write a file so there's a record no matter what happened
-out_path = f"optimization_outcome_{job_id}.json"
-
-if state == "FINISHED":
-    out = client.execute(job_outcome_q, variable_values={"id": job_id})["jobOutcome"]
-    payload = {
-        "jobId": job_id,
-        "state": state,
-        "outcome": out
-    }
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=False)
+    write_optimization_outcome(payload, outcome_format)
+    return payload
+
+def write_optimization_outcome(payload, outcome_format="binary"):
+    # Always write a file so there's a record no matter what happened
+    job_id, state, out = payload["jobId"], payload["state"], payload.get("outcome")
+    base = f"optimization_outcome_{job_id}"
+    out_path = save_outcome(base, payload, outcome_format)
+
+    if out is None:
+        print(f"Job {job_id} ended with state={state}. Details written to {out_path}")
+        return out_path
     print(f"Wrote full optimization outcome to {out_path}")
     print("Outcome type:", out["__typename"])
     if out["__typename"] == "OptimizationOutcome":
         # small console preview
         for cs in out.get("controlSignals", []):
             print(f"{cs['name']}: {cs['signal'][:10]} ... (len={len(cs['signal'])})")
-else:
-    payload = {
-        "jobId": job_id,
-        "state": state,
-        "message": last_status.get("message")
-    }
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=False)
-    print(f"Job {job_id} ended with state={state}. Details written to {out_path}")
+    return out_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload model_data.json and run an optimization.")
+    parser.add_argument("--model", default="model_data.json")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--stream", action="store_true",
+                        help="parse and send the model file one item at a time (for very large models)")
+    parser.add_argument("--schema", default=SCHEMA_PATH,
+                        help="local SDL file; pass '' to use the introspection cache instead")
+    parser.add_argument("--refresh-schema", action="store_true",
+                        help="re-introspect the server, update the cache and use that schema instead of --schema")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="mutations per aliased request (1 = one request per entity)")
+    parser.add_argument("--sync", action="store_true",
+                        help="diff against the server's current model and send only the changes")
+    parser.add_argument("--sync-state", default=None,
+                        help="snapshot file used by --sync to detect changes in write-only fields")
+    parser.add_argument("--dry-run", action="store_true", help="with --sync: print the plan, send nothing")
+    parser.add_argument("--job-timeout", type=float, default=300.0,
+                        help="seconds to wait for the optimization job")
+    parser.add_argument("--outcome-format", choices=("binary", "json"), default="binary",
+                        help="binary: float64 columns + index (outcome_store.py); json: one indented JSON file")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="send the batches of each section concurrently")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="max requests in flight in --async mode")
+    parser.add_argument("--metrics", metavar="PREFIX", default=None,
+                        help="record per-section latency, bytes, retries and errors; "
+                             "writes PREFIX.json and PREFIX.prom")
+    parser.add_argument("--no-preflight", action="store_true",
+                        help="skip the local validation of references, required fields and series lengths")
+    parser.add_argument("--minimise", action="store_true",
+                        help="collapse constant series and identical per-scenario values before a full upload")
+    parser.add_argument("--sig-digits", type=int, default=None,
+                        help="with --minimise: round values to this many significant digits")
+    parser.add_argument("--journal", metavar="PATH", default=None,
+                        help="record applied mutations in PATH and skip those already recorded there, "
+                             "so an interrupted upload can be resumed (full uploads only); "
+                             "deleted once every mutation has succeeded")
+    parser.add_argument("--reset", action="store_true",
+                        help="delete the model currently on the server before uploading (see teardown.py)")
+    parser.add_argument("--outcome-cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="reuse the outcome of an identical model solved before, without contacting "
+                             "the server (default DIR: ~/.cache/hertta-gql/outcomes)")
+    args = parser.parse_args()
+
+    schema_path = args.schema or None
+    if args.refresh_schema:
+        refresh_introspection(args.url)
+        schema_path = None      # use the schema just fetched, not the SDL file
+    metrics = None
+    # the instrumented client counts its own retries; a journaled upload must not re-send mutations blindly
+    retries = 0 if args.metrics or args.journal else 3
+    client = make_client(args.url, schema_path=schema_path, retries=retries)
+    if args.metrics:
+        from instrumentation import InstrumentedClient, Metrics
+        metrics = Metrics()
+        client = InstrumentedClient(client, metrics, retries=0 if args.journal else 3)
+
+    data = load_model(args.model, stream=args.stream)
+
+    if not args.no_preflight:
+        try:
+            check_model(data)
+        except PreflightError as e:
+            raise SystemExit(str(e))
+
+    sections, payload_stats = SECTIONS, None
+    if args.minimise:
+        from minimise import PayloadStats, minimised_sections
+        payload_stats = PayloadStats()
+        sections = minimised_sections(SECTIONS, digits=args.sig_digits, stats=payload_stats)
+
+    cache = fingerprint = None
+    if args.outcome_cache is not None:
+        from outcome_cache import OUTCOME_CACHE_DIR, OutcomeCache, model_fingerprint
+        # hash what a full upload sends, so a rounded model never shares the exact model's entry
+        # (a second minimised_sections, so hashing adds nothing to payload_stats)
+        sent = minimised_sections(SECTIONS, digits=args.sig_digits) if args.minimise and not args.sync else SECTIONS
+        fingerprint = model_fingerprint(data, sent)
+        if fingerprint is None:
+            print("Outcome cache not used: the model has a clock-based start or forecast-linked values")
+        else:
+            cache = OutcomeCache(args.outcome_cache or OUTCOME_CACHE_DIR)
+            payload = cache.get(fingerprint)
+            if payload is not None:
+                print(f"Outcome cache hit for model {fingerprint[:16]} (job {payload['jobId']}); nothing sent")
+                write_optimization_outcome(payload, args.outcome_format)
+                return
+
+    if args.reset and not args.sync:
+        from teardown import teardown
+        teardown(client, BatchExecutor(client, batch_size=args.batch_size))
+
+    journal = None
+    if args.journal and not args.sync:
+        from journal import MutationJournal
+        try:
+            journal = MutationJournal(args.journal, args.url)
+            journal.check_server(client)
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    if args.sync:
+        from model_sync import sync_model
+        sync_model(client, BatchExecutor(client, batch_size=args.batch_size), data,
+                   snapshot_path=args.sync_state, dry_run=args.dry_run)
+        if args.dry_run:
+            return
+    elif args.use_async:
+        async_client = make_client(args.url, schema_path=schema_path, use_async=True)
+        report = asyncio.run(upload_model_async(async_client, data, args.batch_size, args.concurrency, metrics,
+                                                sections, journal, retries=0 if args.journal else 3))
+    else:
+        report = upload_model(BatchExecutor(client, batch_size=args.batch_size, journal=journal), data, metrics,
+                              sections)
+    if journal is not None:
+        print(f"Journal {args.journal}: {journal.skipped} mutations already applied, {journal.recorded} recorded")
+        if all(r.ok for results in report.values() for r in results):
+            journal.finish()
+            print(f"Upload complete; removed {args.journal}")
+        else:
+            journal.close()
+    if payload_stats is not None:
+        print("\n=== PAYLOAD MINIMISATION ===")
+        payload_stats.print_report()
+    payload = run_optimization(client, deadline=args.job_timeout, outcome_format=args.outcome_format)
+    if cache is not None and cache.put(fingerprint, payload):
+        print(f"Stored the outcome in the outcome cache as {fingerprint[:16]}")
+
+    if metrics is not None:
+        print("\n=== REQUEST METRICS ===")
+        metrics.print_summary()
+        print("Wrote", metrics.write_json(args.metrics + ".json"), "and", metrics.write_prometheus(args.metrics + ".prom"))
+
+if __name__ == "__main__":
+    main()
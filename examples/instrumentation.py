@@ -0,0 +1,302 @@
+"""
+Request instrumentation for the loader.
+
+InstrumentedClient wraps a gql Client (InstrumentedSession an async session)
+and records, for every execute call:
+
+  * wall time of the request, retries and their back-off included,
+  * serialised request bytes (query text + JSON variables) and response bytes,
+  * retries (the wrapper does the retrying, so build the transport with
+    retries=0 to have them counted),
+  * GraphQL errors plus ValidationErrors / MaybeError payloads in the result,
+    and a transport error the request finally failed with (no response bytes),
+
+tagged with the section being uploaded (`with metrics.tag("NODES"): ...`;
+untagged calls are tagged with their operation name). Metrics.summary()
+gives p50 / p95 / max latency and byte totals per section, and the recorder
+can be written out as JSON or in the Prometheus text exposition format:
+
+    metrics = Metrics()
+    client = InstrumentedClient(make_client(retries=0), metrics)
+    upload_model(BatchExecutor(client), data, metrics)
+    metrics.print_summary()
+    metrics.write_json("upload_metrics.json")
+    metrics.write_prometheus("upload_metrics.prom")
+"""
+import asyncio
+import json
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from gql.transport.exceptions import TransportQueryError, TransportServerError
+
+from batching import result_errors
+from utilities import json_dumps
+
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF = 0.5     # seconds before the first retry, doubled for each next one
+PROMETHEUS_PREFIX = "hertta_loader"
+
+
+class Sample(NamedTuple):
+    section: str
+    operation: str
+    fields: int             # root fields in the document (mutations in a batch)
+    seconds: float          # all attempts, back-off included
+    request_bytes: int
+    response_bytes: int
+    retries: int
+    errors: int
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _ast(document):
+    # gql 4 wraps the parsed document in a GraphQLRequest; gql 3 returns the DocumentNode itself
+    return getattr(document, "document", document)
+
+
+def _operation(document) -> Tuple[str, int]:
+    op = _ast(document).definitions[0]
+    name = op.name.value if op.name else op.selection_set.selections[0].name.value
+    return name, len(op.selection_set.selections)
+
+
+def _source(document) -> str:
+    document = _ast(document)
+    if document.loc is not None:
+        return document.loc.source.body
+    from graphql import print_ast
+    return print_ast(document)
+
+
+def _count_errors(data, gql_errors) -> int:
+    n = len(gql_errors or [])
+    for value in (data or {}).values():
+        if result_errors(value):
+            n += 1
+    return n
+
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, TransportServerError):
+        return e.code is None or e.code >= 500 or e.code == 429
+    return isinstance(e, OSError)  # requests / aiohttp connection errors are OSErrors
+
+
+class Metrics:
+    """Collects one Sample per request."""
+
+    def __init__(self):
+        self.samples: List[Sample] = []
+        self.section: Optional[str] = None
+
+    @contextmanager
+    def tag(self, section: str):
+        previous, self.section = self.section, section
+        try:
+            yield self
+        finally:
+            self.section = previous
+
+    def add(self, sample: Sample) -> None:
+        self.samples.append(sample)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Section -> request count, latency percentiles (s), byte totals, retries and errors."""
+        by_section: Dict[str, List[Sample]] = {}
+        for s in self.samples:
+            by_section.setdefault(s.section, []).append(s)
+        out = {}
+        for section, samples in by_section.items():
+            latencies = sorted(s.seconds for s in samples)
+            out[section] = {
+                "requests": len(samples),
+                "fields": sum(s.fields for s in samples),
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "max": latencies[-1],
+                "totalSeconds": sum(latencies),
+                "requestBytes": sum(s.request_bytes for s in samples),
+                "responseBytes": sum(s.response_bytes for s in samples),
+                "maxRequestBytes": max(s.request_bytes for s in samples),
+                "retries": sum(s.retries for s in samples),
+                "errors": sum(s.errors for s in samples),
+            }
+        return out
+
+    def print_summary(self) -> None:
+        print(f"{'section':<24}{'reqs':>6}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}"
+              f"{'req KiB':>10}{'resp KiB':>10}{'retries':>8}{'errors':>7}")
+        for section, s in self.summary().items():
+            print(f"{section:<24}{s['requests']:>6}{s['p50'] * 1e3:>9.1f}{s['p95'] * 1e3:>9.1f}"
+                  f"{s['max'] * 1e3:>9.1f}{s['requestBytes'] / 1024:>10.1f}{s['responseBytes'] / 1024:>10.1f}"
+                  f"{s['retries']:>8}{s['errors']:>7}")
+
+    def write_json(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "samples": [s._asdict() for s in self.samples]}, f, indent=1)
+        return path
+
+    def prometheus_text(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_request_seconds Wall time of one GraphQL request.",
+            f"# TYPE {prefix}_request_seconds summary",
+        ]
+        for section, s in summary.items():
+            label = _label(section)
+            for q, key in (("0.5", "p50"), ("0.95", "p95"), ("1", "max")):
+                lines.append(f'{prefix}_request_seconds{{section="{label}",quantile="{q}"}} {s[key]:.6f}')
+            lines.append(f'{prefix}_request_seconds_sum{{section="{label}"}} {s["totalSeconds"]:.6f}')
+            lines.append(f'{prefix}_request_seconds_count{{section="{label}"}} {s["requests"]}')
+        counters = (
+            ("request_bytes_total", "requestBytes", "Serialised request bytes."),
+            ("response_bytes_total", "responseBytes", "Serialised response bytes."),
+            ("mutations_total", "fields", "Root fields sent (mutations, for batched uploads)."),
+            ("retries_total", "retries", "Requests retried after a transport error."),
+            ("errors_total", "errors", "GraphQL and validation errors returned, and failed requests."),
+        )
+        for name, key, help_text in counters:
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} counter"]
+            lines += [f'{prefix}_{name}{{section="{_label(section)}"}} {s[key]}' for section, s in summary.items()]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = PROMETHEUS_PREFIX) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text(prefix))
+        return path
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Recorder:
+    """Shared bookkeeping of InstrumentedClient and InstrumentedSession."""
+
+    def __init__(self, metrics: Metrics, retries: int):
+        self.metrics = metrics
+        self.retries = retries
+
+    def begin(self, document, variable_values):
+        operation, fields = _operation(document)
+        request_bytes = len(_source(document).encode("utf-8"))
+        if variable_values is None:
+            variable_values = getattr(document, "variable_values", None)
+        if variable_values:
+            request_bytes += len(json_dumps(variable_values).encode("utf-8"))
+        return operation, fields, request_bytes
+
+    def end(self, begun, seconds, retries, data, gql_errors=None):
+        operation, fields, request_bytes = begun
+        response = {"data": data}
+        if gql_errors:
+            response["errors"] = gql_errors
+        self.metrics.add(Sample(self.metrics.section or operation, operation, fields, seconds, request_bytes,
+                                len(json_dumps(response).encode("utf-8")), retries,
+                                _count_errors(data, gql_errors)))
+
+    def fail(self, begun, seconds, retries):
+        """Record a request that failed at the transport level after its last retry."""
+        operation, fields, request_bytes = begun
+        self.metrics.add(Sample(self.metrics.section or operation, operation, fields, seconds, request_bytes,
+                                0, retries, 1))
+
+
+class InstrumentedClient:
+    """Drop-in for a sync gql Client: every execute is timed, sized and retried."""
+
+    def __init__(self, client, metrics: Metrics, retries: int = DEFAULT_RETRIES):
+        self.client = client
+        self._rec = _Recorder(metrics, retries)
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._rec.metrics
+
+    def execute(self, document, variable_values=None, **kwargs):
+        begun = self._rec.begin(document, variable_values)
+        attempt = 0
+        started = time.perf_counter()
+        while True:
+            try:
+                data = self.client.execute(document, variable_values=variable_values, **kwargs)
+            except TransportQueryError as e:
+                self._rec.end(begun, time.perf_counter() - started, attempt, e.data, e.errors)
+                raise
+            except Exception as e:
+                if attempt >= self._rec.retries or not _retryable(e):
+                    self._rec.fail(begun, time.perf_counter() - started, attempt)
+                    raise
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+                attempt += 1
+                continue
+            self._rec.end(begun, time.perf_counter() - started, attempt, data)
+            return data
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class InstrumentedSession:
+    """Async counterpart for the session of an async gql Client."""
+
+    def __init__(self, session, metrics: Metrics, retries: int = DEFAULT_RETRIES):
+        self.session = session
+        self._rec = _Recorder(metrics, retries)
+
+    async def execute(self, document, variable_values=None, **kwargs):
+        begun = self._rec.begin(document, variable_values)
+        attempt = 0
+        started = time.perf_counter()
+        while True:
+            try:
+                data = await self.session.execute(document, variable_values=variable_values, **kwargs)
+            except TransportQueryError as e:
+                self._rec.end(begun, time.perf_counter() - started, attempt, e.data, e.errors)
+                raise
+            except Exception as e:
+                if attempt >= self._rec.retries or not _retryable(e):
+                    self._rec.fail(begun, time.perf_counter() - started, attempt)
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                attempt += 1
+                continue
+            self._rec.end(begun, time.perf_counter() - started, attempt, data)
+            return data
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+class RetryingSession:
+    """Retries of InstrumentedSession without the recording, for async uploads run without --metrics."""
+
+    def __init__(self, session, retries: int = DEFAULT_RETRIES):
+        self.session = session
+        self.retries = retries
+
+    async def execute(self, document, variable_values=None, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return await self.session.execute(document, variable_values=variable_values, **kwargs)
+            except TransportQueryError:
+                raise
+            except Exception as e:
+                if attempt >= self.retries or not _retryable(e):
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                attempt += 1
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
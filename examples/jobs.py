@@ -0,0 +1,206 @@
+"""
+Starting server jobs and waiting for them to finish.
+
+wait_for_job polls `jobStatus` on a geometric schedule: quickly at first
+(short jobs are picked up within tens of milliseconds), then backing off by
+`backoff` per poll up to `max_interval`, so long jobs cost few requests.
+It stops at FINISHED / FAILED, at an overall `deadline`, or when the
+`cancel` hook returns True, and records how long the job spent in each
+JobState.
+
+wait_for_jobs does the same for many jobs at once: each tick is one aliased
+query (`j1: jobStatus(jobId: 1) ... jN: jobStatus(jobId: N)`) over the jobs
+still pending, so N jobs cost one polling stream instead of N.
+
+Documents are kept as source text and parsed on first use
+(batching.parse_document memoises them).
+"""
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from batching import parse_document
+
+JOB_KINDS = {
+    "optimization": "startOptimization",
+    "electricity_price": "startElectricityPriceFetch",
+    "weather_forecast": "startWeatherForecastFetch",
+}
+
+FINAL_STATES = ("FAILED", "FINISHED")
+
+JOB_STATUS = """
+query JobStatus($id: Int!) {
+  jobStatus(jobId: $id) { state message }
+}
+"""
+
+JOB_OUTCOME = """
+query JobOutcome($id: Int!) {
+  jobOutcome(jobId: $id) {
+    __typename
+    ... on OptimizationOutcome {
+      time
+      controlSignals { name signal }
+    }
+    ... on ElectricityPriceOutcome { time price }
+    ... on WeatherForecastOutcome { time temperature }
+  }
+}
+"""
+
+
+class JobResult(NamedTuple):
+    job_id: int
+    state: Optional[str]            # last JobState seen
+    message: Optional[str]
+    elapsed: float                  # seconds from first poll to return
+    polls: int
+    state_durations: Dict[str, float]
+    stopped: Optional[str] = None   # None, "deadline" or "cancelled"
+
+    @property
+    def finished(self) -> bool:
+        return self.state == "FINISHED"
+
+
+class _JobTracker:
+    """State history of one job across polls."""
+
+    def __init__(self, job_id: int, started: float):
+        self.job_id = job_id
+        self.started = started
+        self.state = self.message = None
+        self.state_since = started
+        self.durations: Dict[str, float] = {}
+        self.polls = 0
+
+    def update(self, status: Dict, now: float) -> bool:
+        """Record a polled status; True if state or message changed."""
+        self.polls += 1
+        if status["state"] == self.state and status.get("message") == self.message:
+            return False
+        if self.state is not None:
+            self.durations[self.state] = self.durations.get(self.state, 0.0) + now - self.state_since
+            self.state_since = now
+        self.state, self.message = status["state"], status.get("message")
+        return True
+
+    @property
+    def final(self) -> bool:
+        return self.state in FINAL_STATES
+
+    def result(self, now: float, stopped: Optional[str] = None) -> JobResult:
+        durations = dict(self.durations)
+        if stopped and self.state is not None:
+            durations[self.state] = durations.get(self.state, 0.0) + now - self.state_since
+        return JobResult(self.job_id, self.state, self.message, now - self.started, self.polls, durations, stopped)
+
+
+def start_job(client, kind: str = "optimization") -> int:
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind {kind!r}; expected one of {', '.join(JOB_KINDS)}")
+    return client.execute(parse_document(f"mutation {{ {JOB_KINDS[kind]} }}"))[JOB_KINDS[kind]]
+
+
+def poll_intervals(initial: float, backoff: float, maximum: float):
+    interval = initial
+    while True:
+        yield interval
+        interval = min(interval * backoff, maximum)
+
+
+def wait_for_job(client, job_id: int, initial_interval: float = 0.05, backoff: float = 1.5,
+                 max_interval: float = 2.0, deadline: Optional[float] = 300.0,
+                 cancel: Optional[Callable[[], bool]] = None,
+                 on_status: Optional[Callable[[int, Dict], None]] = None) -> JobResult:
+    """
+    Poll until the job reaches a final state. `deadline` is in seconds (None waits
+    forever); `on_status(job_id, status)` is called whenever state or message changes.
+    """
+    started = time.monotonic()
+    job = _JobTracker(job_id, started)
+    intervals = poll_intervals(initial_interval, backoff, max_interval)
+
+    while True:
+        status = client.execute(parse_document(JOB_STATUS), variable_values={"id": job_id})["jobStatus"]
+        now = time.monotonic()
+        if job.update(status, now) and on_status:
+            on_status(job_id, status)
+        if job.final:
+            return job.result(now)
+
+        stopped = _stop_reason(cancel, deadline, now - started)
+        if stopped:
+            return job.result(now, stopped)
+        time.sleep(_next_sleep(intervals, deadline, now - started))
+
+
+def _stop_reason(cancel, deadline, elapsed) -> Optional[str]:
+    if cancel is not None and cancel():
+        return "cancelled"
+    if deadline is not None and elapsed >= deadline:
+        return "deadline"
+    return None
+
+
+def _next_sleep(intervals, deadline, elapsed) -> float:
+    sleep = next(intervals)
+    if deadline is not None:
+        sleep = min(sleep, max(0.0, deadline - elapsed))
+    return sleep
+
+
+@lru_cache(maxsize=256)
+def job_statuses_q(job_ids: Tuple[int, ...]):
+    """One aliased jobStatus query for all of `job_ids`; the alias of job N is jN."""
+    fields = "\n".join(f"  j{int(i)}: jobStatus(jobId: {int(i)}) {{ state message }}" for i in job_ids)
+    return parse_document(f"query JobStatuses {{\n{fields}\n}}")
+
+
+def wait_for_jobs(client, job_ids: Iterable[int], initial_interval: float = 0.05, backoff: float = 1.5,
+                  max_interval: float = 2.0, deadline: Optional[float] = 300.0,
+                  cancel: Optional[Callable[[], bool]] = None,
+                  on_status: Optional[Callable[[int, Dict], None]] = None,
+                  on_done: Optional[Callable[[JobResult], None]] = None) -> Dict[int, JobResult]:
+    """
+    wait_for_job for several jobs with one status query per tick. `on_done(result)`
+    is called as each job reaches a final state, so outcomes can be collected while
+    the rest keep running. Returns job id -> JobResult, in the order of `job_ids`.
+    """
+    started = time.monotonic()
+    jobs = {job_id: _JobTracker(job_id, started) for job_id in job_ids}
+    pending = list(jobs)
+    intervals = poll_intervals(initial_interval, backoff, max_interval)
+    results: Dict[int, JobResult] = {}
+
+    while pending:
+        data = client.execute(job_statuses_q(tuple(pending)))
+        now = time.monotonic()
+        for job_id in list(pending):
+            job, status = jobs[job_id], data[f"j{job_id}"]
+            if job.update(status, now) and on_status:
+                on_status(job_id, status)
+            if job.final:
+                pending.remove(job_id)
+                results[job_id] = job.result(now)
+                if on_done:
+                    on_done(results[job_id])
+        if not pending:
+            break
+
+        stopped = _stop_reason(cancel, deadline, now - started)
+        if stopped:
+            for job_id in pending:
+                results[job_id] = jobs[job_id].result(now, stopped)
+            break
+        time.sleep(_next_sleep(intervals, deadline, now - started))
+    return {job_id: results[job_id] for job_id in jobs}
+
+
+def fetch_outcome(client, job_id: int):
+    return client.execute(parse_document(JOB_OUTCOME), variable_values={"id": job_id})["jobOutcome"]
+
+
+def print_status(job_id, status):
+    print(f"Job {job_id} -> {status['state']}" + (f" | {status.get('message')}" if status.get("message") else ""))
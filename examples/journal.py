@@ -0,0 +1,170 @@
+"""
+Append-only mutation journal for resumable uploads.
+
+Every mutation that the server applied successfully is written as one JSON
+line holding a hash of its field and input variables. Lines are flushed and
+fsynced after each batch (or every `fsync_every` batches). When an upload is
+re-run with the same journal, ops whose hash is already there are dropped
+before batching, so a crash late in a big upload costs only the hashing of
+what was already sent:
+
+    with MutationJournal("upload.journal", url) as journal:
+        journal.check_server(client)
+        upload_model(BatchExecutor(client, journal=journal), data)
+
+Identical ops (same field and variables) are counted, not deduplicated: an op
+sent twice in the model is skipped at most as often as it was journaled. A
+changed entity hashes differently and is sent again.
+
+The first line of the journal is a header naming the server URL. A journal
+written against another URL is refused, and so is one whose created nodes
+are no longer on the server (check_server): a restarted or reset server
+holds none of what was journaled, and skipping those ops would leave the
+model incomplete. When every op of the upload succeeded the journal has
+nothing left to resume and is deleted (finish).
+
+A batch that was in flight when the connection dropped is never journaled,
+even if the server applied it; its creates then fail with "already exists"
+on the re-run. Use input_data.py --sync to reconcile such a model. For the
+same reason the loader builds its client without transport retries when a
+journal is used.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from typing import Iterable, Iterator, List
+
+from batching import Op, OpResult, parse_document
+from utilities import json_dumps
+
+JOURNAL_VERSION = 1
+
+NODE_NAMES_QUERY = "query JournalCheck { model { inputData { nodes { name } } } }"
+
+
+def op_key(op: Op) -> str:
+    """Hash of the mutation field and its input variables."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(op.spec.field.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json_dumps(op.variables).encode("utf-8"))
+    return h.hexdigest()
+
+
+class MutationJournal:
+    """Journal file of applied mutations; see the module docstring."""
+
+    def __init__(self, path: str, url: str, fsync_every: int = 1):
+        if fsync_every < 1:
+            raise ValueError(f"fsync_every must be >= 1, got {fsync_every}")
+        self.path = path
+        self.url = url
+        self.fsync_every = fsync_every
+        header, self.done, self.created = self._load(path)
+        if header is not None and header.get("url") != url:
+            raise ValueError(f"{path} was written against {header.get('url')}, not {url}; "
+                             "delete it to start a new upload")
+        self.header = header or {"journal": JOURNAL_VERSION, "url": url,
+                                 "created": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+        self.skipped = 0
+        self.recorded = 0
+        self._keys = {}
+        self._unsynced = 0
+        if header is None:
+            tmp = path + ".tmp"     # the header is written whole or not at all
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps(self.header) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        self._file = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _load(path: str):
+        """(header or None, key -> count, nodes journaled as created) of the journal at `path`."""
+        done, created = Counter(), set()
+        if not os.path.exists(path):
+            return None, done, created
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        if lines == [""]:
+            return None, done, created
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("journal") != JOURNAL_VERSION:
+            raise ValueError(f"{path}: no version {JOURNAL_VERSION} journal header; delete it to start over")
+        for i, line in enumerate(lines[1:], 1):
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                done[entry["k"]] += 1
+            except (ValueError, KeyError):
+                if i == len(lines) - 1:
+                    break   # torn last line of a crashed run
+                raise ValueError(f"{path}:{i + 1}: corrupt journal line")
+            if entry.get("f") == "createNode":
+                created.add(entry.get("l"))
+        return header, done, created
+
+    def check_server(self, client) -> None:
+        """Raise ValueError if nodes journaled as created are missing on the server (restarted or reset)."""
+        if not self.created:
+            return
+        data = client.execute(parse_document(NODE_NAMES_QUERY))
+        missing = self.created - {n["name"] for n in data["model"]["inputData"]["nodes"]}
+        if missing:
+            raise ValueError(f"{self.path}: {len(missing)} journaled nodes (e.g. {sorted(missing)[0]!r}) are not on "
+                             f"the server at {self.url}; it was restarted or reset since. Delete the journal "
+                             "and upload again")
+
+    def pending(self, ops: Iterable[Op]) -> Iterator[Op]:
+        """`ops` minus those already journaled."""
+        for op in ops:
+            key = op_key(op)
+            if self.done[key] > 0:
+                self.done[key] -= 1
+                self.skipped += 1
+                continue
+            self._keys[id(op)] = key
+            yield op
+
+    def record(self, ops: List[Op], results: List[OpResult]) -> None:
+        """Journal the ops of one sent batch that succeeded."""
+        lines = []
+        for op, r in zip(ops, results):
+            key = self._keys.pop(id(op), None) or op_key(op)
+            if r.ok:
+                lines.append(json.dumps({"k": key, "f": op.spec.field, "l": op.label}) + "\n")
+        if not lines:
+            return
+        self._file.write("".join(lines))
+        self.recorded += len(lines)
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def finish(self) -> None:
+        """Close and delete the journal: the upload it belongs to is complete."""
+        self.close()
+        os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
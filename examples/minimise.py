@@ -0,0 +1,195 @@
+"""
+Payload minimiser for ValueInput / ForecastValueInput lists.
+
+An opt-in stage between the section builders of input_data.py and the
+executor. Every list of value entries in the op variables is rewritten to an
+equivalent, smaller one:
+
+  * a series whose values are all equal becomes {"constant": value},
+  * per-scenario entries that are identical and cover every scenario of the
+    model become one entry without a scenario (which the server applies to
+    all scenarios). Entries naming a forecast are left alone, their values
+    come from the server,
+  * with `digits`, constants and series values are rounded to that many
+    significant digits first, so 8.999999999999982 goes out as 9.0.
+
+Series stay float buffers: with numpy, rounding and the constant check run
+on the whole buffer at once and a rounded series is a float64 ndarray;
+without it they fall back to a loop and array('d').
+
+Bytes saved are counted per section:
+
+    stats = PayloadStats()
+    upload_model(executor, data, sections=minimised_sections(SECTIONS, digits=6, stats=stats))
+    stats.print_report()
+"""
+import math
+from array import array
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from batching import Op
+from utilities import json_dumps
+
+try:
+    import numpy as np
+except ImportError:  # optional: series are then rounded and compared in a Python loop
+    np = None
+
+VALUE_KEYS = frozenset(("scenario", "constant", "series", "forecast", "fType"))
+PAYLOAD_KEYS = ("constant", "series", "forecast")
+
+
+def round_sig(x: float, digits: int) -> float:
+    """`x` rounded to `digits` significant digits; 0, inf and nan pass through."""
+    if x == 0 or not math.isfinite(x):
+        return x
+    return round(x, digits - 1 - math.floor(math.log10(abs(x))))
+
+
+def round_sig_series(series, digits: int):
+    """
+    `series` rounded to `digits` significant digits, as a new float buffer. With numpy a value
+    within an ulp of a rounding tie may round the other way than round_sig would.
+    """
+    if np is None:
+        return array("d", (round_sig(x, digits) for x in series))
+    a = np.asarray(series, dtype=np.float64)
+    out = a.copy()
+    finite = np.isfinite(a) & (a != 0)
+    decimals = np.zeros(a.shape)
+    decimals[finite] = digits - 1 - np.floor(np.log10(np.abs(a[finite])))
+    # powers of ten up to 1e22 are exact doubles, so the scaling itself adds no error
+    up = finite & (decimals >= 0) & (decimals <= 22)
+    down = finite & (decimals < 0) & (decimals >= -22)
+    scale = 10.0 ** decimals[up]
+    out[up] = np.round(a[up] * scale) / scale
+    scale = 10.0 ** -decimals[down]
+    out[down] = np.round(a[down] / scale) * scale
+    rest = np.flatnonzero(finite & ~up & ~down)
+    out[rest] = [round_sig(float(x), digits) for x in a[rest]]
+    return out
+
+
+def _constant(series) -> Optional[float]:
+    """The single value of a non-empty series whose values are all equal, else None."""
+    if np is not None:
+        a = np.asarray(series, dtype=np.float64)
+        return float(a[0]) if np.ptp(a) == 0 else None
+    first = series[0]
+    return float(first) if all(x == first for x in series) else None
+
+
+def _series_key(series):
+    if np is not None:
+        return np.asarray(series, dtype=np.float64).tobytes()
+    return tuple(series)
+
+
+def is_value_list(x) -> bool:
+    """True for a non-empty list of ValueInput / ForecastValueInput shaped dicts."""
+    return (isinstance(x, list) and bool(x)
+            and all(isinstance(v, dict) and v.keys() <= VALUE_KEYS and any(k in v for k in PAYLOAD_KEYS)
+                    for v in x))
+
+
+def _minimise_entry(v: Dict[str, Any], digits: Optional[int]) -> Dict[str, Any]:
+    if v.get("forecast") is not None:
+        return v
+    out = dict(v)
+    if digits is not None and out.get("constant") is not None:
+        out["constant"] = round_sig(out["constant"], digits)
+    series = out.get("series")
+    if series is not None and len(series):
+        if digits is not None:
+            series = out["series"] = round_sig_series(series, digits)
+        constant = _constant(series)
+        if constant is not None:
+            del out["series"]
+            out["constant"] = constant
+    return out
+
+
+def _payload(v: Dict[str, Any]) -> Tuple:
+    series = v.get("series")
+    return tuple((k, x) for k, x in v.items() if k not in ("scenario", "series")) + \
+        (("series", None if series is None else _series_key(series)),)
+
+
+def minimise_values(values: List[Dict[str, Any]], scenarios: FrozenSet[str],
+                    digits: Optional[int] = None) -> List[Dict[str, Any]]:
+    """An equivalent, smaller value list; see the module docstring for the rules."""
+    out = [_minimise_entry(v, digits) for v in values]
+    named = [v.get("scenario") for v in out]
+    if (len(out) > 1 and scenarios and None not in named and len(set(named)) == len(named)
+            and set(named) == scenarios and not any(v.get("forecast") is not None for v in out)):
+        first = _payload(out[0])
+        if all(_payload(v) == first for v in out[1:]):
+            merged = dict(out[0])
+            del merged["scenario"]
+            out = [merged]
+    return out
+
+
+def minimise(x, scenarios: FrozenSet[str], digits: Optional[int] = None):
+    """`x` (op variables) with every value list in it minimised; other values are shared, not copied."""
+    if is_value_list(x):
+        return minimise_values(x, scenarios, digits)
+    if isinstance(x, dict):
+        return {k: minimise(v, scenarios, digits) for k, v in x.items()}
+    if isinstance(x, list) and x and isinstance(x[0], (dict, list)):
+        return [minimise(v, scenarios, digits) for v in x]
+    return x
+
+
+class PayloadStats:
+    """Serialised variable bytes per section, before and after minimising."""
+
+    def __init__(self):
+        self.sections: Dict[str, List[int]] = {}
+
+    def add(self, section: str, before: int, after: int) -> None:
+        entry = self.sections.setdefault(section, [0, 0])
+        entry[0] += before
+        entry[1] += after
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        return {section: {"bytesBefore": b, "bytesAfter": a, "bytesSaved": b - a}
+                for section, (b, a) in self.sections.items()}
+
+    def print_report(self) -> None:
+        print(f"{'section':<24}{'before KiB':>12}{'after KiB':>12}{'saved':>8}")
+        total_before = total_after = 0
+        for section, (b, a) in self.sections.items():
+            total_before += b
+            total_after += a
+            print(f"{section:<24}{b / 1024:>12.1f}{a / 1024:>12.1f}{_share(b - a, b):>8}")
+        print(f"{'TOTAL':<24}{total_before / 1024:>12.1f}{total_after / 1024:>12.1f}"
+              f"{_share(total_before - total_after, total_before):>8}")
+
+
+def _share(part: int, whole: int) -> str:
+    return f"{100 * part / whole:.1f}%" if whole else "-"
+
+
+def _size(variables: Dict[str, Any]) -> int:
+    return len(json_dumps(variables).encode("utf-8"))
+
+
+def minimised_ops(ops: Iterable[Op], scenarios: FrozenSet[str], digits: Optional[int] = None,
+                  stats: Optional[PayloadStats] = None, section: str = "") -> Iterator[Op]:
+    for op in ops:
+        variables = minimise(op.variables, scenarios, digits)
+        if stats is not None:
+            stats.add(section, _size(op.variables), _size(variables))
+        yield op._replace(variables=variables)
+
+
+def minimised_sections(sections: List[Tuple[str, Callable]], digits: Optional[int] = None,
+                       stats: Optional[PayloadStats] = None) -> List[Tuple[str, Callable]]:
+    """`sections` (input_data.SECTIONS) with every builder's ops passed through the minimiser."""
+    def wrap(section, build_ops):
+        def build(data):
+            scenarios = frozenset(s["name"] for s in data.get("scenarios", []))
+            return minimised_ops(build_ops(data), scenarios, digits, stats, section)
+        return build
+    return [(section, wrap(section, build_ops)) for section, build_ops in sections]
@@ -0,0 +1,166 @@
+"""
+Streaming access to large model_data.json files.
+
+StreamedModel memory-maps the file and records the byte span of every
+top-level section with a structural scan (only brackets, braces and string
+delimiters are visited, so long numeric series are skipped at regex speed).
+`get()` returns object sections parsed, and list sections as a lazy,
+re-iterable SectionView that parses one item at a time. Sections can be read
+in any order, so input_data's upload order does not have to follow the
+file's layout.
+
+It is a drop-in for the dict from json.load wherever input_data.py reads
+`data.get(section, default)`:
+
+    with StreamedModel("model_data.json") as data:
+        upload_model(executor, data)
+"""
+import json
+import mmap
+import re
+from typing import Any, Dict, Iterator, Tuple
+
+_TOKEN = re.compile(rb'["\[\]{}]')
+_STRING_REST = re.compile(rb'(?:[^"\\]|\\.)*"', re.S)
+_SCALAR = re.compile(rb'[^,\]}\s]*')
+_SPACE = re.compile(rb'\s*')
+
+
+def _skip_space(buf, pos: int) -> int:
+    return _SPACE.match(buf, pos).end()
+
+
+def _string_end(buf, pos: int) -> int:
+    """`pos` is at an opening quote; return the offset just past the closing one."""
+    m = _STRING_REST.match(buf, pos + 1)
+    if m is None:
+        raise ValueError(f"Unterminated string at byte {pos}")
+    return m.end()
+
+
+def value_end(buf, pos: int) -> int:
+    """Offset just past the JSON value starting at `pos`."""
+    first = buf[pos:pos + 1]
+    if first == b'"':
+        return _string_end(buf, pos)
+    if first not in (b"[", b"{"):
+        return _SCALAR.match(buf, pos).end()
+    depth = 0
+    while True:
+        m = _TOKEN.search(buf, pos)
+        if m is None:
+            raise ValueError("Unbalanced brackets in JSON input")
+        ch = m.group()
+        if ch == b'"':
+            pos = _string_end(buf, m.start())
+            continue
+        pos = m.end()
+        if ch in (b"[", b"{"):
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def _expect(buf, pos: int, ch: bytes) -> int:
+    pos = _skip_space(buf, pos)
+    if buf[pos:pos + 1] != ch:
+        raise ValueError(f"Expected {ch!r} at byte {pos}, got {buf[pos:pos + 1]!r}")
+    return pos + 1
+
+
+def scan_object(buf, start: int = 0) -> Dict[str, Tuple[int, int]]:
+    """Key -> (start, end) byte span of each member value of the object at `start`."""
+    spans = {}
+    pos = _expect(buf, start, b"{")
+    while True:
+        pos = _skip_space(buf, pos)
+        if buf[pos:pos + 1] == b"}":
+            return spans
+        key_end = _string_end(buf, pos)
+        key = json.loads(buf[pos:key_end])
+        pos = _skip_space(buf, _expect(buf, key_end, b":"))
+        end = value_end(buf, pos)
+        spans[key] = (pos, end)
+        pos = _skip_space(buf, end)
+        if buf[pos:pos + 1] == b",":
+            pos += 1
+
+
+def iter_array(buf, start: int, object_hook=None) -> Iterator[Any]:
+    """Parse the items of the JSON array at `start` one at a time."""
+    pos = _expect(buf, start, b"[")
+    while True:
+        pos = _skip_space(buf, pos)
+        if buf[pos:pos + 1] == b"]":
+            return
+        end = value_end(buf, pos)
+        yield json.loads(buf[pos:end], object_hook=object_hook)
+        pos = _skip_space(buf, end)
+        if buf[pos:pos + 1] == b",":
+            pos += 1
+
+
+class SectionView:
+    """A list section of a StreamedModel; every iteration re-reads it lazily."""
+
+    def __init__(self, buf, start: int, end: int, object_hook=None):
+        self._buf = buf
+        self.start = start
+        self.end = end
+        self.object_hook = object_hook
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter_array(self._buf, self.start, self.object_hook)
+
+    def __bool__(self) -> bool:
+        pos = _skip_space(self._buf, self.start + 1)
+        return self._buf[pos:pos + 1] != b"]"
+
+    @property
+    def nbytes(self) -> int:
+        return self.end - self.start
+
+
+class StreamedModel:
+    """
+    Read-only, dict-like view of a model file that never loads it whole. `object_hook`
+    is passed to json.loads (series_refs.series_ref_hook, for one).
+    """
+
+    def __init__(self, path: str, object_hook=None):
+        self.path = path
+        self.object_hook = object_hook
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.spans = scan_object(self._map, _skip_space(self._map, 0))
+
+    def __contains__(self, key) -> bool:
+        return key in self.spans
+
+    def keys(self):
+        return self.spans.keys()
+
+    def get(self, key: str, default=None):
+        if key not in self.spans:
+            return default
+        start, end = self.spans[key]
+        if self._map[start:start + 1] == b"[":
+            return SectionView(self._map, start, end, self.object_hook)
+        return json.loads(self._map[start:end], object_hook=self.object_hook)
+
+    def __getitem__(self, key: str):
+        if key not in self.spans:
+            raise KeyError(key)
+        return self.get(key)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
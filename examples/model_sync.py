@@ -0,0 +1,579 @@
+"""
+Incremental sync of model_data.json against the live server.
+
+Instead of re-creating the whole model, sync_model reads the server's current
+model with one `model { inputData { ... } }` query, converts every entity
+back into the input shape input_data.py sends, and diffs the two entity by
+entity. Only the difference is sent:
+
+  * removed or changed entities are deleted (children before parents) and
+    changed ones re-created from the JSON file;
+  * anything that depends on a deleted entity (topologies of a process,
+    markets of a node, factors of a constraint, values of a scenario, ...)
+    is deleted and re-created with it;
+  * node states are patched with updateNodeState, and settings, time line and
+    setup are re-sent only when they differ.
+
+The schema does not expose every input field (topology parameters and
+process initialState are write-only). Pass a `snapshot` dict (see
+load_snapshot / save_snapshot) to also catch changes in those: it records a
+hash of what was last sent for every entity.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from batching import MESSAGE, MutationSpec, Op, parse_document
+from utilities import FLOAT_ARRAY_TYPES
+import input_data as model
+
+# ---------- READ CURRENT STATE ----------
+_VALUE = "scenario value { __typename ... on Constant { value } ... on FloatList { values } }"
+_FORECAST_VALUE = ("scenario value { __typename ... on Constant { value } ... on FloatList { values }"
+                   " ... on Forecast { name fType } }")
+_NODE_OR_PROCESS = "__typename ... on Node { name } ... on Process { name }"
+_DURATION = "hours minutes seconds"
+
+CURRENT_MODEL_QUERY = f"""
+query CurrentModel {{
+  settings {{ location {{ country place }} }}
+  model {{
+    timeLine {{
+      duration {{ {_DURATION} }}
+      step {{ {_DURATION} }}
+      start {{ __typename ... on ClockChoice {{ choice }} ... on CustomStartTime {{ startTime }} }}
+    }}
+    inputData {{
+      scenarios {{ name weight }}
+      setup {{
+        reserveRealisation useMarketBids useReserves commonTimeSteps
+        commonScenario {{ name }}
+        useNodeDummyVariables useRampDummyVariables nodeDummyVariableCost rampDummyVariableCost
+      }}
+      processes {{
+        name conversion isCfFix isOnline isRes eff loadMin loadMax startCost
+        minOnline minOffline maxOnline maxOffline isScenarioIndependent
+        cf {{ {_VALUE} }}
+        effTs {{ {_VALUE} }}
+        effOpsFun {{ x y }}
+        topos {{ source {{ {_NODE_OR_PROCESS} }} sink {{ {_NODE_OR_PROCESS} }} }}
+      }}
+      nodes {{
+        name isCommodity isMarket isRes
+        state {{
+          inMax outMax stateLossProportional stateMax stateMin initialState
+          isScenarioIndependent isTemp tEConversion residualValue
+        }}
+        cost {{ {_VALUE} }}
+        inflow {{ {_FORECAST_VALUE} }}
+      }}
+      nodeDiffusion {{ fromNode {{ name }} toNode {{ name }} coefficient {{ {_VALUE} }} }}
+      nodeDelay {{ fromNode {{ name }} toNode {{ name }} delay minDelayFlow maxDelayFlow }}
+      nodeHistories {{ node {{ name }} steps {{ scenario durations {{ {_DURATION} }} values }} }}
+      markets {{
+        name mType direction isBid isLimited minBid maxBid fee
+        node {{ name }}
+        processGroup {{ name }}
+        reserveType {{ name }}
+        realisation {{ {_VALUE} }}
+        price {{ {_FORECAST_VALUE} }}
+        upPrice {{ {_FORECAST_VALUE} }}
+        downPrice {{ {_FORECAST_VALUE} }}
+        reserveActivationPrice {{ {_VALUE} }}
+      }}
+      nodeGroups {{ name members {{ name }} }}
+      processGroups {{ name members {{ name }} }}
+      reserveType {{ name rampRate }}
+      risk {{ parameter value }}
+      inflowBlocks {{ name node {{ name }} data {{ {_VALUE} }} }}
+      genConstraints {{
+        name gcType isSetpoint penalty
+        constant {{ {_VALUE} }}
+        factors {{
+          varType
+          varTuple {{ entity {{ {_NODE_OR_PROCESS} }} identifier {{ name }} }}
+          data {{ {_VALUE} }}
+        }}
+      }}
+    }}
+  }}
+}}
+"""
+
+
+def value_inputs(values):
+    """Server [Value] / [ForecastValue] -> [ValueInput] / [ForecastValueInput]."""
+    out = []
+    for v in values or []:
+        vi = {"scenario": v.get("scenario")}
+        val = v["value"]
+        if val["__typename"] == "Constant":
+            vi["constant"] = val["value"]
+        elif val["__typename"] == "FloatList":
+            vi["series"] = val["values"]
+        else:
+            vi["forecast"] = val["name"]
+            vi["fType"] = val["fType"]
+        out.append(vi)
+    return out
+
+
+def _name(obj):
+    return obj["name"] if obj else None
+
+
+def current_entities(result) -> Dict[str, Dict[Hashable, List[Dict[str, Any]]]]:
+    """Server state in input_data op-variable shape: {section: {key: [variables]}}."""
+    inp = result["model"]["inputData"]
+    tl = result["model"]["timeLine"]
+    cur: Dict[str, Dict[Hashable, List[Dict[str, Any]]]] = {section: {} for section, _ in model.SECTIONS}
+
+    def put(section, key, variables):
+        cur[section].setdefault(key, []).append(variables)
+
+    if result.get("settings"):
+        put("SETTINGS", "settings", {"settingsInput": {"location": result["settings"].get("location")}})
+
+    start = tl["start"]
+    start_input = ({"clockChoice": start["choice"]} if start["__typename"] == "ClockChoice"
+                   else {"customStartTime": start["startTime"]})
+    put("TIME LINE", "timeline", {"timeLineInput": {
+        "duration": tl["duration"], "step": tl["step"], "start": start_input}})
+
+    s = inp["setup"]
+    put("SETUP", "setup", {"setupUpdate": {
+        "useMarketBids": s["useMarketBids"],
+        "useReserves": s["useReserves"],
+        "useReserveRealisation": s["reserveRealisation"],
+        "useNodeDummyVariables": s["useNodeDummyVariables"],
+        "useRampDummyVariables": s["useRampDummyVariables"],
+        "commonTimesteps": s["commonTimeSteps"],
+        "commonScenarioName": _name(s.get("commonScenario")),
+        "nodeDummyVariableCost": s["nodeDummyVariableCost"],
+        "rampDummyVariableCost": s["rampDummyVariableCost"],
+    }})
+
+    for n in inp["nodes"]:
+        put("NODES", n["name"], {"node": {
+            "name": n["name"], "isCommodity": n["isCommodity"], "isMarket": n["isMarket"],
+            "isRes": n["isRes"], "cost": value_inputs(n["cost"]), "inflow": value_inputs(n["inflow"])}})
+        if n.get("state"):
+            put("NODE STATE", n["name"], {"nodeName": n["name"], "state": n["state"]})
+
+    for p in inp["processes"]:
+        proc = model.COERCE["NewProcess"](dict(p, cf=value_inputs(p["cf"]), effTs=value_inputs(p["effTs"])))
+        put("PROCESSES", p["name"], {"process": proc})
+        for t in p["topos"]:
+            # a topology's node end is whichever side is a Node; the other side is the process
+            src = t["source"]["name"] if t["source"]["__typename"] == "Node" else None
+            sink = t["sink"]["name"] if t["sink"]["__typename"] == "Node" else None
+            put("TOPOLOGIES", (p["name"], src, sink),
+                {"processName": p["name"], "sourceNodeName": src, "sinkNodeName": sink})
+
+    for g in inp["nodeGroups"]:
+        put("NODE GROUPS", g["name"], {"name": g["name"]})
+        for m in g["members"]:
+            put("NODE GROUP MEMBERS", (g["name"], m["name"]), {"nodeName": m["name"], "groupName": g["name"]})
+    for g in inp["processGroups"]:
+        put("PROCESS GROUPS", g["name"], {"name": g["name"]})
+        for m in g["members"]:
+            put("PROCESS GROUP MEMBERS", (g["name"], m["name"]), {"processName": m["name"], "groupName": g["name"]})
+
+    for sc in inp["scenarios"]:
+        put("SCENARIOS", sc["name"], {"name": sc["name"], "weight": sc["weight"]})
+
+    for m in inp["markets"]:
+        mkt = {k: m[k] for k in ("name", "mType", "direction", "isBid", "isLimited", "minBid", "maxBid", "fee")}
+        mkt.update(
+            node=_name(m["node"]), processGroup=_name(m["processGroup"]), reserveType=_name(m.get("reserveType")),
+            realisation=value_inputs(m["realisation"]), price=value_inputs(m["price"]),
+            upPrice=value_inputs(m["upPrice"]), downPrice=value_inputs(m["downPrice"]),
+            reserveActivationPrice=value_inputs(m["reserveActivationPrice"]))
+        put("MARKETS", m["name"], {"market": mkt})
+
+    for r in inp["risk"]:
+        put("RISKS", r["parameter"], {"risk": r})
+    for d in inp["nodeDiffusion"]:
+        key = (d["fromNode"]["name"], d["toNode"]["name"])
+        put("NODE DIFFUSION", key, {"newDiffusion": {
+            "fromNode": key[0], "toNode": key[1], "coefficient": value_inputs(d["coefficient"])}})
+    for d in inp["nodeDelay"]:
+        key = (d["fromNode"]["name"], d["toNode"]["name"])
+        put("NODE DELAY", key, {"delay": {
+            "fromNode": key[0], "toNode": key[1], "delay": d["delay"],
+            "minDelayFlow": d["minDelayFlow"], "maxDelayFlow": d["maxDelayFlow"]}})
+    for h in inp["nodeHistories"]:
+        node_name = h["node"]["name"]
+        put("NODE HISTORY", node_name, {"nodeName": node_name})
+        for step in h["steps"]:
+            put("NODE HISTORY STEPS", node_name, {"nodeName": node_name, "step": step})
+    for rt in inp["reserveType"]:
+        put("RESERVE TYPE", rt["name"], {"reserveType": rt})
+    for ib in inp["inflowBlocks"]:
+        put("INFLOW BLOCK", ib["name"], {"inflowBlock": {
+            "name": ib["name"], "node": ib["node"]["name"], "data": value_inputs(ib["data"])}})
+
+    for gc in inp["genConstraints"]:
+        put("GENERIC CONSTRAINT", gc["name"], {"constraint": {
+            "name": gc["name"], "gcType": gc["gcType"], "isSetpoint": gc["isSetpoint"],
+            "penalty": gc["penalty"], "constant": value_inputs(gc["constant"])}})
+        for f in gc["factors"]:
+            entity = f["varTuple"]["entity"]["name"]
+            node_name = _name(f["varTuple"].get("identifier"))
+            vars_ = {"constraintName": gc["name"], "factor": value_inputs(f["data"])}
+            if f["varType"] == "FLOW":
+                vars_.update(processName=entity, sourceOrSinkNodeName=node_name)
+            elif f["varType"] == "STATE":
+                vars_.update(nodeName=entity)
+            else:
+                vars_.update(processName=entity)
+            put("CONSTRAINT FACTORS", factor_key(vars_), vars_)
+    return cur
+
+
+# ---------- COMPARISON ----------
+def canon(x):
+    """Hashable, order-stable form of a variables tree; numbers compare as floats, nulls are dropped."""
+    if isinstance(x, dict):
+        return tuple(sorted((k, canon(v)) for k, v in x.items() if v is not None))
+    if isinstance(x, FLOAT_ARRAY_TYPES):
+        return tuple(x.tolist())
+    if isinstance(x, (list, tuple)):
+        return tuple(canon(v) for v in x)
+    if isinstance(x, bool) or not isinstance(x, (int, float)):
+        return x
+    return float(x)
+
+
+def scenarios_in(x, found=None):
+    found = set() if found is None else found
+    if isinstance(x, dict):
+        if isinstance(x.get("scenario"), str):
+            found.add(x["scenario"])
+        for v in x.values():
+            scenarios_in(v, found)
+    elif isinstance(x, list):
+        for v in x:
+            scenarios_in(v, found)
+    return found
+
+
+def factor_key(v):
+    if "sourceOrSinkNodeName" in v:
+        return ("FLOW", v["constraintName"], v["processName"], v["sourceOrSinkNodeName"])
+    if "nodeName" in v:
+        return ("STATE", v["constraintName"], v["nodeName"])
+    return ("ONLINE", v["constraintName"], v["processName"])
+
+
+def _without(key):
+    return lambda inner: {k: v for k, v in inner.items() if k != key}
+
+
+def _iso(ts):
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).isoformat() if ts else ts
+
+
+def _timeline(v):
+    tl = dict(v["timeLineInput"])
+    if "start" in tl and tl["start"].get("customStartTime"):
+        tl["start"] = {"customStartTime": _iso(tl["start"]["customStartTime"])}
+    return tl
+
+
+class SyncSection(NamedTuple):
+    """
+    How one input_data section is diffed.
+
+    key:      variables -> entity key (same on both sides)
+    project:  variables -> the part the server can report back
+    parents:  variables -> [(section, key)] whose deletion also removes this entity
+    delete:   key -> Op removing the entity, or None if the schema has no such mutation
+    upsert:   True if re-sending the create op updates in place (no delete needed)
+    escalate: key -> (section, key) to replace instead when there is no delete
+    """
+    key: Callable[[Dict[str, Any]], Hashable]
+    project: Callable[[Dict[str, Any]], Any] = lambda v: v
+    parents: Callable[[Dict[str, Any]], List[Tuple[str, Hashable]]] = lambda v: []
+    delete: Optional[Callable[[Hashable], Op]] = None
+    upsert: bool = False
+    escalate: Optional[Callable[[Hashable], Tuple[str, Hashable]]] = None
+
+
+def _by_name(name):
+    return MutationSpec(name, {"name": "String!"}, MESSAGE)
+
+
+DELETE_NODE = _by_name("deleteNode")
+DELETE_PROCESS = _by_name("deleteProcess")
+DELETE_GROUP = _by_name("deleteGroup")
+DELETE_SCENARIO = _by_name("deleteScenario")
+DELETE_MARKET = _by_name("deleteMarket")
+DELETE_GEN_CONSTRAINT = _by_name("deleteGenConstraint")
+DELETE_RISK = MutationSpec("deleteRisk", {"parameter": "String!"}, MESSAGE)
+DELETE_NODE_DIFFUSION = MutationSpec("deleteNodeDiffusion", {"fromNode": "String!", "toNode": "String!"}, MESSAGE)
+DELETE_NODE_DELAY = MutationSpec("deleteNodeDelay", {"fromNode": "String!", "toNode": "String!"}, MESSAGE)
+DELETE_NODE_HISTORY = MutationSpec("deleteNodeHistory", {"nodeName": "String!"}, MESSAGE)
+CLEAR_NODE_HISTORY_STEPS = MutationSpec("clearNodeHistorySteps", {"nodeName": "String!"}, MESSAGE)
+DELETE_TOPOLOGY = MutationSpec("deleteTopology", {
+    "processName": "String!", "sourceNodeName": "String", "sinkNodeName": "String"}, MESSAGE)
+DELETE_FLOW_CONFACTOR = MutationSpec("deleteFlowConFactor", {
+    "constraintName": "String!", "processName": "String!", "sourceOrSinkNodeName": "String!"}, MESSAGE)
+DELETE_STATE_CONFACTOR = MutationSpec("deleteStateConFactor", {
+    "constraintName": "String!", "nodeName": "String!"}, MESSAGE)
+DELETE_ONLINE_CONFACTOR = MutationSpec("deleteOnlineConFactor", {
+    "constraintName": "String!", "processName": "String!"}, MESSAGE)
+UPDATE_NODE_STATE = MutationSpec("updateNodeState", {"nodeName": "String!", "state": "StateUpdate!"})
+
+
+def _delete_factor(key):
+    kind, cname = key[0], key[1]
+    if kind == "FLOW":
+        return Op(DELETE_FLOW_CONFACTOR, {"constraintName": cname, "processName": key[2],
+                                          "sourceOrSinkNodeName": key[3]}, f"{cname} {key[2]}->{key[3]}")
+    if kind == "STATE":
+        return Op(DELETE_STATE_CONFACTOR, {"constraintName": cname, "nodeName": key[2]}, f"{cname} node={key[2]}")
+    return Op(DELETE_ONLINE_CONFACTOR, {"constraintName": cname, "processName": key[2]}, f"{cname} process={key[2]}")
+
+
+def _nodes(*names):
+    return [("NODES", n) for n in names if n]
+
+
+def _factor_parents(v):
+    k = factor_key(v)
+    parents = [("GENERIC CONSTRAINT", k[1])]
+    if k[0] == "STATE":
+        return parents + _nodes(k[2])
+    return parents + [("PROCESSES", k[2])] + (_nodes(k[3]) if k[0] == "FLOW" else [])
+
+
+SYNC_SECTIONS: Dict[str, SyncSection] = {
+    "SETTINGS": SyncSection(key=lambda v: "settings", upsert=True),
+    "TIME LINE": SyncSection(key=lambda v: "timeline", project=_timeline, upsert=True),
+    "SETUP": SyncSection(key=lambda v: "setup", upsert=True),
+    "NODES": SyncSection(
+        key=lambda v: v["node"]["name"],
+        delete=lambda k: Op(DELETE_NODE, {"name": k}, k)),
+    "NODE STATE": SyncSection(
+        key=lambda v: v["nodeName"],
+        parents=lambda v: _nodes(v["nodeName"]),
+        delete=lambda k: Op(model.SET_NODE_STATE, {"nodeName": k, "state": None}, k)),
+    "PROCESSES": SyncSection(
+        key=lambda v: v["process"]["name"],
+        project=lambda v: _without("initialState")(v["process"]),
+        delete=lambda k: Op(DELETE_PROCESS, {"name": k}, k)),
+    "NODE GROUPS": SyncSection(key=lambda v: v["name"], delete=lambda k: Op(DELETE_GROUP, {"name": k}, k)),
+    "PROCESS GROUPS": SyncSection(key=lambda v: v["name"], delete=lambda k: Op(DELETE_GROUP, {"name": k}, k)),
+    "NODE GROUP MEMBERS": SyncSection(
+        key=lambda v: (v["groupName"], v["nodeName"]),
+        parents=lambda v: [("NODE GROUPS", v["groupName"])] + _nodes(v["nodeName"]),
+        escalate=lambda k: ("NODE GROUPS", k[0])),
+    "PROCESS GROUP MEMBERS": SyncSection(
+        key=lambda v: (v["groupName"], v["processName"]),
+        parents=lambda v: [("PROCESS GROUPS", v["groupName"]), ("PROCESSES", v["processName"])],
+        escalate=lambda k: ("PROCESS GROUPS", k[0])),
+    "SCENARIOS": SyncSection(key=lambda v: v["name"], delete=lambda k: Op(DELETE_SCENARIO, {"name": k}, k)),
+    "MARKETS": SyncSection(
+        key=lambda v: v["market"]["name"],
+        parents=lambda v: _nodes(v["market"]["node"]) + [("PROCESS GROUPS", v["market"]["processGroup"])],
+        delete=lambda k: Op(DELETE_MARKET, {"name": k}, k)),
+    "RISKS": SyncSection(
+        key=lambda v: v["risk"]["parameter"],
+        delete=lambda k: Op(DELETE_RISK, {"parameter": k}, k)),
+    "NODE DIFFUSION": SyncSection(
+        key=lambda v: (v["newDiffusion"]["fromNode"], v["newDiffusion"]["toNode"]),
+        parents=lambda v: _nodes(v["newDiffusion"]["fromNode"], v["newDiffusion"]["toNode"]),
+        delete=lambda k: Op(DELETE_NODE_DIFFUSION, {"fromNode": k[0], "toNode": k[1]}, f"{k[0]} -> {k[1]}")),
+    "NODE DELAY": SyncSection(
+        key=lambda v: (v["delay"]["fromNode"], v["delay"]["toNode"]),
+        parents=lambda v: _nodes(v["delay"]["fromNode"], v["delay"]["toNode"]),
+        delete=lambda k: Op(DELETE_NODE_DELAY, {"fromNode": k[0], "toNode": k[1]}, f"{k[0]} -> {k[1]}")),
+    "NODE HISTORY": SyncSection(
+        key=lambda v: v["nodeName"],
+        parents=lambda v: _nodes(v["nodeName"]),
+        delete=lambda k: Op(DELETE_NODE_HISTORY, {"nodeName": k}, k)),
+    "NODE HISTORY STEPS": SyncSection(
+        key=lambda v: v["nodeName"],
+        parents=lambda v: [("NODE HISTORY", v["nodeName"])],
+        delete=lambda k: Op(CLEAR_NODE_HISTORY_STEPS, {"nodeName": k}, k)),
+    "RESERVE TYPE": SyncSection(key=lambda v: v["reserveType"]["name"]),
+    "INFLOW BLOCK": SyncSection(
+        key=lambda v: v["inflowBlock"]["name"],
+        parents=lambda v: _nodes(v["inflowBlock"]["node"])),
+    "TOPOLOGIES": SyncSection(
+        key=lambda v: (v["processName"], v["sourceNodeName"], v["sinkNodeName"]),
+        # topology parameters are not readable; only existence is compared (see snapshot)
+        project=lambda v: (v["processName"], v["sourceNodeName"], v["sinkNodeName"]),
+        parents=lambda v: [("PROCESSES", v["processName"])] + _nodes(v["sourceNodeName"], v["sinkNodeName"]),
+        delete=lambda k: Op(DELETE_TOPOLOGY, {"processName": k[0], "sourceNodeName": k[1], "sinkNodeName": k[2]},
+                            f"process {k[0]} (source={k[1]}, sink={k[2]})")),
+    "GENERIC CONSTRAINT": SyncSection(
+        key=lambda v: v["constraint"]["name"],
+        delete=lambda k: Op(DELETE_GEN_CONSTRAINT, {"name": k}, k)),
+    "CONSTRAINT FACTORS": SyncSection(key=factor_key, parents=_factor_parents, delete=_delete_factor),
+}
+
+
+# ---------- SNAPSHOT ----------
+def entity_hash(variables_list) -> str:
+    return hashlib.sha256(repr(canon(variables_list)).encode("utf-8")).hexdigest()[:16]
+
+
+def _snapshot_key(key) -> str:
+    return json.dumps(key if isinstance(key, str) else list(key))
+
+
+def load_snapshot(path) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_snapshot(path, desired) -> None:
+    snap = {section: {_snapshot_key(k): entity_hash(ops_vars(ops)) for k, ops in entities.items()}
+            for section, entities in desired.items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snap, f, indent=1)
+
+
+def ops_vars(ops):
+    return [op.variables for op in ops]
+
+
+# ---------- PLAN ----------
+class SyncPlan(NamedTuple):
+    deletes: List[Tuple[str, List[Op]]]   # reverse section order
+    creates: List[Tuple[str, List[Op]]]   # input_data.SECTIONS order
+    warnings: List[str]
+
+    @property
+    def op_count(self) -> int:
+        return sum(len(ops) for _, ops in self.deletes + self.creates)
+
+
+def desired_entities(data) -> Dict[str, Dict[Hashable, List[Op]]]:
+    desired = {}
+    for section, build_ops in model.SECTIONS:
+        sync = SYNC_SECTIONS[section]
+        entities: Dict[Hashable, List[Op]] = {}
+        for op in build_ops(data):
+            entities.setdefault(sync.key(op.variables), []).append(op)
+        desired[section] = entities
+    return desired
+
+
+def _state_update(want, have):
+    return {k: v for k, v in want.items() if canon(v) != canon(have.get(k))}
+
+
+def plan_sync(data, current, snapshot=None) -> SyncPlan:
+    """Diff `data` (model_data.json) against `current` (current_entities) into a SyncPlan."""
+    snapshot = snapshot or {}
+    desired = desired_entities(data)
+    order = [section for section, _ in model.SECTIONS]
+    gone = {section: set() for section in order}      # entities that must disappear from the server
+    resend = {section: set() for section in order}    # desired entities to (re)send
+    updates: Dict[str, List[Op]] = {}
+    warnings = []
+
+    def changed(section, key):
+        sync = SYNC_SECTIONS[section]
+        want = [sync.project(v) for v in ops_vars(desired[section][key])]
+        have = [sync.project(v) for v in current[section][key]]
+        if canon(want) != canon(have):
+            return True
+        old = snapshot.get(section, {}).get(_snapshot_key(key))
+        return old is not None and old != entity_hash(ops_vars(desired[section][key]))
+
+    def mark_gone(section, key, escalate=True):
+        sync = SYNC_SECTIONS[section]
+        if escalate and sync.delete is None and sync.escalate is not None:
+            mark_gone(*sync.escalate(key))
+        gone[section].add(key)
+        if key in desired[section]:
+            resend[section].add(key)
+
+    # 1) direct differences
+    for section in order:
+        sync = SYNC_SECTIONS[section]
+        want, have = desired[section], current[section]
+        for key in want.keys() - have.keys():
+            resend[section].add(key)
+        for key in have.keys() - want.keys():
+            if sync.upsert:
+                continue
+            if sync.delete is None and sync.escalate is None:
+                warnings.append(f"{section} {key!r} is not in the model file but the schema has no delete mutation; left as is")
+            else:
+                mark_gone(section, key)
+        for key in want.keys() & have.keys():
+            if not changed(section, key):
+                continue
+            if sync.upsert:
+                resend[section].add(key)
+            elif section == "NODE STATE":
+                patch = _state_update(want[key][0].variables["state"], have[key][0]["state"])
+                updates.setdefault(section, []).append(Op(UPDATE_NODE_STATE, {"nodeName": key, "state": patch}, key))
+            elif sync.delete is None and sync.escalate is None:
+                warnings.append(f"{section} {key!r} changed but the schema has no delete mutation; left as is")
+            else:
+                mark_gone(section, key)
+
+    # 2) cascade: anything whose parent (or one of its scenarios) goes, goes with it.
+    # Sections are in dependency order, so one pass sees every parent before its children.
+    for section in order:
+        sync = SYNC_SECTIONS[section]
+        for key, vars_list in current[section].items():
+            if key in gone[section]:
+                continue
+            parents = [p for v in vars_list for p in sync.parents(v)]
+            parents += [("SCENARIOS", s) for s in scenarios_in(vars_list)]
+            if any(p_key in gone[p_section] for p_section, p_key in parents):
+                mark_gone(section, key, escalate=False)
+                if sync.delete is None and sync.escalate is None and key not in desired[section]:
+                    warnings.append(f"{section} {key!r} relies on the server cascade to be removed")
+
+    deletes = []
+    for section in reversed(order):
+        sync = SYNC_SECTIONS[section]
+        ops = [sync.delete(k) for k in gone[section] if sync.delete and k in current[section]]
+        if ops:
+            deletes.append((f"DELETE {section}", sorted(ops, key=lambda op: str(op.label))))
+
+    creates = []
+    for section in order:
+        # keep the JSON file's order within a section
+        ops = [op for key, key_ops in desired[section].items() if key in resend[section] for op in key_ops]
+        ops += [op for op in updates.get(section, []) if op.label not in resend[section]]
+        if ops:
+            creates.append((section, ops))
+    return SyncPlan(deletes, creates, warnings)
+
+
+def read_current(client):
+    return current_entities(client.execute(parse_document(CURRENT_MODEL_QUERY)))
+
+
+def sync_model(client, executor, data, snapshot_path=None, dry_run=False):
+    """Bring the server's model in line with `data` using only the needed mutations."""
+    snapshot = load_snapshot(snapshot_path) if snapshot_path else None
+    plan = plan_sync(data, read_current(client), snapshot)
+    for w in plan.warnings:
+        print("WARNING:", w)
+    print(f"Sync plan: {plan.op_count} mutations")
+    report = {}
+    for section, ops in plan.deletes + plan.creates:
+        if dry_run:
+            for op in ops:
+                print(f"{section} {op.spec.field} {op.label}")
+            continue
+        results = executor.execute(ops)
+        model.print_results(section, results)
+        report[section] = results
+    if snapshot_path and not dry_run and all(r.ok for rs in report.values() for r in rs):
+        save_snapshot(snapshot_path, desired_entities(data))
+    return report
@@ -0,0 +1,186 @@
+"""
+Content-addressed cache of optimization outcomes.
+
+model_fingerprint hashes the model as the loader would send it: every
+section of input_data.SECTIONS (or of the sections given, such as the
+minimised ones of --minimise) is turned into its ops, and the op fields and
+variables are fed to the hash in a canonical binary form, with dict keys
+sorted, nulls dropped and every number (series included) as an IEEE double.
+Key order, 1 vs 1.0 and how a float was written in the file don't change the
+fingerprint; anything the server would see differently does. A model whose
+inputs are resolved by the server when the job runs (a time line started
+from the clock with clockChoice, a value linked to a forecast/fType) has no
+fingerprint: the same file gives a different problem each run, so its
+outcome is never cached.
+
+OutcomeCache keeps one finished OptimizationOutcome per fingerprint in the
+columnar format of outcome_store.py. Entries older than `max_age` seconds
+are dropped, and when the cache grows beyond `max_bytes` the least recently
+used entries go first. With input_data.py --outcome-cache a hit is returned
+at once without contacting the server:
+
+    cache = OutcomeCache()
+    fp = model_fingerprint(data)       # None: not cacheable
+    payload = cache.get(fp) if fp else None
+    if payload is None:
+        payload = ...run the optimization...
+        if fp:
+            cache.put(fp, payload)
+"""
+import hashlib
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from connection import CACHE_DIR
+from outcome_store import INDEX_SUFFIX, OutcomeReader, write_outcome
+from utilities import FLOAT_ARRAY_TYPES, looks_numeric_leaf
+
+FINGERPRINT_VERSION = b"hertta-model/1"
+OUTCOME_CACHE_DIR = os.path.join(CACHE_DIR, "outcomes")
+DEFAULT_MAX_BYTES = 1 << 30          # 1 GiB
+DEFAULT_MAX_AGE = 30 * 24 * 3600.0   # 30 days
+# input fields resolved by the server when a job runs: the start clock and forecast links
+VOLATILE_FIELDS = frozenset(("clockChoice", "forecast", "fType"))
+
+_DOUBLE = struct.Struct("<d")
+_LENGTH = struct.Struct("<Q")
+
+
+def _feed(h, x) -> None:
+    if x is None:
+        h.update(b"N")
+    elif isinstance(x, bool):
+        h.update(b"T" if x else b"F")
+    elif isinstance(x, (int, float)):
+        h.update(b"d" + _DOUBLE.pack(float(x) + 0.0))   # + 0.0 turns -0.0 into 0.0
+    elif isinstance(x, str):
+        data = x.encode("utf-8")
+        h.update(b"s" + _LENGTH.pack(len(data)) + data)
+    elif isinstance(x, dict):
+        items = sorted((k, v) for k, v in x.items() if v is not None)
+        h.update(b"{" + _LENGTH.pack(len(items)))
+        for k, v in items:
+            _feed(h, k)
+            _feed(h, v)
+    elif isinstance(x, FLOAT_ARRAY_TYPES) or looks_numeric_leaf(x):
+        values = array("d", x)
+        if sys.byteorder != "little":
+            values.byteswap()
+        h.update(b"[d" + _LENGTH.pack(len(values)) + values.tobytes())
+    elif isinstance(x, (list, tuple)):
+        h.update(b"[" + _LENGTH.pack(len(x)))
+        for v in x:
+            _feed(h, v)
+    else:
+        raise TypeError(f"Cannot fingerprint {type(x).__name__}")
+
+
+def _volatile(x) -> bool:
+    """True if `x` holds an input the server resolves at run time (VOLATILE_FIELDS)."""
+    if isinstance(x, dict):
+        return any(v is not None and (k in VOLATILE_FIELDS or _volatile(v)) for k, v in x.items())
+    if isinstance(x, (list, tuple)) and not looks_numeric_leaf(x):
+        return any(_volatile(v) for v in x)
+    return False
+
+
+def model_fingerprint(data, sections=None) -> Optional[str]:
+    """
+    Stable hex hash of everything input_data.py would send for `data` through `sections`
+    (default input_data.SECTIONS); None if the model has inputs resolved on the server at
+    run time (see the module docstring).
+    """
+    if sections is None:
+        from input_data import SECTIONS as sections
+
+    h = hashlib.sha256(FINGERPRINT_VERSION)
+    for section, build_ops in sections:
+        _feed(h, section)
+        for op in build_ops(data):
+            if _volatile(op.variables):
+                return None
+            _feed(h, op.spec.field)
+            _feed(h, op.variables)
+    return h.hexdigest()
+
+
+class OutcomeCache:
+    """Fingerprint -> finished outcome payload, on disk; see the module docstring."""
+
+    def __init__(self, directory: str = OUTCOME_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: Optional[float] = DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def _base(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, fingerprint)
+
+    def _files(self, base: str) -> List[str]:
+        return [p for p in (base + INDEX_SUFFIX, base + ".f64") if os.path.exists(p)]
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        base = self._base(fingerprint)
+        index_path = base + INDEX_SUFFIX
+        if not os.path.exists(index_path):
+            return None
+        if self.max_age is not None and time.time() - os.path.getmtime(index_path) > self.max_age:
+            self._remove(base)
+            return None
+        with OutcomeReader(base) as reader:
+            payload = reader.to_payload()
+        os.utime(index_path, (time.time(), os.path.getmtime(index_path)))   # atime marks the use
+        return payload
+
+    def put(self, fingerprint: str, payload: Dict[str, Any]) -> Optional[str]:
+        """Store a FINISHED payload (others are not cached); returns the index path."""
+        if payload.get("state") != "FINISHED" or not payload.get("outcome"):
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        # write_outcome writes the data file before the index, so a crash leaves no readable half entry
+        index_path = write_outcome(self._base(fingerprint), payload)
+        self.evict()
+        return index_path
+
+    def _remove(self, base: str) -> None:
+        for path in self._files(base):
+            os.remove(path)
+
+    def entries(self) -> List[Tuple[str, float, float, int]]:
+        """(base, last use, stored at, bytes) of every entry."""
+        if not os.path.isdir(self.directory):
+            return []
+        out = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(INDEX_SUFFIX):
+                continue
+            base = os.path.join(self.directory, name[:-len(INDEX_SUFFIX)])
+            st = os.stat(base + INDEX_SUFFIX)
+            size = sum(os.path.getsize(p) for p in self._files(base))
+            out.append((base, max(st.st_atime, st.st_mtime), st.st_mtime, size))
+        return out
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones down to max_bytes. Returns entries removed."""
+        now = time.time()
+        entries = self.entries()
+        removed = 0
+        kept = []
+        for entry in entries:
+            if self.max_age is not None and now - entry[2] > self.max_age:
+                self._remove(entry[0])
+                removed += 1
+            else:
+                kept.append(entry)
+        total = sum(e[3] for e in kept)
+        for base, _, _, size in sorted(kept, key=lambda e: e[1]):
+            if total <= self.max_bytes:
+                break
+            self._remove(base)
+            total -= size
+            removed += 1
+        return removed
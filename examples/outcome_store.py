@@ -0,0 +1,246 @@
+"""
+Columnar binary storage for job outcomes.
+
+An outcome is written as two files:
+
+  <base>.f64   little-endian float64 columns, back to back: `time` (POSIX
+               seconds, UTC) first, then one column per control signal
+               (or the price / temperature series of a fetch job)
+  <base>.idx.json  a small index: job id, state, outcome type, column names
+                   and the column length
+
+Column i lives at byte offset i * length * 8, so a reader memory-maps the
+data file and returns any one signal as a zero-copy view without parsing the
+rest. This is what the scripts write by default; pass --outcome-format json
+to get the single indented JSON file instead. Usage:
+
+    python outcome_store.py convert optimization_outcome_1.json
+    python outcome_store.py show optimization_outcome_1 ngchp_ng_ngchp_s1
+"""
+import json
+import mmap
+import os
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; memoryviews work without it
+    np = None
+
+FORMAT = "hertta-outcome/1"
+INDEX_SUFFIX = ".idx.json"
+ITEMSIZE = 8
+
+# outcome type -> name of its value column (OptimizationOutcome has controlSignals instead)
+SERIES_FIELDS = {"ElectricityPriceOutcome": "price", "WeatherForecastOutcome": "temperature"}
+
+
+def to_epoch(ts: str) -> float:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+
+
+def from_epoch(t: float) -> str:
+    return datetime.fromtimestamp(t, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def outcome_columns(outcome: Dict[str, Any]) -> Dict[str, List[float]]:
+    """Name -> values for every series of a jobOutcome payload, `time` first."""
+    columns = {"time": [to_epoch(t) for t in outcome.get("time", [])]}
+    if outcome.get("__typename") == "OptimizationOutcome":
+        for cs in outcome.get("controlSignals", []):
+            columns[cs["name"]] = cs["signal"]
+    else:
+        field = SERIES_FIELDS.get(outcome.get("__typename"))
+        if field:
+            columns[field] = outcome.get(field, [])
+    return columns
+
+
+def le_doubles(values) -> array:
+    col = array("d", values)
+    if sys.byteorder != "little":
+        col.byteswap()
+    return col
+
+
+def write_outcome(base: str, payload: Dict[str, Any]) -> str:
+    """
+    Write {"jobId", "state", "outcome" | "message"} as <base>.idx.json + <base>.f64.
+    Returns the index path.
+    """
+    outcome = payload.get("outcome")
+    index = {
+        "format": FORMAT,
+        "jobId": payload.get("jobId"),
+        "state": payload.get("state"),
+        "message": payload.get("message"),
+        "typename": None,
+        "length": 0,
+        "dtype": "<f8",
+        "columns": [],
+        "data": None,
+    }
+    if outcome:
+        columns = outcome_columns(outcome)
+        length = len(columns["time"])
+        for name, values in columns.items():
+            if len(values) != length:
+                raise ValueError(f"Column {name!r} has {len(values)} values, time axis has {length}")
+        data_path = base + ".f64"
+        with open(data_path, "wb") as f:
+            for values in columns.values():
+                le_doubles(values).tofile(f)
+        index.update(typename=outcome.get("__typename"), length=length,
+                     columns=list(columns), data=os.path.basename(data_path))
+
+    index_path = base + INDEX_SUFFIX
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    return index_path
+
+
+def write_outcome_json(path: str, payload: Dict[str, Any]) -> str:
+    """The original indent=2 JSON dump, for consumers that still read it."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def save_outcome(base: str, payload: Dict[str, Any], fmt: str = "binary") -> str:
+    """Write `payload` in the --outcome-format `fmt` ("binary" or "json"). Returns the path written."""
+    if fmt == "json":
+        return write_outcome_json(base + ".json", payload)
+    if fmt != "binary":
+        raise ValueError(f"Unknown outcome format {fmt!r}")
+    return write_outcome(base, payload)
+
+
+class OutcomeReader:
+    """Memory-mapped reader for an outcome written by write_outcome; `path` is the base or index path."""
+
+    def __init__(self, path: str):
+        index_path = path if path.endswith(INDEX_SUFFIX) else path + INDEX_SUFFIX
+        with open(index_path, "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        if self.index.get("format") != FORMAT:
+            raise ValueError(f"{index_path} is not a columnar outcome index")
+        self.length = self.index["length"]
+        self.columns = {name: i for i, name in enumerate(self.index["columns"])}
+        self._file = self._map = self._view = None
+        if self.index["data"] and self.length:
+            data_path = os.path.join(os.path.dirname(os.path.abspath(index_path)), self.index["data"])
+            self._file = open(data_path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if sys.byteorder == "little":
+                self._view = memoryview(self._map).cast("d")
+
+    @property
+    def job_id(self) -> Optional[int]:
+        return self.index.get("jobId")
+
+    @property
+    def state(self) -> Optional[str]:
+        return self.index.get("state")
+
+    @property
+    def signal_names(self) -> List[str]:
+        return self.index["columns"][1:]
+
+    def column(self, name: str):
+        """Zero-copy float64 view of one column (a copy on big-endian hosts)."""
+        if name not in self.columns:
+            raise KeyError(f"No column {name!r} in outcome")
+        start = self.columns[name] * self.length
+        if self._view is not None:
+            return self._view[start:start + self.length]
+        if not self.length:
+            return array("d")
+        col = array("d", self._map[start * ITEMSIZE:(start + self.length) * ITEMSIZE])
+        col.byteswap()
+        return col
+
+    def signal(self, name: str):
+        return self.column(name)
+
+    def array(self, name: str):
+        """numpy view of one column; needs numpy."""
+        if np is None:
+            raise RuntimeError("numpy is not installed; use column() for a memoryview")
+        if name not in self.columns:
+            raise KeyError(f"No column {name!r} in outcome")
+        if not self.length:
+            return np.zeros(0)
+        start = self.columns[name] * self.length
+        return np.frombuffer(self._map, dtype="<f8", count=self.length, offset=start * ITEMSIZE)
+
+    def matrix(self):
+        """numpy view of all signal columns as one (signals x time) array; needs numpy."""
+        if np is None:
+            raise RuntimeError("numpy is not installed; use column() for a memoryview")
+        if not self.length:
+            return np.zeros((len(self.signal_names), 0))
+        return np.frombuffer(self._map, dtype="<f8", count=len(self.signal_names) * self.length,
+                             offset=self.length * ITEMSIZE).reshape(len(self.signal_names), self.length)
+
+    def times(self) -> List[str]:
+        return [from_epoch(t) for t in self.column("time")] if self.length else []
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Rebuild the JSON payload input_data.py used to write."""
+        payload = {"jobId": self.job_id, "state": self.state}
+        typename = self.index.get("typename")
+        if not typename:
+            payload["message"] = self.index.get("message")
+            return payload
+        outcome = {"__typename": typename, "time": self.times()}
+        if typename == "OptimizationOutcome":
+            outcome["controlSignals"] = [{"name": n, "signal": self.column(n).tolist()}
+                                         for n in self.signal_names]
+        else:
+            for n in self.signal_names:
+                outcome[n] = self.column(n).tolist()
+        payload["outcome"] = outcome
+        return payload
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # column views are still alive; the map goes when they do
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv):
+    if len(argv) >= 2 and argv[0] == "convert":
+        src = argv[1]
+        with open(src, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        print("Wrote", write_outcome(os.path.splitext(src)[0], payload))
+    elif len(argv) >= 2 and argv[0] == "show":
+        with OutcomeReader(argv[1]) as r:
+            names = argv[2:] or r.signal_names
+            print(f"job {r.job_id}: {r.state}, {len(r.signal_names)} signals x {r.length} steps")
+            for n in names:
+                print(f"{n}: {r.column(n).tolist()[:10]} ...")
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,217 @@
+"""
+Pipelined run: forecast fetches overlap the model upload.
+
+A plain run goes stage by stage: fetch the electricity prices and weather
+forecast, wait for them, upload the model, connect the markets and nodes to
+the forecasts, optimise. Here the fetch jobs are started first and run on
+the server while the model is uploaded; the jobs are then polled together
+(jobs.wait_for_jobs), each one's connections are sent as soon as it
+reaches FINISHED, and the optimization starts when the last one is
+connected. End to end this takes about max(upload, fetch) + optimization
+instead of the sum of the stages.
+
+Which forecasts to connect is given per market or node as
+NAME:FORECAST:FTYPE; a price fetch runs if any market is linked, a weather
+fetch if any node is:
+
+    python pipeline.py --model model_data.json \\
+        --market-forecast npe:ElectricityPrice:price --node-forecast dh:Weather:temperature
+
+With --sequential the same stages run one after another, for comparison.
+A fetch that does not finish, or a link the server rejects, leaves its
+entities on the values in the model file; the optimization is then only
+started with --allow-stale.
+"""
+import argparse
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from batching import BatchExecutor, DEFAULT_BATCH_SIZE, MESSAGE, MutationSpec, Op
+from connection import DEFAULT_URL, SCHEMA_PATH, make_client
+from jobs import fetch_outcome, print_status, start_job, wait_for_job, wait_for_jobs
+from outcome_store import save_outcome
+from preflight import PreflightError, check_model
+from series_refs import load_model
+
+CONNECT_MARKET = MutationSpec("connectMarketPricesToForecast", {
+    "marketName": "String!", "forecastName": "String!", "forecastType": "String!"}, MESSAGE)
+CONNECT_NODE = MutationSpec("connectNodeInflowToTemperatureForecast", {
+    "nodeName": "String!", "forecastName": "String!", "forecastType": "String!"}, MESSAGE)
+
+
+class ForecastLink(NamedTuple):
+    name: str           # market or node
+    forecast: str
+    f_type: str
+
+
+class PipelineRun(NamedTuple):
+    fetches: Dict[str, Any]             # job kind -> JobResult
+    connected: List[str]                # labels of the links that were sent and accepted
+    failed: List[str]                   # labels of the links the server rejected
+    optimization: Optional[Any]         # JobResult, None if not started
+    payload: Optional[Dict[str, Any]]   # {"jobId", "state", "outcome" | "message"}
+    timings: Dict[str, float]           # stage -> seconds, "total" included
+
+
+def parse_link(text: str) -> ForecastLink:
+    parts = text.split(":")
+    if len(parts) != 3 or not all(parts):
+        raise argparse.ArgumentTypeError(f"expected NAME:FORECAST:FTYPE, got {text!r}")
+    return ForecastLink(*parts)
+
+
+def link_ops(market_links: Sequence[ForecastLink], node_links: Sequence[ForecastLink]) -> Dict[str, List[Op]]:
+    """Connection ops keyed by the fetch job kind they wait for."""
+    ops = {
+        "electricity_price": [Op(CONNECT_MARKET, {"marketName": l.name, "forecastName": l.forecast,
+                                                  "forecastType": l.f_type}, l.name) for l in market_links],
+        "weather_forecast": [Op(CONNECT_NODE, {"nodeName": l.name, "forecastName": l.forecast,
+                                               "forecastType": l.f_type}, l.name) for l in node_links],
+    }
+    return {kind: kind_ops for kind, kind_ops in ops.items() if kind_ops}
+
+
+def _upload(client, executor, data, sync: bool):
+    if sync:
+        from model_sync import sync_model
+        sync_model(client, executor, data)
+    else:
+        from input_data import upload_model
+        upload_model(executor, data)
+
+
+def _connect(executor, ops: List[Op]) -> Tuple[List[str], List[str]]:
+    """Send the link ops; returns the labels of the (accepted, rejected) links."""
+    connected, rejected = [], []
+    for r in executor.execute(ops):
+        if r.ok:
+            connected.append(f"{r.field} {r.label}")
+        else:
+            print(f"{r.field} {r.label}: " + "; ".join(r.errors))
+            rejected.append(f"{r.field} {r.label}")
+    return connected, rejected
+
+
+def run_pipeline(client, executor, data: Dict[str, Any], market_links: Sequence[ForecastLink] = (),
+                 node_links: Sequence[ForecastLink] = (), sync: bool = False, sequential: bool = False,
+                 allow_stale: bool = False, job_timeout: Optional[float] = 300.0) -> PipelineRun:
+    """Fetch forecasts, upload `data`, connect the links and optimise; see the module docstring."""
+    started = time.monotonic()
+    timings: Dict[str, float] = {}
+    pending = link_ops(market_links, node_links)
+    connected: List[str] = []
+    failed: List[str] = []
+    unlinked = set()        # fetch kinds with a rejected link
+
+    def connect(kind: str) -> None:
+        accepted, rejected = _connect(executor, pending[kind])
+        connected.extend(accepted)
+        failed.extend(rejected)
+        if rejected:
+            unlinked.add(kind)
+
+    def stage(name: str, since: float) -> float:
+        now = time.monotonic()
+        timings[name] = timings.get(name, 0.0) + now - since
+        return now
+
+    if sequential:
+        fetches = {}
+        for kind in pending:
+            t = time.monotonic()
+            job_id = start_job(client, kind)
+            fetches[kind] = wait_for_job(client, job_id, deadline=job_timeout, on_status=print_status)
+            stage("fetch", t)
+        t = time.monotonic()
+        _upload(client, executor, data, sync)
+        t = stage("upload", t)
+        for kind in pending:
+            if fetches[kind].finished:
+                connect(kind)
+        stage("connect", t)
+    else:
+        t = time.monotonic()
+        kinds = {start_job(client, kind): kind for kind in pending}
+        for job_id, kind in kinds.items():
+            print(f"{kind} job {job_id} started; uploading meanwhile")
+        _upload(client, executor, data, sync)
+        t = stage("upload", t)
+
+        def on_done(job):
+            if job.finished:
+                since = time.monotonic()
+                connect(kinds[job.job_id])
+                stage("connect", since)
+
+        results = wait_for_jobs(client, list(kinds), deadline=job_timeout, on_status=print_status, on_done=on_done)
+        fetches = {kinds[job_id]: job for job_id, job in results.items()}
+        # time spent waiting for the fetches after the upload, i.e. what the overlap did not hide
+        timings["fetch wait"] = time.monotonic() - t - timings.get("connect", 0.0)
+
+    optimization = payload = None
+    stale = [kind for kind, job in fetches.items() if not job.finished or kind in unlinked]
+    for kind in stale:
+        job = fetches[kind]
+        if job.finished:
+            print(f"WARNING: {kind} links were rejected; those entities keep the values of the model file")
+        else:
+            print(f"WARNING: {kind} job {job.job_id} ended {job.state}" + (f" ({job.stopped})" if job.stopped else "")
+                  + "; its entities keep the values of the model file")
+    if not stale or allow_stale:
+        t = time.monotonic()
+        job_id = start_job(client, "optimization")
+        optimization = wait_for_job(client, job_id, deadline=job_timeout, on_status=print_status)
+        payload = {"jobId": job_id, "state": optimization.state}
+        if optimization.finished:
+            payload["outcome"] = fetch_outcome(client, job_id)
+        else:
+            payload["message"] = optimization.message
+        stage("optimization", t)
+    timings["total"] = time.monotonic() - started
+    return PipelineRun(fetches, connected, failed, optimization, payload, timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload a model while its forecasts are fetched, then optimise.")
+    parser.add_argument("--model", default="model_data.json")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--schema", default=SCHEMA_PATH,
+                        help="local SDL file; pass '' to use the introspection cache instead")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--market-forecast", type=parse_link, action="append", default=[],
+                        metavar="MARKET:FORECAST:FTYPE", help="connect the market's prices to a price forecast")
+    parser.add_argument("--node-forecast", type=parse_link, action="append", default=[],
+                        metavar="NODE:FORECAST:FTYPE", help="connect the node's inflow to a temperature forecast")
+    parser.add_argument("--sync", action="store_true", help="send only the difference to the server's model")
+    parser.add_argument("--sequential", action="store_true", help="run the stages one after another")
+    parser.add_argument("--allow-stale", action="store_true",
+                        help="optimise even if a forecast fetch did not finish or a link was rejected")
+    parser.add_argument("--job-timeout", type=float, default=300.0)
+    parser.add_argument("--no-preflight", action="store_true")
+    parser.add_argument("--outcome-format", choices=("binary", "json"), default="binary")
+    args = parser.parse_args()
+
+    data = load_model(args.model)
+    if not args.no_preflight:
+        try:
+            check_model(data)
+        except PreflightError as e:
+            raise SystemExit(str(e))
+    client = make_client(args.url, schema_path=args.schema or None)
+    run = run_pipeline(client, BatchExecutor(client, batch_size=args.batch_size), data,
+                       args.market_forecast, args.node_forecast, sync=args.sync, sequential=args.sequential,
+                       allow_stale=args.allow_stale, job_timeout=args.job_timeout)
+
+    print(f"Connected {len(run.connected)} forecast links" + (f", {len(run.failed)} rejected" if run.failed else ""))
+    print(", ".join(f"{name} {seconds:.2f}s" for name, seconds in run.timings.items()))
+    if run.payload is None:
+        raise SystemExit("Optimization not started: a forecast fetch did not finish or a link was rejected "
+                         "(see --allow-stale)")
+    base = f"optimization_outcome_{run.payload['jobId']}"
+    path = save_outcome(base, run.payload, args.outcome_format)
+    print("Wrote", path)
+
+
+if __name__ == "__main__":
+    main()
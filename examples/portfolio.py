@@ -0,0 +1,145 @@
+"""
+Portfolio runner: many site models, several server instances.
+
+A server holds one model at a time, so the runner starts one worker process
+per endpoint. Each worker opens its own client for its endpoint and takes
+model files off a shared queue until none are left. For every model it:
+
+  1. checks the model locally (preflight.py),
+  2. syncs it onto the server with model_sync (only what differs from the
+     model the worker loaded before is sent; leftovers of that model are
+     deleted),
+  3. runs the optimization and writes the outcome, plus the log of
+     everything the steps above printed, to <out>/<model name>/.
+
+Throughput grows with the number of endpoints; a model that fails is
+reported and does not stop the others.
+
+    python portfolio.py sites/*.json --endpoints http://localhost:3030/graphql \\
+        http://localhost:3031/graphql --out portfolio_out
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional
+
+from batching import BatchExecutor, DEFAULT_BATCH_SIZE
+from connection import DEFAULT_URL, SCHEMA_PATH, make_client
+from jobs import fetch_outcome, print_status, start_job, wait_for_job
+from model_sync import sync_model
+from outcome_store import save_outcome
+from preflight import check_model
+from series_refs import load_model
+
+
+class ModelRun(NamedTuple):
+    model: str              # model file
+    endpoint: str
+    state: str              # job state, or ERROR
+    seconds: float          # upload + optimization
+    path: Optional[str]     # outcome file
+    error: Optional[str] = None
+
+
+def model_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+# ---------- WORKER ----------
+# one client per worker process, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(endpoints, schema_path, batch_size):
+    url = endpoints.get()
+    client = make_client(url, schema_path=schema_path)
+    _worker.update(url=url, client=client, executor=BatchExecutor(client, batch_size=batch_size))
+
+
+def _run_model(path: str, out_dir: str, job_timeout: float, outcome_format: str) -> ModelRun:
+    url, client, executor = _worker["url"], _worker["client"], _worker["executor"]
+    started = time.perf_counter()
+    target = os.path.join(out_dir, model_name(path))
+    os.makedirs(target, exist_ok=True)
+    try:
+        with open(os.path.join(target, "run.log"), "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+            print(f"Model {path} on {url}")
+            data = load_model(path)
+            check_model(data)
+            sync_model(client, executor, data)
+            job_id = start_job(client, "optimization")
+            job = wait_for_job(client, job_id, deadline=job_timeout, on_status=print_status)
+            payload = {"jobId": job_id, "state": job.state}
+            if job.finished:
+                payload["outcome"] = fetch_outcome(client, job_id)
+            else:
+                payload["message"] = job.message
+            base = os.path.join(target, f"optimization_outcome_{job_id}")
+            out_path = save_outcome(base, payload, outcome_format)
+            print(f"Job {job_id} {job.state} -> {out_path}")
+        return ModelRun(path, url, job.state, time.perf_counter() - started, out_path)
+    except Exception as e:
+        return ModelRun(path, url, "ERROR", time.perf_counter() - started, None, f"{type(e).__name__}: {e}")
+
+
+# ---------- PORTFOLIO ----------
+def run_portfolio(models: List[str], endpoints: List[str], out_dir: str, schema_path: Optional[str] = SCHEMA_PATH,
+                  batch_size: int = DEFAULT_BATCH_SIZE, job_timeout: float = 300.0,
+                  outcome_format: str = "binary", on_done=None) -> List[ModelRun]:
+    """Upload and optimise every model, one worker per endpoint. Returns runs in completion order."""
+    if not endpoints:
+        raise ValueError("At least one endpoint is needed")
+    if len({model_name(m) for m in models}) != len(models):
+        raise ValueError("Model file names must be unique; they name the output directories")
+    os.makedirs(out_dir, exist_ok=True)
+    runs = []
+    with multiprocessing.Manager() as manager:
+        queue = manager.Queue()
+        for url in endpoints:
+            queue.put(url)
+        with ProcessPoolExecutor(max_workers=len(endpoints), initializer=_init_worker,
+                                 initargs=(queue, schema_path, batch_size)) as pool:
+            futures = [pool.submit(_run_model, m, out_dir, job_timeout, outcome_format) for m in models]
+            for future in as_completed(futures):
+                run = future.result()
+                runs.append(run)
+                if on_done is not None:
+                    on_done(run)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimise many model files across several servers.")
+    parser.add_argument("models", nargs="+", help="model files, one per site")
+    parser.add_argument("--endpoints", nargs="+", default=[DEFAULT_URL], help="GraphQL URLs, one worker each")
+    parser.add_argument("--out", default="portfolio_out", help="output directory, one subdirectory per model")
+    parser.add_argument("--schema", default=SCHEMA_PATH,
+                        help="local SDL file; pass '' to use the introspection cache instead")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--job-timeout", type=float, default=300.0)
+    parser.add_argument("--outcome-format", choices=("binary", "json"), default="binary")
+    args = parser.parse_args()
+
+    def report(run: ModelRun):
+        print(f"{run.model}: {run.state} on {run.endpoint} in {run.seconds:.2f}s"
+              + (f" -> {run.path}" if run.path else "") + (f" ({run.error})" if run.error else ""))
+
+    started = time.perf_counter()
+    runs = run_portfolio(args.models, args.endpoints, args.out, schema_path=args.schema or None,
+                         batch_size=args.batch_size, job_timeout=args.job_timeout,
+                         outcome_format=args.outcome_format, on_done=report)
+    elapsed = time.perf_counter() - started
+    summary_path = os.path.join(args.out, "portfolio.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"seconds": elapsed, "endpoints": args.endpoints, "runs": [r._asdict() for r in runs]}, f, indent=1)
+    failed = sum(r.state != "FINISHED" for r in runs)
+    print(f"{len(runs)} models in {elapsed:.2f}s on {len(args.endpoints)} endpoints, {failed} not finished; "
+          f"summary in {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
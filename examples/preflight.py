@@ -0,0 +1,275 @@
+"""
+Pre-flight validation of a model before anything is sent to the server.
+
+One pass over model_data.json builds name indexes (nodes, processes, groups,
+scenarios, reserve types, topologies) and checks:
+
+  * required fields and enum values, taken from schema.graphql's input types,
+  * every cross-reference (market -> node / process group / reserve type,
+    topology -> process / nodes, factor -> process / node / topology,
+    value series -> scenario, group member -> node / process, ...),
+  * duplicate names,
+  * series lengths against the number of timeline steps.
+
+All problems are collected and reported together, so a broken model fails in
+milliseconds instead of partway through an upload:
+
+    problems = validate_model(data)
+    check_model(data)          # raises PreflightError listing every problem
+
+    python preflight.py model_data.json
+"""
+import sys
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from coercers import load_module
+
+# model_data.json section -> (GraphQL input type of its items, key naming an item)
+SECTION_TYPES = {
+    "nodes": ("NewNode", "name"),
+    "processes": ("NewProcess", "name"),
+    "markets": ("NewMarket", "name"),
+    "risk": ("NewRisk", "parameter"),
+    "node_diffusions": ("NewNodeDiffusion", None),
+    "node_delays": ("NewNodeDelay", None),
+    "reserve_types": ("NewReserveType", "name"),
+    "inflow_blocks": ("NewInflowBlock", "name"),
+    "topologies": ("NewTopology", None),
+    "gen_constraints": ("NewGenConstraint", "name"),
+}
+
+# value-list fields per section, checked for scenario references and series length
+VALUE_FIELDS = {
+    "nodes": ("cost", "inflow"),
+    "processes": ("cf", "effTs"),
+    "markets": ("realisation", "price", "upPrice", "downPrice", "reserveActivationPrice"),
+    "node_diffusions": ("coefficient",),
+    "inflow_blocks": ("data",),
+    "topologies": ("capTs",),
+    "gen_constraints": ("constant",),
+}
+
+DEFAULT_SCENARIOS = [{"name": "ExampleScenario", "weight": 1.0}]
+
+
+class Problem(NamedTuple):
+    section: str
+    label: str
+    message: str
+
+    def __str__(self):
+        return f"{self.section} {self.label}: {self.message}"
+
+
+class PreflightError(ValueError):
+    def __init__(self, problems: List[Problem]):
+        self.problems = problems
+        lines = "\n".join(f"  {p}" for p in problems)
+        super().__init__(f"Model failed pre-flight validation with {len(problems)} problem(s):\n{lines}")
+
+
+class ModelIndex(NamedTuple):
+    nodes: Set[str]
+    processes: Set[str]
+    node_groups: Set[str]
+    process_groups: Set[str]
+    scenarios: Set[str]
+    reserve_types: Set[str]
+    topologies: Set[tuple]
+
+
+def _seconds(duration: Optional[Dict[str, Any]]) -> Optional[int]:
+    if not duration:
+        return None
+    try:
+        return (int(duration.get("hours", 0)) * 3600 + int(duration.get("minutes", 0)) * 60
+                + int(duration.get("seconds", 0)))
+    except (TypeError, ValueError):
+        return None
+
+
+def timeline_steps(timeline: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Number of time steps of `timeline` (both ends included), or None if it is not fully given."""
+    duration = _seconds((timeline or {}).get("duration"))
+    step = _seconds((timeline or {}).get("step"))
+    if duration is None or not step or duration % step:
+        return None
+    return duration // step + 1
+
+
+def _names(items: Iterable[Dict[str, Any]], key: str, section: str, problems: List[Problem]) -> Set[str]:
+    seen: Set[str] = set()
+    for item in items:
+        name = item.get(key)
+        if name is None:
+            continue
+        if name in seen:
+            problems.append(Problem(section, repr(name), "duplicate name"))
+        seen.add(name)
+    return seen
+
+
+def build_index(data, problems: List[Problem]) -> ModelIndex:
+    """Name sets for every section other sections refer to; duplicates are reported."""
+    return ModelIndex(
+        nodes=_names(data.get("nodes", []), "name", "NODES", problems),
+        processes=_names(data.get("processes", []), "name", "PROCESSES", problems),
+        node_groups=_names(data.get("node_groups", []), "name", "NODE GROUPS", problems),
+        process_groups=_names(data.get("process_groups", []), "name", "PROCESS GROUPS", problems),
+        scenarios=_names(data.get("scenarios", DEFAULT_SCENARIOS), "name", "SCENARIOS", problems),
+        reserve_types=_names(data.get("reserve_types", []), "name", "RESERVE TYPE", problems),
+        topologies={(t.get("processName"), t.get("sourceNodeName"), t.get("sinkNodeName"))
+                    for t in data.get("topologies", [])},
+    )
+
+
+class _Checker:
+    def __init__(self, index: ModelIndex, steps: Optional[int], schema, problems: List[Problem]):
+        self.index = index
+        self.steps = steps
+        self.required = schema.REQUIRED
+        self.enums = schema.ENUM_FIELDS
+        self.problems = problems
+
+    def add(self, section: str, label, message: str):
+        self.problems.append(Problem(section, str(label), message))
+
+    def fields(self, section: str, label, item: Dict[str, Any], type_name: str):
+        missing = [k for k in self.required[type_name] if item.get(k) is None]
+        if missing:
+            self.add(section, label, f"missing required fields: {', '.join(missing)}")
+        for field, allowed in self.enums.get(type_name, {}).items():
+            value = item.get(field)
+            if value is not None and value not in allowed:
+                self.add(section, label, f"{field}={value!r} is not one of {', '.join(sorted(allowed))}")
+
+    def ref(self, section: str, label, what: str, name, names: Set[str], optional: bool = False):
+        if name is None:
+            if not optional:
+                self.add(section, label, f"no {what} given")
+        elif name not in names:
+            self.add(section, label, f"unknown {what} {name!r}")
+
+    def values(self, section: str, label, field: str, values):
+        for i, v in enumerate(values or []):
+            if v is None:
+                continue
+            if v.get("scenario") is not None:
+                self.ref(section, label, f"scenario in {field}[{i}]", v["scenario"], self.index.scenarios)
+            series = v.get("series")
+            if series is None:
+                continue
+            try:
+                length = len(series)
+            except (OSError, KeyError, ValueError, RuntimeError) as e:     # an unreadable seriesRef
+                self.add(section, label, f"{field}[{i}]: cannot read {series!r}: {e}")
+                continue
+            if self.steps is not None and length != self.steps:
+                self.add(section, label, f"{field}[{i}] has {length} values, timeline has {self.steps} steps")
+
+
+def validate_model(data, schema_path: Optional[str] = None) -> List[Problem]:
+    """Every problem found in `data` (a dict or StreamedModel); empty if it is ready to upload."""
+    problems: List[Problem] = []
+    index = build_index(data, problems)
+    schema = load_module(schema_path) if schema_path else load_module()
+    c = _Checker(index, timeline_steps(data.get("timeline")), schema, problems)
+
+    setup = data.get("setup") or {}
+    if setup.get("commonScenarioName"):
+        c.ref("SETUP", "setup", "commonScenarioName", setup["commonScenarioName"], index.scenarios)
+
+    node_targets = index.nodes | index.node_groups
+    for section, (type_name, label_key) in SECTION_TYPES.items():
+        title = section.upper().replace("_", " ")
+        for i, item in enumerate(data.get(section, [])):
+            label = item.get(label_key) if label_key else f"#{i}"
+            c.fields(title, label, item, type_name)
+            for field in VALUE_FIELDS.get(section, ()):
+                c.values(title, label, field, item.get(field))
+
+            if section == "markets":
+                # reserve markets sit on a node group rather than a node
+                c.ref(title, label, "node or node group", item.get("node"), node_targets)
+                c.ref(title, label, "processGroup", item.get("processGroup"), index.process_groups)
+                c.ref(title, label, "reserveType", item.get("reserveType"), index.reserve_types, optional=True)
+            elif section in ("node_diffusions", "node_delays"):
+                c.ref(title, label, "fromNode", item.get("fromNode"), index.nodes)
+                c.ref(title, label, "toNode", item.get("toNode"), index.nodes)
+            elif section == "inflow_blocks":
+                c.ref(title, label, "node", item.get("node"), index.nodes)
+            elif section == "topologies":
+                c.ref(title, label, "process", item.get("processName"), index.processes)
+                c.ref(title, label, "source node", item.get("sourceNodeName"), index.nodes, optional=True)
+                c.ref(title, label, "sink node", item.get("sinkNodeName"), index.nodes, optional=True)
+                if item.get("sourceNodeName") is None and item.get("sinkNodeName") is None:
+                    c.add(title, label, "topology has neither a source nor a sink node")
+            elif section == "gen_constraints":
+                _check_factors(c, item, label)
+
+    for entry in data.get("node_states", []):
+        label = entry.get("nodeName")
+        c.ref("NODE STATE", label, "node", label, index.nodes)
+        c.fields("NODE STATE", label, entry.get("state") or {}, "NewState")
+
+    for g in data.get("node_groups", []):
+        for name in g.get("nodes") or []:
+            c.ref("NODE GROUP MEMBERS", g.get("name"), "node", name, index.nodes)
+    for g in data.get("process_groups", []):
+        for name in g.get("processes") or []:
+            c.ref("PROCESS GROUP MEMBERS", g.get("name"), "process", name, index.processes)
+
+    for h in data.get("node_histories", []):
+        label = h.get("nodeName")
+        c.ref("NODE HISTORY", label, "node", label, index.nodes)
+        for i, step in enumerate(h.get("steps", [])):
+            c.fields("NODE HISTORY STEPS", f"{label} step {i}", step, "NewSeries")
+            c.ref("NODE HISTORY STEPS", f"{label} step {i}", "scenario", step.get("scenario"), index.scenarios,
+                  optional=True)
+
+    for i, sc in enumerate(data.get("scenarios", [])):
+        weight = sc.get("weight", 1.0)
+        if not isinstance(weight, (int, float)) or weight < 0:
+            c.add("SCENARIOS", sc.get("name", f"#{i}"), f"weight {weight!r} is not a non-negative number")
+    return c.problems
+
+
+def _check_factors(c: _Checker, gc: Dict[str, Any], cname):
+    index = c.index
+    title = "CONSTRAINT FACTORS"
+    for ff in gc.get("flow_factors", []):
+        label = f"{cname} {ff.get('processName')}->{ff.get('sourceOrSinkNodeName')}"
+        c.ref(title, label, "process", ff.get("processName"), index.processes)
+        c.ref(title, label, "node", ff.get("sourceOrSinkNodeName"), index.nodes)
+        p, n = ff.get("processName"), ff.get("sourceOrSinkNodeName")
+        if p in index.processes and n in index.nodes and (p, n, None) not in index.topologies \
+                and (p, None, n) not in index.topologies:
+            c.add(title, label, f"process {p!r} has no topology to or from node {n!r}")
+        c.values(title, label, "factor", ff.get("factor"))
+    for sf in gc.get("state_factors", []):
+        label = f"{cname} node={sf.get('nodeName')}"
+        c.ref(title, label, "node", sf.get("nodeName"), index.nodes)
+        c.values(title, label, "factor", sf.get("factor"))
+    for of in gc.get("online_factors", []):
+        label = f"{cname} process={of.get('processName')}"
+        c.ref(title, label, "process", of.get("processName"), index.processes)
+        c.values(title, label, "factor", of.get("factor"))
+
+
+def check_model(data, schema_path: Optional[str] = None) -> None:
+    """Raise PreflightError if `data` has any problem."""
+    problems = validate_model(data, schema_path)
+    if problems:
+        raise PreflightError(problems)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "model_data.json"
+    from series_refs import load_model
+
+    model = load_model(path)
+    found = validate_model(model)
+    for problem in found:
+        print(problem)
+    print(f"{len(found)} problem(s) in {path}")
+    sys.exit(1 if found else 0)
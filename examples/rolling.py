@@ -0,0 +1,247 @@
+"""
+Rolling-horizon driver: re-optimise a resident model with the horizon moved.
+
+The base model holds series for the whole period (longer than the horizon)
+and a timeline with a customStartTime. Cycle k optimises the window of
+`horizon` steps starting `k * shift` steps in: every ValueInput series is
+cut to that window, the timeline start moves with it, and the initial state
+of every storage node is carried over from the previous cycle's outcome.
+
+Only the first cycle syncs the whole model (model_sync). After that each
+cycle is diffed against the previous cycle's model locally, with no read
+of the server, and only the difference goes out:
+
+  * updateTimeLine for the moved start,
+  * updateNodeState with just the new initialState of each storage node,
+  * entities whose series window changed; the schema has no series
+    updates, so those are deleted and re-created (with whatever depends on
+    them, as in model_sync). Constants and forecast-linked values don't
+    change between windows and are never re-sent.
+
+If a mutation fails the cycle is aborted before its optimization, and the
+next cycle syncs against a fresh read of the server instead of the diff.
+
+A node's next initial state is estimated from the outcome by a balance over
+the first `shift` steps: flows into the node minus flows out of it plus its
+inflow, scenario-weighted, each step scaled by the step length, divided by
+tEConversion and reduced by stateLossProportional, clipped to
+[stateMin, stateMax].
+
+    python rolling.py --model model_year.json --horizon 24 --shift 1 --cycles 48
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from analysis import frame_from_arrays
+from batching import BatchExecutor, DEFAULT_BATCH_SIZE
+from connection import DEFAULT_URL, SCHEMA_PATH, make_client
+from jobs import fetch_outcome, print_status, start_job, wait_for_job
+from minimise import is_value_list
+from model_sync import desired_entities, ops_vars, plan_sync, sync_model
+from outcome_store import save_outcome, to_epoch
+from preflight import check_model
+from series_refs import load_model
+
+
+def _seconds(duration: Dict[str, int]) -> int:
+    return duration.get("hours", 0) * 3600 + duration.get("minutes", 0) * 60 + duration.get("seconds", 0)
+
+
+def _duration(seconds: int) -> Dict[str, int]:
+    return {"hours": seconds // 3600, "minutes": seconds % 3600 // 60, "seconds": seconds % 60}
+
+
+def _windowed(x, lo: int, hi: int):
+    if is_value_list(x):
+        out = []
+        for v in x:
+            if v.get("series") is not None:
+                if len(v["series"]) < hi:
+                    raise ValueError(f"A series has {len(v['series'])} values, the window needs {hi}")
+                v = dict(v, series=v["series"][lo:hi])
+            out.append(v)
+        return out
+    if isinstance(x, dict):
+        return {k: _windowed(v, lo, hi) for k, v in x.items()}
+    if isinstance(x, list) and x and isinstance(x[0], (dict, list)):
+        return [_windowed(v, lo, hi) for v in x]
+    return x
+
+
+def window_model(base: Dict[str, Any], offset: int, horizon: int) -> Dict[str, Any]:
+    """`base` cut to `horizon` steps starting `offset` steps after its start."""
+    timeline = base["timeline"]
+    start = (timeline.get("start") or {}).get("customStartTime")
+    if not start:
+        raise ValueError("A rolling horizon needs a timeline with start.customStartTime")
+    step = _seconds(timeline["step"])
+    t0 = datetime.fromisoformat(start.replace("Z", "+00:00")) + timedelta(seconds=offset * step)
+    window = {k: v for k, v in base.items() if k not in ("timeline", "node_histories")}
+    window = _windowed(window, offset, offset + horizon)
+    window["timeline"] = dict(timeline, duration=_duration((horizon - 1) * step), start={
+        "customStartTime": t0.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")})
+    window["node_histories"] = base.get("node_histories", [])
+    return window
+
+
+def _expected_value(values: List[Dict[str, Any]], weights: Dict[str, float], steps: int) -> np.ndarray:
+    """Scenario-weighted mean of a value list over its first `steps` steps."""
+    if not values:
+        return np.zeros(steps)
+    rows, w = [], []
+    for v in values:
+        if v.get("series") is not None:
+            rows.append(np.asarray(v["series"][:steps], dtype=np.float64))
+        elif v.get("constant") is not None:
+            rows.append(np.full(steps, float(v["constant"])))
+        else:
+            continue    # forecast-linked: not known locally
+        w.append(weights.get(v.get("scenario"), 1.0) if v.get("scenario") else 1.0)
+    if not rows:
+        return np.zeros(steps)
+    w = np.asarray(w) / sum(w)
+    return w @ np.vstack(rows)
+
+
+def next_states(window: Dict[str, Any], outcome: Dict[str, Any], shift: int) -> Dict[str, float]:
+    """Estimated initialState of every storage node `shift` steps into the optimised window."""
+    signals = outcome.get("controlSignals", [])
+    time = np.array([to_epoch(t) for t in outcome.get("time", [])])
+    values = np.array([cs["signal"] for cs in signals], dtype=np.float64).reshape(len(signals), len(time))
+    frame = frame_from_arrays(values, time, [cs["name"] for cs in signals], window)
+    flows, expected = frame.expected()
+    hours = frame.step_hours()[:shift]
+    weights = {s["name"]: s["weight"] for s in window.get("scenarios", [])}
+    inflows = {n["name"]: n.get("inflow", []) for n in window.get("nodes", [])}
+
+    states = {}
+    for entry in window.get("node_states", []):
+        node, st = entry["nodeName"], entry["state"]
+        net = np.zeros(shift)
+        for (process, source, sink), row in zip(flows, expected):
+            if sink == node:
+                net += row[:shift]
+            if source == node:
+                net -= row[:shift]
+        net += _expected_value(inflows.get(node, []), weights, shift)
+        conversion = st.get("tEConversion") or 1.0
+        keep = 1.0 - (st.get("stateLossProportional") or 0.0)
+        level = float(st["initialState"])
+        for dv in net * hours / conversion:
+            level = level * keep + float(dv)
+        states[node] = min(max(level, st.get("stateMin", level)), st.get("stateMax", level))
+    return states
+
+
+def with_states(window: Dict[str, Any], states: Dict[str, float]) -> Dict[str, Any]:
+    out = dict(window)
+    out["node_states"] = [dict(e, state=dict(e["state"], initialState=states[e["nodeName"]]))
+                          if e["nodeName"] in states else e for e in window.get("node_states", [])]
+    return out
+
+
+class RollingHorizon:
+    """Keeps one model resident on the server and moves its horizon cycle by cycle."""
+
+    def __init__(self, client, executor, base: Dict[str, Any], horizon: int, shift: int = 1,
+                 job_timeout: Optional[float] = 300.0):
+        if horizon < 1 or shift < 1:
+            raise ValueError("horizon and shift must be >= 1")
+        self.client = client
+        self.executor = executor
+        self.base = base
+        self.horizon = horizon
+        self.shift = shift
+        self.job_timeout = job_timeout
+        self.cycle = 0
+        self.window: Optional[Dict[str, Any]] = None
+        self.outcome: Optional[Dict[str, Any]] = None
+        self._sent = None       # the previous cycle's model in model_sync.current_entities shape
+
+    def _load(self, window: Dict[str, Any]) -> int:
+        """
+        Bring the server to `window`; returns the mutations sent. If any failed, the server's
+        model is unknown: the next load re-reads it (sync_model) and RuntimeError is raised.
+        """
+        check_model(window)
+        desired = desired_entities(window)
+        if self._sent is None:
+            report = sync_model(self.client, self.executor, window)
+            failed = [r for results in report.values() for r in results if not r.ok]
+            sent = sum(len(results) for results in report.values())
+        else:
+            plan = plan_sync(window, self._sent)
+            for w in plan.warnings:
+                print("WARNING:", w)
+            failed = []
+            for section, ops in plan.deletes + plan.creates:
+                results = self.executor.execute(ops)
+                for r in results:
+                    if not r.ok:
+                        print(f"{section} {r.field} {r.label}: " + "; ".join(r.errors))
+                        failed.append(r)
+            sent = plan.op_count
+        if failed:
+            self._sent = None
+            raise RuntimeError(f"Cycle {self.cycle}: {len(failed)} of {sent} mutations failed; not optimising")
+        self._sent = {section: {key: ops_vars(ops) for key, ops in entities.items()}
+                      for section, entities in desired.items()}
+        return sent
+
+    def step(self) -> Dict[str, Any]:
+        """Load the next window, optimise it and return the payload {"jobId", "state", "outcome" | "message"}."""
+        window = window_model(self.base, self.cycle * self.shift, self.horizon)
+        if self.outcome is not None:
+            window = with_states(window, next_states(self.window, self.outcome, self.shift))
+        elif self.window is not None:
+            # the last job failed: keep the initial states it was given
+            window = with_states(window, {e["nodeName"]: e["state"]["initialState"]
+                                          for e in self.window.get("node_states", [])})
+        sent = self._load(window)
+        job_id = start_job(self.client, "optimization")
+        job = wait_for_job(self.client, job_id, deadline=self.job_timeout, on_status=print_status)
+        print(f"Cycle {self.cycle}: start {window['timeline']['start']['customStartTime']}, "
+              f"{sent} mutations, job {job_id} {job.state} after {job.elapsed:.2f}s")
+        payload = {"jobId": job_id, "state": job.state}
+        if job.finished:
+            payload["outcome"] = self.outcome = fetch_outcome(self.client, job_id)
+        else:
+            payload["message"] = job.message
+            self.outcome = None
+        self.window = window
+        self.cycle += 1
+        return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-optimise a resident model on a moving horizon.")
+    parser.add_argument("--model", default="model_data.json", help="model whose series cover the whole period")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--schema", default=SCHEMA_PATH,
+                        help="local SDL file; pass '' to use the introspection cache instead")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--horizon", type=int, required=True, help="steps per optimisation")
+    parser.add_argument("--shift", type=int, default=1, help="steps the horizon moves per cycle")
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--job-timeout", type=float, default=300.0)
+    parser.add_argument("--outcome-format", choices=("binary", "json"), default="binary")
+    args = parser.parse_args()
+
+    base = load_model(args.model)
+    client = make_client(args.url, schema_path=args.schema or None)
+    driver = RollingHorizon(client, BatchExecutor(client, batch_size=args.batch_size), base,
+                            args.horizon, args.shift, args.job_timeout)
+    for _ in range(args.cycles):
+        cycle = driver.cycle
+        try:
+            payload = driver.step()
+        except RuntimeError as e:
+            raise SystemExit(str(e))
+        print("Wrote", save_outcome(f"rolling_outcome_{cycle}", payload, args.outcome_format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Series stored outside the model file.
+
+Any value entry in model_data.json may name its series by reference instead
+of listing it inline:
+
+    {"scenario": "s1", "seriesRef": "inflow_h2.npy"}
+    {"scenario": "s1", "seriesRef": "series_8760", "column": "h2_inflow_s1"}
+
+The first is a one-dimensional .npy file (needs numpy), the second a column
+of a columnar file in the format of outcome_store.py (<base>.idx.json +
+<base>.f64). Relative paths are taken from the model file's directory.
+
+load_model parses the model with an object hook that turns every such entry
+into {"scenario": ..., "series": SeriesRef(...)}. Nothing is opened then.
+The file is memory-mapped when the entity's op is built during the upload
+(utilities.float_series), and the series is handed on as a float64 view of
+the mapping, never as a list of Python floats. len(), indexing and slicing
+work on a SeriesRef, so preflight.py, minimise.py and rolling.py take it
+like an inline series.
+
+    data = load_model("model_year.json")             # stream=True for a StreamedModel
+    python series_refs.py extract model_year.json --out model_year_refs.json
+"""
+import argparse
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from outcome_store import FORMAT, INDEX_SUFFIX, OutcomeReader, le_doubles
+
+try:
+    import numpy as np
+except ImportError:  # .npy references need numpy; columnar ones don't
+    np = None
+
+REF_KEYS = ("seriesRef", "column")
+
+_readers: Dict[str, OutcomeReader] = {}     # one mapping per columnar file, shared by its columns
+
+
+class SeriesRef:
+    """A series in an external file, memory-mapped on first use."""
+
+    __slots__ = ("path", "column", "_view")
+
+    def __init__(self, path: str, column: Optional[str] = None):
+        self.path = path
+        self.column = column
+        self._view = None
+
+    def mapped(self):
+        """The series as a float64 view of the mapped file (a numpy array, or a memoryview without numpy)."""
+        if self._view is None:
+            if self.column is not None:
+                reader = _readers.get(self.path)
+                if reader is None:
+                    reader = _readers[self.path] = OutcomeReader(self.path)
+                view = reader.column(self.column)
+                self._view = np.frombuffer(view, dtype=np.float64) if np is not None else view
+            else:
+                if np is None:
+                    raise RuntimeError(f"numpy is needed to read {self.path}")
+                view = np.load(self.path, mmap_mode="r")
+                if view.ndim != 1:
+                    raise ValueError(f"{self.path} holds a {view.ndim}-d array; a series must be 1-d")
+                self._view = view if view.dtype == np.float64 else view.astype(np.float64)
+        return self._view
+
+    def __len__(self) -> int:
+        return len(self.mapped())
+
+    def __getitem__(self, index):
+        return self.mapped()[index]
+
+    def __iter__(self):
+        return iter(self.mapped())
+
+    def __repr__(self) -> str:
+        return f"SeriesRef({self.path!r}" + (f", column={self.column!r})" if self.column else ")")
+
+
+def series_ref_hook(base_dir: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """json object_hook resolving seriesRef entries against `base_dir`."""
+    def hook(d: Dict[str, Any]) -> Dict[str, Any]:
+        if "seriesRef" not in d:
+            return d
+        if d.get("series") is not None:
+            raise ValueError(f"A value has both series and seriesRef {d['seriesRef']!r}")
+        out = {k: v for k, v in d.items() if k not in REF_KEYS}
+        out["series"] = SeriesRef(os.path.join(base_dir, d["seriesRef"]), d.get("column"))
+        return out
+    return hook
+
+
+def load_model(path: str, stream: bool = False):
+    """json.load of a model file with its seriesRef entries turned into SeriesRefs (a StreamedModel if `stream`)."""
+    hook = series_ref_hook(os.path.dirname(os.path.abspath(path)))
+    if stream:
+        from model_stream import StreamedModel
+        return StreamedModel(path, object_hook=hook)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f, object_hook=hook)
+
+
+def close_all() -> None:
+    """Drop the shared columnar mappings (SeriesRefs already mapped keep theirs)."""
+    for reader in _readers.values():
+        reader.close()
+    _readers.clear()
+
+
+# ---------- WRITING ----------
+def write_series_file(base: str, columns: Dict[str, Any]) -> str:
+    """Write equal-length series as a columnar file <base>.f64 + <base>.idx.json; returns the index path."""
+    lengths = {len(v) for v in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columns of one series file must have one length, got {sorted(lengths)}")
+    data_path = base + ".f64"
+    with open(data_path, "wb") as f:
+        for values in columns.values():
+            le_doubles(values).tofile(f)
+    index = {"format": FORMAT, "jobId": None, "state": None, "message": None, "typename": None,
+             "length": lengths.pop() if lengths else 0, "dtype": "<f8", "columns": list(columns),
+             "data": os.path.basename(data_path)}
+    index_path = base + INDEX_SUFFIX
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    return index_path
+
+
+def extract_series(data: Any, min_length: int = 2) -> Dict[int, Dict[str, List[float]]]:
+    """
+    Move every inline series of at least `min_length` values out of `data` (in place). Each entry
+    gets {"seriesRef": "series_<length>", "column": <name>}; returns length -> column name -> values.
+    """
+    files: Dict[int, Dict[str, List[float]]] = {}
+
+    def visit(x, path):
+        if isinstance(x, list):
+            for v in x:
+                visit(v, path)
+            return
+        if not isinstance(x, dict):
+            return
+        series = x.get("series")
+        if isinstance(series, list) and len(series) >= min_length:
+            columns = files.setdefault(len(series), {})
+            name = base = "/".join(path + [x.get("scenario") or "-"])
+            n = 1
+            while name in columns:
+                n += 1
+                name = f"{base}#{n}"
+            columns[name] = series
+            del x["series"]
+            x.update(seriesRef=f"series_{len(series)}", column=name)
+        here = path + [x["name"]] if isinstance(x.get("name"), str) else path
+        for k, v in x.items():
+            if isinstance(v, (dict, list)):
+                visit(v, here + [k])
+
+    visit(data, [])
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move the inline series of a model file to columnar files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("extract", help="write series_<length>.f64 files and a model referencing them")
+    p.add_argument("model")
+    p.add_argument("--out", required=True, help="model file to write; the series files go next to it")
+    p.add_argument("--min-length", type=int, default=2, help="leave shorter series inline")
+    args = parser.parse_args()
+
+    with open(args.model, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    files = extract_series(data, args.min_length)
+    out_dir = os.path.dirname(os.path.abspath(args.out))
+    for length, columns in files.items():
+        print("Wrote", write_series_file(os.path.join(out_dir, f"series_{length}"), columns),
+              f"({len(columns)} series x {length})")
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    print("Wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Scenario sharding: one stochastic model solved as several smaller jobs.
+
+The model's scenarios are dealt round-robin into one shard per endpoint.
+Every shard is a copy of the model in which each list entry naming a
+scenario (ValueInput / ForecastValueInput lists, node history steps) is
+kept only if it belongs to the shard, and the scenario weights are scaled
+to sum to 1 again. Scenario-less entries apply to every shard unchanged.
+Each shard is synced to its own endpoint and optimised there, all shards in
+parallel, and the controlSignals of the shards (named ..._s1, ..._s2, ...)
+are merged into one outcome on the shared time axis. The merged outcome
+carries the first shard's jobId; the JSON format also lists every shard's
+endpoint, jobId and scenarios under "shards". A model without scenarios is
+not split and runs whole on the first endpoint.
+
+This is only valid when the scenarios don't interact: the split is refused
+for a setup with commonTimesteps > 0, and a CVaR risk weight (beta) makes
+the merged result differ from solving the full model.
+
+    python shard.py --model model_data.json --endpoints http://localhost:3030/graphql \\
+        http://localhost:3031/graphql http://localhost:3032/graphql
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from batching import BatchExecutor, DEFAULT_BATCH_SIZE
+from connection import DEFAULT_URL, SCHEMA_PATH, make_client
+from jobs import JobResult, fetch_outcome, print_status, start_job, wait_for_job
+from model_sync import sync_model
+from outcome_store import save_outcome
+from preflight import check_model
+from series_refs import load_model
+
+
+class ShardRun(NamedTuple):
+    endpoint: str
+    scenarios: List[str]
+    job: JobResult
+    outcome: Optional[Dict[str, Any]]
+
+
+def split_scenarios(names: Sequence[str], shards: int) -> List[List[str]]:
+    """Scenario names dealt round-robin into at most `shards` non-empty groups."""
+    if shards < 1:
+        raise ValueError(f"shards must be >= 1, got {shards}")
+    return [list(names[i::shards]) for i in range(min(shards, len(names)))]
+
+
+def _only(x, keep):
+    if isinstance(x, dict):
+        return {k: _only(v, keep) for k, v in x.items()}
+    if isinstance(x, list):
+        return [_only(v, keep) for v in x
+                if not (isinstance(v, dict) and v.get("scenario") is not None and v["scenario"] not in keep)]
+    return x
+
+
+def shard_model(data: Dict[str, Any], scenarios: Sequence[str]) -> Dict[str, Any]:
+    """`data` restricted to `scenarios`; weights are rescaled to sum to 1."""
+    keep = set(scenarios)
+    kept = [s for s in data.get("scenarios", []) if s["name"] in keep]
+    total = sum(s["weight"] for s in kept)
+    shard = {k: _only(v, keep) for k, v in data.items() if k != "scenarios"}
+    shard["scenarios"] = [dict(s, weight=s["weight"] / total if total else s["weight"]) for s in kept]
+    common = shard.get("setup", {}).get("commonScenarioName")
+    if common and common not in keep:
+        # commonTimesteps is 0 (shard_models), so the common scenario is unused; the field is optional
+        shard["setup"] = {k: v for k, v in shard["setup"].items() if k != "commonScenarioName"}
+    return shard
+
+
+def shard_models(data: Dict[str, Any], shards: int) -> List[Dict[str, Any]]:
+    """One model per scenario group; a model without scenarios is returned whole, as a single shard."""
+    if data.get("setup", {}).get("commonTimesteps"):
+        raise ValueError("Scenarios share their first commonTimesteps steps and cannot be solved separately")
+    names = [s["name"] for s in data.get("scenarios", [])]
+    if not names:
+        return [data]
+    return [shard_model(data, group) for group in split_scenarios(names, shards)]
+
+
+def merge_outcomes(outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One OptimizationOutcome holding the controlSignals of all shards on their common time axis."""
+    time_axis = outcomes[0].get("time", [])
+    signals: Dict[str, Any] = {}
+    for outcome in outcomes:
+        if outcome.get("__typename") != "OptimizationOutcome":
+            raise ValueError(f"Cannot merge a {outcome.get('__typename')} outcome")
+        if outcome.get("time", []) != time_axis:
+            raise ValueError("Shard outcomes have different time axes")
+        for cs in outcome.get("controlSignals", []):
+            # scenario-independent signals come back from every shard; keep the first
+            signals.setdefault(cs["name"], cs["signal"])
+    return {"__typename": "OptimizationOutcome", "time": time_axis,
+            "controlSignals": [{"name": name, "signal": signal} for name, signal in signals.items()]}
+
+
+def _run_shard(url: str, model: Dict[str, Any], schema_path: Optional[str], batch_size: int,
+               job_timeout: float) -> ShardRun:
+    client = make_client(url, schema_path=schema_path)
+    sync_model(client, BatchExecutor(client, batch_size=batch_size), model)
+    job_id = start_job(client, "optimization")
+    scenarios = [s["name"] for s in model.get("scenarios", [])]
+    print(f"Optimization job {job_id} started on {url} for {', '.join(scenarios) or 'the unsharded model'}")
+    job = wait_for_job(client, job_id, deadline=job_timeout, on_status=print_status)
+    return ShardRun(url, scenarios, job, fetch_outcome(client, job_id) if job.finished else None)
+
+
+def run_sharded(data: Dict[str, Any], endpoints: List[str], schema_path: Optional[str] = SCHEMA_PATH,
+                batch_size: int = DEFAULT_BATCH_SIZE, job_timeout: float = 300.0) -> List[ShardRun]:
+    """Split `data` by scenario over `endpoints`, optimise the shards in parallel."""
+    risks = {r["parameter"]: r["value"] for r in data.get("risk", [])}
+    if risks.get("beta"):
+        print("WARNING: CVaR (beta > 0) couples the scenarios; the sharded result is an approximation")
+    shards = shard_models(data, len(endpoints))
+    if len(shards) < len(endpoints):
+        print(f"{len(shards)} shard(s) for {len(endpoints)} endpoints; {', '.join(endpoints[len(shards):])} unused")
+    for shard in shards:
+        check_model(shard)
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [pool.submit(_run_shard, url, shard, schema_path, batch_size, job_timeout)
+                   for url, shard in zip(endpoints, shards)]
+        return [f.result() for f in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimise one model split by scenario over several servers.")
+    parser.add_argument("--model", default="model_data.json")
+    parser.add_argument("--endpoints", nargs="+", default=[DEFAULT_URL], help="GraphQL URLs, one shard each")
+    parser.add_argument("--schema", default=SCHEMA_PATH,
+                        help="local SDL file; pass '' to use the introspection cache instead")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--job-timeout", type=float, default=300.0)
+    parser.add_argument("--outcome-format", choices=("binary", "json"), default="binary")
+    parser.add_argument("--out", default="sharded_outcome", help="output base name")
+    args = parser.parse_args()
+
+    data = load_model(args.model)
+    runs = run_sharded(data, args.endpoints, schema_path=args.schema or None, batch_size=args.batch_size,
+                       job_timeout=args.job_timeout)
+    for r in runs:
+        print(f"{r.endpoint} [{', '.join(r.scenarios)}]: job {r.job.job_id} {r.job.state} after {r.job.elapsed:.2f}s")
+
+    # jobId is an int like every other outcome's; the shards' own jobs are listed under "shards"
+    payload = {"jobId": runs[0].job.job_id,
+               "shards": [{"endpoint": r.endpoint, "jobId": r.job.job_id, "scenarios": r.scenarios} for r in runs]}
+    unfinished = [r for r in runs if r.outcome is None]
+    if unfinished:
+        payload.update(state=unfinished[0].job.state,
+                       message="; ".join(f"{r.endpoint}: {r.job.state} {r.job.message or ''}".strip()
+                                         for r in unfinished))
+    else:
+        payload.update(state="FINISHED", outcome=merge_outcomes([r.outcome for r in runs]))
+    path = save_outcome(args.out, payload, args.outcome_format)
+    print("Wrote merged outcome to", path)
+
+
+if __name__ == "__main__":
+    main()
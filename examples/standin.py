@@ -0,0 +1,626 @@
+"""
+A local stand-in for the optimisation server's GraphQL API.
+
+The schema is built from schema.graphql and served by graphql-core with stub
+resolvers that keep the model in memory: create / add / set / update
+mutations store their inputs (rejecting duplicates and unknown references
+the way the server does, as ValidationErrors or MaybeError messages), delete
+mutations remove entities and what depends on them, `model` and the other
+queries read the stored model back, and jobs finish after `job_seconds` with
+an outcome of zero control signals shaped like the real one. Latency can be
+injected per request and per root field, so benchmarks can model a slow
+server without one.
+
+    standin = StandIn(latency=0.002)
+    server, url = serve(standin)          # background thread, free port
+    client = make_client(url)
+    ...
+    server.shutdown()
+
+    python standin.py --port 3030 --latency 0.005
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from graphql import ExecutionResult, GraphQLError, build_schema, execute, parse, validate
+
+from connection import SCHEMA_PATH
+
+
+def _ok():
+    return {"errors": []}
+
+
+def _invalid(field: str, message: str):
+    return {"errors": [{"field": field, "message": message}]}
+
+
+def _maybe(message: Optional[str] = None):
+    return {"message": message}
+
+
+def _value(v: Dict[str, Any]) -> Dict[str, Any]:
+    if v.get("series") is not None:
+        value = {"__typename": "FloatList", "values": v["series"]}
+    else:
+        value = {"__typename": "Constant", "value": v.get("constant") or 0.0}
+    return {"scenario": v.get("scenario"), "value": value}
+
+
+def _forecast_value(v: Dict[str, Any]) -> Dict[str, Any]:
+    if v.get("forecast") is not None:
+        return {"scenario": v.get("scenario"),
+                "value": {"__typename": "Forecast", "name": v["forecast"], "fType": v.get("fType") or ""}}
+    return _value(v)
+
+
+def _seconds(d: Optional[Dict[str, int]]) -> int:
+    d = d or {}
+    return d.get("hours", 0) * 3600 + d.get("minutes", 0) * 60 + d.get("seconds", 0)
+
+
+class ModelStore:
+    """The stand-in's in-memory model, keyed the way the server keys it."""
+
+    def __init__(self):
+        self.settings: Dict[str, Any] = {"location": None}
+        self.timeline: Dict[str, Any] = {
+            "duration": {"hours": 23, "minutes": 0, "seconds": 0},
+            "step": {"hours": 1, "minutes": 0, "seconds": 0},
+            "start": {"clockChoice": "CURRENT_HOUR"},
+        }
+        self.setup: Dict[str, Any] = {}
+        self.scenarios: Dict[str, float] = {}
+        self.nodes: Dict[str, Dict] = {}
+        self.states: Dict[str, Dict] = {}
+        self.processes: Dict[str, Dict] = {}
+        self.node_groups: Dict[str, List[str]] = {}
+        self.process_groups: Dict[str, List[str]] = {}
+        self.markets: Dict[str, Dict] = {}
+        self.risks: Dict[str, float] = {}
+        self.reserve_types: Dict[str, float] = {}
+        self.diffusions: Dict[Tuple[str, str], Dict] = {}
+        self.delays: Dict[Tuple[str, str], Dict] = {}
+        self.histories: Dict[str, List[Dict]] = {}
+        self.inflow_blocks: Dict[str, Dict] = {}
+        self.topologies: Dict[Tuple[str, Optional[str], Optional[str]], Dict] = {}
+        self.gen_constraints: Dict[str, Dict] = {}
+        self.factors: Dict[str, Dict[Tuple, Dict]] = {}    # constraint -> (type, process/node, node) -> data
+
+    def time_axis(self) -> List[str]:
+        start = self.timeline.get("start") or {}
+        if start.get("customStartTime"):
+            t0 = datetime.fromisoformat(start["customStartTime"].replace("Z", "+00:00"))
+        else:
+            t0 = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        step = _seconds(self.timeline.get("step")) or 3600
+        steps = _seconds(self.timeline.get("duration")) // step + 1
+        return [(t0 + timedelta(seconds=i * step)).strftime("%Y-%m-%dT%H:%M:%SZ") for i in range(steps)]
+
+    # ---------- read-back in the shape of the output types ----------
+    def model(self) -> Dict[str, Any]:
+        scenarios = {n: {"name": n, "weight": w} for n, w in self.scenarios.items()}
+        nodes = {n: {"__typename": "Node", "name": n, "groups": [], "isCommodity": v["isCommodity"],
+                     "isMarket": v["isMarket"], "isRes": v["isRes"], "state": self.states.get(n),
+                     "cost": [_value(x) for x in v.get("cost", [])],
+                     "inflow": [_forecast_value(x) for x in v.get("inflow", [])]}
+                 for n, v in self.nodes.items()}
+        processes = {n: dict(v, __typename="Process", groups=[], isCf=bool(v.get("cf")), topos=[],
+                             cf=[_value(x) for x in v.get("cf", [])],
+                             effTs=[_value(x) for x in v.get("effTs", [])])
+                     for n, v in self.processes.items()}
+
+        def node(name):
+            return nodes.get(name) or {"__typename": "Node", "name": name, "groups": [], "isCommodity": False,
+                                       "isMarket": False, "isRes": False, "state": None, "cost": [], "inflow": []}
+
+        node_groups = {g: {"name": g, "members": [node(m) for m in ms]} for g, ms in self.node_groups.items()}
+        process_groups = {g: {"name": g, "members": [processes[m] for m in ms if m in processes]}
+                          for g, ms in self.process_groups.items()}
+        for g in node_groups.values():
+            for m in g["members"]:
+                m["groups"].append(g)
+        for g in process_groups.values():
+            for m in g["members"]:
+                m["groups"].append(g)
+        for (p, src, sink) in self.topologies:
+            if p in processes:
+                processes[p]["topos"].append({"source": node(src) if src else processes[p],
+                                              "sink": node(sink) if sink else processes[p]})
+
+        reserve_types = {n: {"name": n, "rampRate": r} for n, r in self.reserve_types.items()}
+        markets = [dict(m, node=node(m["node"]),
+                        processGroup=process_groups.get(m["processGroup"], {"name": m["processGroup"], "members": []}),
+                        reserveType=reserve_types.get(m.get("reserveType")),
+                        direction=m.get("direction"), fixed=[],
+                        realisation=[_value(x) for x in m.get("realisation", [])],
+                        price=[_forecast_value(x) for x in m.get("price", [])],
+                        upPrice=[_forecast_value(x) for x in m.get("upPrice", [])],
+                        downPrice=[_forecast_value(x) for x in m.get("downPrice", [])],
+                        reserveActivationPrice=[_value(x) for x in m.get("reserveActivationPrice", [])])
+                   for m in self.markets.values()]
+
+        def entity(name):
+            return processes.get(name) or node(name)
+
+        gen_constraints = []
+        for name, gc in self.gen_constraints.items():
+            factors = [{"varType": kind, "varTuple": {"entity": entity(a), "identifier": node(b) if b else None},
+                        "data": [_value(x) for x in data]}
+                       for (kind, a, b), data in self.factors.get(name, {}).items()]
+            gen_constraints.append(dict(gc, factors=factors, constant=[_value(x) for x in gc.get("constant", [])]))
+
+        s = self.setup
+        common = s.get("commonScenarioName")
+        setup = {
+            "reserveRealisation": s.get("useReserveRealisation", False),
+            "useMarketBids": s.get("useMarketBids", False),
+            "useReserves": s.get("useReserves", False),
+            "commonTimeSteps": s.get("commonTimesteps", 0),
+            "commonScenario": scenarios.get(common, {"name": common or "", "weight": 1.0}),
+            "useNodeDummyVariables": s.get("useNodeDummyVariables", False),
+            "useRampDummyVariables": s.get("useRampDummyVariables", False),
+            "nodeDummyVariableCost": s.get("nodeDummyVariableCost", 0.0),
+            "rampDummyVariableCost": s.get("rampDummyVariableCost", 0.0),
+        }
+        start = self.timeline.get("start") or {}
+        if start.get("customStartTime"):
+            start = {"__typename": "CustomStartTime", "startTime": start["customStartTime"]}
+        else:
+            start = {"__typename": "ClockChoice", "choice": start.get("clockChoice") or "CURRENT_HOUR"}
+        return {
+            "timeLine": {"duration": self.timeline["duration"], "step": self.timeline["step"], "start": start},
+            "inputData": {
+                "scenarios": list(scenarios.values()),
+                "setup": setup,
+                "processes": list(processes.values()),
+                "nodes": list(nodes.values()),
+                "nodeDiffusion": [{"fromNode": node(a), "toNode": node(b),
+                                   "coefficient": [_value(x) for x in d.get("coefficient", [])]}
+                                  for (a, b), d in self.diffusions.items()],
+                "nodeDelay": [dict(d, fromNode=node(a), toNode=node(b)) for (a, b), d in self.delays.items()],
+                "nodeHistories": [{"node": node(n), "steps": steps} for n, steps in self.histories.items()],
+                "markets": markets,
+                "nodeGroups": list(node_groups.values()),
+                "processGroups": list(process_groups.values()),
+                "reserveType": list(reserve_types.values()),
+                "risk": [{"parameter": p, "value": v} for p, v in self.risks.items()],
+                "inflowBlocks": [dict(b, node=node(b["node"]), data=[_value(x) for x in b.get("data", [])])
+                                 for b in self.inflow_blocks.values()],
+                "genConstraints": gen_constraints,
+            },
+        }
+
+    def control_signals(self) -> List[Dict[str, Any]]:
+        steps = len(self.time_axis())
+        scenarios = list(self.scenarios) or ["s1"]
+        return [{"name": f"{p}_{src or p}_{sink or p}_{s}", "signal": [0.0] * steps}
+                for (p, src, sink) in self.topologies for s in scenarios]
+
+
+class _Root:
+    """Root value for graphql-core: one method per Query / Mutation field used."""
+
+    def __init__(self, standin: "StandIn"):
+        self.standin = standin
+        self.store = standin.store
+
+    # ---------- settings, time line, setup ----------
+    def updateSettings(self, info, settingsInput):
+        self.store.settings.update(settingsInput)
+        return self.settings(info)
+
+    def settings(self, info):
+        return {"__typename": "Settings", "priceFetcherScript": "", "entsoeApiToken": None,
+                "location": self.store.settings.get("location")}
+
+    def updateTimeLine(self, info, timeLineInput):
+        self.store.timeline.update({k: v for k, v in timeLineInput.items() if v is not None})
+        return _ok()
+
+    def createInputDataSetup(self, info, setupUpdate):
+        self.store.setup.update({k: v for k, v in setupUpdate.items() if v is not None})
+        return _ok()
+
+    # ---------- entities ----------
+    def _create(self, table: Dict, key, value, field="name"):
+        if key in table:
+            return _invalid(field, f"{key} already exists")
+        table[key] = value
+        return _ok()
+
+    def createNode(self, info, node):
+        return self._create(self.store.nodes, node["name"], node)
+
+    def setNodeState(self, info, nodeName, state=None):
+        if nodeName not in self.store.nodes:
+            return _invalid("nodeName", f"no such node {nodeName}")
+        if state is None:
+            self.store.states.pop(nodeName, None)
+        else:
+            self.store.states[nodeName] = state
+        return _ok()
+
+    def updateNodeState(self, info, nodeName, state):
+        if nodeName not in self.store.states:
+            return _invalid("nodeName", f"node {nodeName} has no state")
+        self.store.states[nodeName].update({k: v for k, v in state.items() if v is not None})
+        return _ok()
+
+    def createProcess(self, info, process):
+        return self._create(self.store.processes, process["name"], process)
+
+    def createNodeGroup(self, info, name):
+        if name in self.store.node_groups or name in self.store.process_groups:
+            return _maybe(f"group {name} already exists")
+        self.store.node_groups[name] = []
+        return _maybe()
+
+    def createProcessGroup(self, info, name):
+        if name in self.store.node_groups or name in self.store.process_groups:
+            return _maybe(f"group {name} already exists")
+        self.store.process_groups[name] = []
+        return _maybe()
+
+    def addNodeToGroup(self, info, nodeName, groupName):
+        if nodeName not in self.store.nodes or groupName not in self.store.node_groups:
+            return _maybe(f"no such node {nodeName} or node group {groupName}")
+        self.store.node_groups[groupName].append(nodeName)
+        return _maybe()
+
+    def addProcessToGroup(self, info, processName, groupName):
+        if processName not in self.store.processes or groupName not in self.store.process_groups:
+            return _maybe(f"no such process {processName} or process group {groupName}")
+        self.store.process_groups[groupName].append(processName)
+        return _maybe()
+
+    def createScenario(self, info, name, weight):
+        if name in self.store.scenarios:
+            return _maybe(f"scenario {name} already exists")
+        self.store.scenarios[name] = weight
+        return _maybe()
+
+    def createMarket(self, info, market):
+        s = self.store
+        if market["node"] not in s.nodes and market["node"] not in s.node_groups:
+            return _invalid("node", f"no such node {market['node']}")
+        if market["processGroup"] not in s.process_groups:
+            return _invalid("processGroup", f"no such process group {market['processGroup']}")
+        return self._create(s.markets, market["name"], market)
+
+    def createRisk(self, info, risk):
+        return self._create(self.store.risks, risk["parameter"], risk["value"], "parameter")
+
+    def createNodeDiffusion(self, info, newDiffusion):
+        d = newDiffusion
+        return self._create(self.store.diffusions, (d["fromNode"], d["toNode"]), d, "fromNode")
+
+    def createNodeDelay(self, info, delay):
+        return self._create(self.store.delays, (delay["fromNode"], delay["toNode"]), delay, "fromNode")
+
+    def createNodeHistory(self, info, nodeName):
+        return self._create(self.store.histories, nodeName, [], "nodeName")
+
+    def addStepToNodeHistory(self, info, nodeName, step):
+        if nodeName not in self.store.histories:
+            return _invalid("nodeName", f"node {nodeName} has no history")
+        self.store.histories[nodeName].append(step)
+        return _ok()
+
+    def createReserveType(self, info, reserveType):
+        return self._create(self.store.reserve_types, reserveType["name"], reserveType["rampRate"])
+
+    def createInflowBlock(self, info, inflowBlock):
+        return self._create(self.store.inflow_blocks, inflowBlock["name"], inflowBlock)
+
+    def createTopology(self, info, topology, processName, sourceNodeName=None, sinkNodeName=None):
+        if processName not in self.store.processes:
+            return _invalid("processName", f"no such process {processName}")
+        for field, n in (("sourceNodeName", sourceNodeName), ("sinkNodeName", sinkNodeName)):
+            if n is not None and n not in self.store.nodes:
+                return _invalid(field, f"no such node {n}")
+        return self._create(self.store.topologies, (processName, sourceNodeName, sinkNodeName), topology,
+                            "processName")
+
+    def createGenConstraint(self, info, constraint):
+        self.store.factors.setdefault(constraint["name"], {})
+        return self._create(self.store.gen_constraints, constraint["name"], constraint)
+
+    def _factor(self, constraint, key, factor):
+        if constraint not in self.store.gen_constraints:
+            return _invalid("constraintName", f"no such constraint {constraint}")
+        return self._create(self.store.factors[constraint], key, factor, "constraintName")
+
+    def createFlowConFactor(self, info, factor, constraintName, processName, sourceOrSinkNodeName):
+        return self._factor(constraintName, ("FLOW", processName, sourceOrSinkNodeName), factor)
+
+    def createStateConFactor(self, info, factor, constraintName, nodeName):
+        return self._factor(constraintName, ("STATE", nodeName, None), factor)
+
+    def createOnlineConFactor(self, info, factor, constraintName, processName):
+        return self._factor(constraintName, ("ONLINE", processName, None), factor)
+
+    def connectNodeInflowToTemperatureForecast(self, info, **kwargs):
+        return _maybe()
+
+    def connectMarketPricesToForecast(self, info, **kwargs):
+        return _maybe()
+
+    # ---------- deletes ----------
+    def _delete(self, table: Dict, key, what: str):
+        if table.pop(key, None) is None:
+            return _maybe(f"no such {what} {key}")
+        return _maybe()
+
+    def deleteNode(self, info, name):
+        s = self.store
+        if name not in s.nodes:
+            return _maybe(f"no such node {name}")
+        del s.nodes[name]
+        s.states.pop(name, None)
+        s.histories.pop(name, None)
+        for members in s.node_groups.values():
+            if name in members:
+                members.remove(name)
+        for table in (s.diffusions, s.delays):
+            for key in [k for k in table if name in k]:
+                del table[key]
+        for key in [k for k in s.topologies if name in k[1:]]:
+            del s.topologies[key]
+        for key in [k for k, m in s.markets.items() if m["node"] == name]:
+            del s.markets[key]
+        for key in [k for k, b in s.inflow_blocks.items() if b["node"] == name]:
+            del s.inflow_blocks[key]
+        for factors in s.factors.values():
+            for key in [k for k in factors if name in k[1:]]:
+                del factors[key]
+        return _maybe()
+
+    def deleteProcess(self, info, name):
+        s = self.store
+        if name not in s.processes:
+            return _maybe(f"no such process {name}")
+        del s.processes[name]
+        for members in s.process_groups.values():
+            if name in members:
+                members.remove(name)
+        for key in [k for k in s.topologies if k[0] == name]:
+            del s.topologies[key]
+        for factors in s.factors.values():
+            for key in [k for k in factors if k[1] == name]:
+                del factors[key]
+        return _maybe()
+
+    def deleteGroup(self, info, name):
+        s = self.store
+        if s.node_groups.pop(name, None) is None and s.process_groups.pop(name, None) is None:
+            return _maybe(f"no such group {name}")
+        for key in [k for k, m in s.markets.items() if name in (m["node"], m["processGroup"])]:
+            del s.markets[key]
+        return _maybe()
+
+    def deleteScenario(self, info, name):
+        return self._delete(self.store.scenarios, name, "scenario")
+
+    def deleteMarket(self, info, name):
+        return self._delete(self.store.markets, name, "market")
+
+    def deleteRisk(self, info, parameter):
+        return self._delete(self.store.risks, parameter, "risk")
+
+    def deleteNodeDiffusion(self, info, fromNode, toNode):
+        return self._delete(self.store.diffusions, (fromNode, toNode), "node diffusion")
+
+    def deleteNodeDelay(self, info, fromNode, toNode):
+        return self._delete(self.store.delays, (fromNode, toNode), "node delay")
+
+    def deleteNodeHistory(self, info, nodeName):
+        return self._delete(self.store.histories, nodeName, "node history")
+
+    def clearNodeHistorySteps(self, info, nodeName):
+        if nodeName not in self.store.histories:
+            return _maybe(f"no such node history {nodeName}")
+        self.store.histories[nodeName] = []
+        return _maybe()
+
+    def deleteTopology(self, info, processName, sourceNodeName=None, sinkNodeName=None):
+        return self._delete(self.store.topologies, (processName, sourceNodeName, sinkNodeName), "topology")
+
+    def deleteGenConstraint(self, info, name):
+        self.store.factors.pop(name, None)
+        return self._delete(self.store.gen_constraints, name, "constraint")
+
+    def deleteFlowConFactor(self, info, constraintName, processName, sourceOrSinkNodeName):
+        return self._delete(self.store.factors.get(constraintName, {}),
+                            ("FLOW", processName, sourceOrSinkNodeName), "flow factor")
+
+    def deleteStateConFactor(self, info, constraintName, nodeName):
+        return self._delete(self.store.factors.get(constraintName, {}), ("STATE", nodeName, None), "state factor")
+
+    def deleteOnlineConFactor(self, info, constraintName, processName):
+        return self._delete(self.store.factors.get(constraintName, {}), ("ONLINE", processName, None),
+                            "online factor")
+
+    def saveModel(self, info):
+        return _maybe()
+
+    def clearInputData(self, info):
+        timeline, settings = self.store.timeline, self.store.settings
+        self.standin.store = self.store = ModelStore()
+        self.store.timeline, self.store.settings = timeline, settings
+        return _maybe()
+
+    # ---------- jobs ----------
+    def _start(self, kind):
+        return self.standin.start_job(kind)
+
+    def startOptimization(self, info):
+        return self._start("optimization")
+
+    def startElectricityPriceFetch(self, info):
+        return self._start("electricity_price")
+
+    def startWeatherForecastFetch(self, info):
+        return self._start("weather_forecast")
+
+    def jobStatus(self, info, jobId):
+        return {"state": self.standin.job_state(jobId), "message": None}
+
+    def jobOutcome(self, info, jobId):
+        kind, _, time_axis, signals = self.standin.jobs[jobId]
+        if kind == "optimization":
+            return {"__typename": "OptimizationOutcome", "time": time_axis, "controlSignals": signals}
+        field, typename = (("price", "ElectricityPriceOutcome") if kind == "electricity_price"
+                           else ("temperature", "WeatherForecastOutcome"))
+        return {"__typename": typename, "time": time_axis, field: [0.0] * len(time_axis)}
+
+    # ---------- queries ----------
+    def model(self, info):
+        return self.store.model()
+
+    def _find(self, items, name, what):
+        for item in items:
+            if item["name"] == name:
+                return item
+        raise ValueError(f"no such {what} {name}")
+
+    def node(self, info, name):
+        return self._find(self.store.model()["inputData"]["nodes"], name, "node")
+
+    def process(self, info, name):
+        return self._find(self.store.model()["inputData"]["processes"], name, "process")
+
+    def market(self, info, name):
+        return self._find(self.store.model()["inputData"]["markets"], name, "market")
+
+    def scenario(self, info, name):
+        return self._find(self.store.model()["inputData"]["scenarios"], name, "scenario")
+
+    def nodeGroup(self, info, name):
+        return self._find(self.store.model()["inputData"]["nodeGroups"], name, "node group")
+
+    def processGroup(self, info, name):
+        return self._find(self.store.model()["inputData"]["processGroups"], name, "process group")
+
+    def genConstraint(self, info, name):
+        return self._find(self.store.model()["inputData"]["genConstraints"], name, "constraint")
+
+
+class StandIn:
+    """Executes GraphQL requests against an in-memory model, with injectable latency."""
+
+    def __init__(self, schema_path: str = SCHEMA_PATH, latency: float = 0.0, field_latency: float = 0.0,
+                 jitter: float = 0.0, job_seconds: float = 0.0):
+        with open(schema_path, "r", encoding="utf-8") as f:
+            self.schema = build_schema(f.read())
+        self.latency = latency              # seconds per request
+        self.field_latency = field_latency  # extra seconds per root field (mutation) in the request
+        self.jitter = jitter                # uniform +- fraction applied to both
+        self.job_seconds = job_seconds
+        self.store = ModelStore()
+        self.jobs: Dict[int, Tuple[str, float, List[str], List[Dict]]] = {}
+        self.requests = 0
+        self.log: List[Tuple[str, float]] = []     # (operation, seconds) per request
+        self._lock = threading.Lock()
+
+    def start_job(self, kind: str) -> int:
+        job_id = len(self.jobs) + 1
+        self.jobs[job_id] = (kind, time.monotonic(), self.store.time_axis(), self.store.control_signals())
+        return job_id
+
+    def job_state(self, job_id: int) -> str:
+        if job_id not in self.jobs:
+            return "FAILED"
+        return "FINISHED" if time.monotonic() - self.jobs[job_id][1] >= self.job_seconds else "IN_PROGRESS"
+
+    def _delay(self, fields: int) -> None:
+        delay = self.latency + self.field_latency * fields
+        if delay and self.jitter:
+            delay *= 1.0 + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def execute(self, query: str, variables: Optional[Dict[str, Any]] = None,
+                operation_name: Optional[str] = None) -> Dict[str, Any]:
+        """Run one request; returns the JSON response body as a dict."""
+        started = time.perf_counter()
+        fields = 0
+        operation = "invalid"
+        try:
+            document = parse(query)
+            errors = validate(self.schema, document)
+        except GraphQLError as e:
+            errors = [e]
+        if errors:
+            result = ExecutionResult(None, errors)
+        else:
+            ops = [d for d in document.definitions if d.kind == "operation_definition"]
+            fields = sum(len(d.selection_set.selections) for d in ops)
+            operation = ops[0].name.value if ops[0].name else ops[0].selection_set.selections[0].name.value
+            # requests are applied one at a time, like the server's single model
+            with self._lock:
+                self.requests += 1
+                result = execute(self.schema, document, root_value=_Root(self),
+                                 variable_values=variables, operation_name=operation_name)
+        self._delay(fields)
+        self.log.append((operation, time.perf_counter() - started))
+        response: Dict[str, Any] = {"data": result.data}
+        if result.errors:
+            response["errors"] = [e.formatted for e in result.errors]
+        return response
+
+
+def _handler(standin: StandIn):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            response = json.dumps(standin.execute(body.get("query", ""), body.get("variables"),
+                                                  body.get("operationName"))).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(standin: StandIn, host: str = "127.0.0.1", port: int = 0):
+    """Serve `standin` over HTTP from a daemon thread. Returns (server, GraphQL URL)."""
+    server = ThreadingHTTPServer((host, port), _handler(standin))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/graphql"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an in-memory stand-in of the GraphQL API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3030)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--field-latency", type=float, default=0.0, help="seconds added per root field")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+- fraction of random variation")
+    parser.add_argument("--job-seconds", type=float, default=0.0, help="how long jobs take to finish")
+    args = parser.parse_args()
+
+    standin = StandIn(latency=args.latency, field_latency=args.field_latency, jitter=args.jitter,
+                      job_seconds=args.job_seconds)
+    server, url = serve(standin, args.host, args.port)
+    print(f"Stand-in GraphQL server on {url} (Ctrl-C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
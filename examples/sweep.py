@@ -0,0 +1,194 @@
+"""
+Scenario sweeps: one base model, many variants, one optimization each.
+
+Every variant is the base model_data.json with a few overrides applied:
+
+    {"name": "risky",  "risk": {"alfa": 0.3}}
+    {"name": "pricey", "price_scale": 1.2}                 # all markets
+    {"name": "npe+5%", "price_scale": {"npe": 1.05}}       # selected markets
+    {"name": "even",   "scenarios": {"s1": 0.5, "s2": 0.5}}
+    {"name": "cheap",  "setup": {"nodeDummyVariableCost": 1000.0}}
+
+Any other top-level key naming an object section (settings, timeline, setup)
+is merged into it. Each variant is synced to the server with model_sync (only
+the changed entities are sent), optimised, and its outcome written before the
+next variant is synced; a job that does not finish in time ends the sweep, as
+it may still be reading the model. The server is left holding the last
+variant that was loaded.
+
+With --overlap every variant is synced and started without waiting, and all
+jobs are then tracked with a single aliased jobStatus query per tick. This
+multiplexed mode is what sweeps were meant to use, but it is not the default:
+it is only correct if the server takes its own copy of the model when a job
+starts. There is a single model on the server, and nothing in the API says a
+running job is isolated from the next variant's sync, so by default a variant
+is loaded only once the previous job has ended. Check your server before
+using --overlap.
+
+    python sweep.py variants.json [--model model_data.json] [--overlap]
+"""
+import argparse
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from batching import BatchExecutor, DEFAULT_BATCH_SIZE
+from connection import DEFAULT_URL, SCHEMA_PATH, make_client
+from jobs import JobResult, fetch_outcome, print_status, start_job, wait_for_jobs
+from model_sync import sync_model
+from outcome_store import save_outcome
+from preflight import check_model
+from series_refs import load_model
+
+PRICE_FIELDS = ("price", "upPrice", "downPrice")
+
+
+class Variant(NamedTuple):
+    name: str
+    overrides: Dict[str, Any]
+
+
+class SweepResult(NamedTuple):
+    variant: Variant
+    job: Optional[JobResult]
+    path: Optional[str]             # outcome file, None if the job never started
+
+
+def load_variants(path: str) -> List[Variant]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    variants = []
+    for i, v in enumerate(raw):
+        overrides = {k: x for k, x in v.items() if k != "name"}
+        variants.append(Variant(v.get("name", f"variant{i + 1}"), overrides))
+    return variants
+
+
+def _scaled(values, factor: float):
+    out = []
+    for v in values or []:
+        v = dict(v)
+        if v.get("series") is not None:
+            v["series"] = [x * factor for x in v["series"]]
+        if v.get("constant") is not None:
+            v["constant"] = v["constant"] * factor
+        out.append(v)
+    return out
+
+
+def scale_prices(markets, scale) -> List[Dict[str, Any]]:
+    """Markets with price/upPrice/downPrice multiplied by `scale` (a number, or market name -> number)."""
+    out = []
+    for m in markets:
+        factor = scale.get(m.get("name"), 1.0) if isinstance(scale, dict) else scale
+        if factor != 1.0:
+            m = dict(m, **{f: _scaled(m.get(f), factor) for f in PRICE_FIELDS})
+        out.append(m)
+    return out
+
+
+def apply_overrides(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of `base` with `overrides` applied; sections that are not touched are shared, not copied."""
+    data = dict(base)
+    for key, value in overrides.items():
+        if key == "risk":
+            risks = {r["parameter"]: r for r in base.get("risk", [])}
+            for parameter, v in value.items():
+                risks[parameter] = dict(risks.get(parameter, {"parameter": parameter}), value=v)
+            data["risk"] = list(risks.values())
+        elif key == "scenarios":
+            scenarios = {s["name"]: s for s in base.get("scenarios", [])}
+            for name, weight in value.items():
+                scenarios[name] = dict(scenarios.get(name, {"name": name}), weight=weight)
+            data["scenarios"] = list(scenarios.values())
+        elif key == "price_scale":
+            data["markets"] = scale_prices(base.get("markets", []), value)
+        elif isinstance(base.get(key), dict) and isinstance(value, dict):
+            data[key] = dict(base[key], **value)
+        else:
+            raise ValueError(f"Don't know how to override {key!r}")
+    return data
+
+
+def run_sweep(client, executor, base: Dict[str, Any], variants: List[Variant],
+              deadline: Optional[float] = 300.0, max_interval: float = 2.0,
+              outcome_format: str = "binary", overlap: bool = False) -> Dict[str, SweepResult]:
+    """
+    Load, start and wait for every variant in turn (with `overlap`, start them all and then
+    wait for all jobs together; see the module docstring). Returns name -> SweepResult.
+    """
+    names = [v.name for v in variants]
+    if len(set(names)) != len(names):
+        raise ValueError("Variant names must be unique")
+
+    models = [apply_overrides(base, v.overrides) for v in variants]
+    for model in models:
+        check_model(model)
+
+    started: Dict[int, Variant] = {}
+    results: Dict[str, SweepResult] = {v.name: SweepResult(v, None, None) for v in variants}
+
+    def collect(job: JobResult):
+        variant = started[job.job_id]
+        payload = {"jobId": job.job_id, "state": job.state}
+        if job.finished:
+            payload["outcome"] = fetch_outcome(client, job.job_id)
+        else:
+            payload["message"] = job.message
+        base_path = f"sweep_{variant.name}_{job.job_id}"
+        path = save_outcome(base_path, payload, outcome_format)
+        results[variant.name] = SweepResult(variant, job, path)
+        print(f"{variant.name}: job {job.job_id} {job.state} after {job.elapsed:.2f}s -> {path}")
+
+    def wait(job_ids: List[int]) -> Dict[int, JobResult]:
+        jobs = wait_for_jobs(client, job_ids, deadline=deadline, max_interval=max_interval,
+                             on_status=print_status, on_done=collect)
+        for job in jobs.values():
+            if job.stopped:
+                collect(job)
+        return jobs
+
+    for variant, model in zip(variants, models):
+        print(f"\n=== VARIANT {variant.name} ===")
+        sync_model(client, executor, model)
+        job_id = start_job(client, "optimization")
+        print(f"Optimization job started for {variant.name}. id={job_id}")
+        started[job_id] = variant
+        if not overlap and wait([job_id])[job_id].stopped:
+            print(f"Job {job_id} is still running; not loading the remaining variants over it")
+            return results
+
+    if overlap:
+        wait(list(started))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one optimization per model variant.")
+    parser.add_argument("variants", help="JSON list of {name, overrides...} objects")
+    parser.add_argument("--model", default="model_data.json")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--schema", default=SCHEMA_PATH,
+                        help="local SDL file; pass '' to use the introspection cache instead")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--job-timeout", type=float, default=300.0,
+                        help="seconds to wait for each job (with --overlap: for all jobs together)")
+    parser.add_argument("--overlap", action="store_true",
+                        help="load the next variant while earlier jobs run; only if the server copies "
+                             "the model when a job starts")
+    parser.add_argument("--outcome-format", choices=("binary", "json"), default="binary")
+    args = parser.parse_args()
+
+    base = load_model(args.model)
+    client = make_client(args.url, schema_path=args.schema or None)
+    results = run_sweep(client, BatchExecutor(client, batch_size=args.batch_size), base,
+                        load_variants(args.variants), deadline=args.job_timeout,
+                        outcome_format=args.outcome_format, overlap=args.overlap)
+
+    print("\n=== SWEEP SUMMARY ===")
+    for name, r in results.items():
+        state = r.job.state if r.job else "NOT STARTED"
+        print(f"{name}: {state}" + (f" -> {r.path}" if r.path else ""))
+
+
+if __name__ == "__main__":
+    main()
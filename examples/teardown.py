@@ -0,0 +1,102 @@
+"""
+Bulk teardown of the server's model, so one long-running server can be reused.
+
+The current model is read with model_sync's `model { inputData }` query and
+every entity gets the same delete op model_sync uses. The ops are grouped into
+dependency layers and each layer goes out as aliased batches, so a clean slate
+takes about one request per layer (more only for layers bigger than the
+batch size):
+
+  1. constraint factors, node diffusions and delays, node histories, risks
+  2. generic constraints, topologies, markets
+  3. processes, nodes (their states and group memberships go with them)
+  4. node and process groups, scenarios
+
+Reserve types and inflow blocks have no delete mutation. If there are any,
+a last `clearInputData` request drops them (together with the setup, which
+the next upload sets again); otherwise settings, time line and setup are
+left for the next upload to overwrite.
+
+    python teardown.py [--url URL] [--dry-run]
+    python input_data.py --reset ...        # tear down, then upload
+"""
+import argparse
+from typing import Dict, List, Tuple
+
+from batching import BatchExecutor, DEFAULT_BATCH_SIZE, MESSAGE, MutationSpec, Op, OpResult
+from connection import DEFAULT_URL, SCHEMA_PATH, make_client
+from model_sync import SYNC_SECTIONS, read_current
+
+TEARDOWN_LAYERS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("FACTORS AND LINKS", ("CONSTRAINT FACTORS", "NODE DIFFUSION", "NODE DELAY", "NODE HISTORY", "RISKS")),
+    ("CONSTRAINTS, TOPOLOGIES AND MARKETS", ("GENERIC CONSTRAINT", "TOPOLOGIES", "MARKETS")),
+    ("PROCESSES AND NODES", ("PROCESSES", "NODES")),
+    ("GROUPS AND SCENARIOS", ("NODE GROUPS", "PROCESS GROUPS", "SCENARIOS")),
+]
+# no delete mutation: only clearInputData removes these
+CLEARED_SECTIONS = ("RESERVE TYPE", "INFLOW BLOCK")
+CLEAR_INPUT_DATA = MutationSpec("clearInputData", {}, MESSAGE)
+
+
+def teardown_plan(current) -> List[Tuple[str, List[Op]]]:
+    """Layered delete ops for everything in `current` (model_sync.current_entities)."""
+    plan = []
+    for layer, sections in TEARDOWN_LAYERS:
+        ops = [SYNC_SECTIONS[section].delete(key) for section in sections
+               for key in sorted(current[section], key=str)]
+        if ops:
+            plan.append((layer, ops))
+    if any(current[section] for section in CLEARED_SECTIONS):
+        plan.append(("RESERVE TYPES AND INFLOW BLOCKS", [Op(CLEAR_INPUT_DATA, {}, "input data")]))
+    return plan
+
+
+def remaining(current) -> Dict[str, int]:
+    """Entity counts per teardown section that are still on the server."""
+    sections = [section for _, layer_sections in TEARDOWN_LAYERS for section in layer_sections]
+    sections += CLEARED_SECTIONS
+    return {section: len(current[section]) for section in sections if current[section]}
+
+
+def teardown(client, executor, dry_run: bool = False, verify: bool = True) -> Dict[str, List[OpResult]]:
+    """Delete every deletable entity on the server, layer by layer. Returns {layer: [OpResult]}."""
+    current = read_current(client)
+    plan = teardown_plan(current)
+    print(f"Teardown plan: {sum(len(ops) for _, ops in plan)} deletes in {len(plan)} layers")
+    report = {}
+    for layer, ops in plan:
+        if dry_run:
+            for op in ops:
+                print(f"{layer} {op.spec.field} {op.label}")
+            continue
+        results = executor.execute(ops)
+        failed = [r for r in results if not r.ok]
+        print(f"{layer}: {len(results) - len(failed)} deleted" + (f", {len(failed)} failed" if failed else ""))
+        for r in failed:
+            print(f"  {r.field} {r.label}: " + "; ".join(r.errors))
+        report[layer] = results
+    if verify and not dry_run and plan:
+        left = remaining(read_current(client))
+        if left:
+            print("WARNING: still on the server after teardown: "
+                  + ", ".join(f"{n} {section.lower()}" for section, n in left.items()))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete the model currently loaded on the server.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--schema", default=SCHEMA_PATH,
+                        help="local SDL file; pass '' to use the introspection cache instead")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="print the plan, send nothing")
+    parser.add_argument("--no-verify", action="store_true", help="skip re-reading the model afterwards")
+    args = parser.parse_args()
+
+    client = make_client(args.url, schema_path=args.schema or None)
+    teardown(client, BatchExecutor(client, batch_size=args.batch_size), dry_run=args.dry_run,
+             verify=not args.no_verify)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Shared fixtures: the example modules are imported by bare name, and a StandIn stands in for the server."""
+import json
+import os
+import sys
+
+import pytest
+
+EXAMPLES = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, EXAMPLES)
+
+from batching import BatchExecutor  # noqa: E402
+from connection import make_client  # noqa: E402
+from standin import StandIn, serve  # noqa: E402
+
+
+@pytest.fixture
+def model():
+    """A fresh copy of model_data.json."""
+    with open(os.path.join(EXAMPLES, "model_data.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def outcome_payload():
+    """The recorded optimization_outcome_1.json payload."""
+    with open(os.path.join(EXAMPLES, "optimization_outcome_1.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def server():
+    """(StandIn, url) served on a free local port for the duration of the test."""
+    standin = StandIn()
+    http, url = serve(standin)
+    yield standin, url
+    http.shutdown()
+
+
+@pytest.fixture
+def client(server):
+    return make_client(server[1])
+
+
+@pytest.fixture
+def executor(client):
+    return BatchExecutor(client)
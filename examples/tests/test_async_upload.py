@@ -0,0 +1,60 @@
+import asyncio
+
+from async_upload import AsyncBatchExecutor
+from connection import make_client
+from input_data import node_ops, upload_model_async
+from instrumentation import RetryingSession
+
+
+def test_async_upload_without_metrics(server, model):
+    report = asyncio.run(upload_model_async(make_client(server[1], use_async=True), model))
+    assert report and all(r.ok for results in report.values() for r in results)
+
+
+class _Flaky:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def execute(self, document, variable_values=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionResetError("dropped")
+        return {"ok": True}
+
+
+def test_retrying_session_retries_connection_errors(monkeypatch):
+    monkeypatch.setattr("instrumentation.RETRY_BACKOFF", 0)
+    flaky = _Flaky(failures=2)
+    assert asyncio.run(RetryingSession(flaky, retries=2).execute("doc")) == {"ok": True}
+    assert flaky.calls == 3
+
+
+class _FailsOnce:
+    def __init__(self):
+        self.calls = self.finished = 0
+
+    async def execute(self, document, variable_values=None):
+        self.calls += 1
+        if self.calls == 2:
+            raise RuntimeError("boom")
+        await asyncio.sleep(0.05)
+        self.finished += 1
+        return {}
+
+
+def test_failed_batch_cancels_its_siblings(model):
+    session = _FailsOnce()
+
+    async def run():
+        executor = AsyncBatchExecutor(session, batch_size=1, concurrency=4)
+        try:
+            await executor.execute(node_ops(model))
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("the failed batch was not reported")
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+    assert session.calls > 2 and session.finished == 0
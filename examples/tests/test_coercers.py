@@ -0,0 +1,70 @@
+from array import array
+
+import pytest
+
+from coercers import LazyCoercers, load_module
+
+SDL = """
+enum Kind { A B }
+
+input Inner {
+  weight: Float!
+}
+
+input Thing {
+  name: String!
+  count: Int
+  series: [Float!]
+  tags: [String!]!
+  inner: Inner
+  inners: [Inner!]!
+  kind: Kind!
+}
+"""
+
+
+@pytest.fixture
+def schema(tmp_path):
+    path = tmp_path / "schema.graphql"
+    path.write_text(SDL, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def coerce(schema):
+    return load_module(schema, cache_dir=None).COERCERS["Thing"]
+
+
+def test_one_pass_keeps_declared_fields_and_casts(coerce):
+    out = coerce({"name": "n", "count": 3.0, "series": [1, 2.5], "tags": ["a"], "inner": {"weight": "1"},
+                  "inners": [{"weight": 2, "extra": 1}, None], "kind": "A", "unknown": 1, "other": None})
+    assert out == {"name": "n", "count": 3, "series": array("d", [1.0, 2.5]), "tags": ["a"],
+                   "inner": {"weight": 1.0}, "inners": [{"weight": 2.0}], "kind": "A"}
+    assert isinstance(out["series"], array) and out["series"].typecode == "d"
+    assert isinstance(out["count"], int)
+
+
+def test_int_field_rejects_a_fraction(coerce):
+    with pytest.raises(ValueError):
+        coerce({"name": "n", "count": 2.7, "kind": "A"})
+
+
+def test_missing_non_null_lists_default_to_empty(coerce):
+    out = coerce({"name": "n", "count": None, "kind": "B"})
+    assert out == {"name": "n", "tags": [], "inners": [], "kind": "B"}
+
+
+def test_required_and_enum_tables(schema):
+    module = load_module(schema, cache_dir=None)
+    assert module.REQUIRED["Thing"] == ("name", "kind")
+    assert module.ENUM_FIELDS["Thing"] == {"kind": frozenset({"A", "B"})}
+
+
+def test_generated_module_is_cached_by_schema_hash(tmp_path):
+    schema = tmp_path / "edited.graphql"
+    schema.write_text(SDL + "# edited\n", encoding="utf-8")      # a new hash, so not memoised yet
+    cache = tmp_path / "cache"
+    coercers = LazyCoercers(str(schema), str(cache))
+    assert not cache.exists()          # nothing is read or written before the first lookup
+    assert coercers["Inner"]({"weight": 1}) == {"weight": 1.0}
+    assert [p.name for p in cache.glob("coercers_*.py")]
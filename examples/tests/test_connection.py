@@ -0,0 +1,44 @@
+from array import array
+
+import requests
+
+import batching
+from batching import BatchExecutor, wire_variables
+from connection import make_client
+from input_data import node_ops
+from utilities import json_dumps
+
+
+def _has_buffer(x):
+    if isinstance(x, array):
+        return True
+    children = x.values() if isinstance(x, dict) else x if isinstance(x, list) else ()
+    return any(_has_buffer(v) for v in children)
+
+
+def test_sync_transport_serialises_with_json_dumps(server):
+    client = make_client(server[1])
+    assert client.transport.json_serialize is json_dumps
+    variables = {"series": array("d", [1.5, 2.5])}
+    assert wire_variables(client, variables) is variables
+
+
+def test_float_buffers_reach_the_body_without_lists(server, model, monkeypatch):
+    ops = list(node_ops(model))
+    assert any(_has_buffer(op.variables) for op in ops)
+
+    def no_lists(x):
+        raise AssertionError("float buffers were converted to lists")
+
+    bodies = []
+    send = requests.Session.request
+
+    def spy(self, method, url, **kwargs):
+        assert "json" not in kwargs     # the body was already written by utilities.json_dumps
+        bodies.append(kwargs["data"])
+        return send(self, method, url, **kwargs)
+
+    monkeypatch.setattr(batching, "jsonable", no_lists)
+    monkeypatch.setattr(requests.Session, "request", spy)
+    assert all(r.ok for r in BatchExecutor(make_client(server[1])).execute(ops))
+    assert bodies
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from batching import BatchExecutor, parse_document
+from connection import make_client
+from input_data import SECTIONS, upload_model, upload_model_async
+from instrumentation import InstrumentedClient, Metrics
+
+
+def _assert_recorded(metrics, report):
+    summary = metrics.summary()
+    assert set(summary) == {section for section, _ in SECTIONS if report[section]}
+    assert sum(s["fields"] for s in summary.values()) == sum(len(results) for results in report.values())
+    for s in summary.values():
+        assert s["requestBytes"] > 0 and s["responseBytes"] > 0
+        assert s["errors"] == 0
+
+
+def test_instrumented_client_records_every_section(server, model):
+    metrics = Metrics()
+    client = InstrumentedClient(make_client(server[1], retries=0), metrics)
+    report = upload_model(BatchExecutor(client), model, metrics)
+    _assert_recorded(metrics, report)
+    assert "# TYPE hertta_loader_request_seconds summary" in metrics.prometheus_text()
+
+
+def test_instrumented_session_records_every_section(server, model):
+    metrics = Metrics()
+    report = asyncio.run(upload_model_async(make_client(server[1], use_async=True), model, metrics=metrics))
+    _assert_recorded(metrics, report)
+
+
+def test_untagged_requests_use_the_operation_name(server):
+    metrics = Metrics()
+    client = InstrumentedClient(make_client(server[1], retries=0), metrics)
+    client.execute(parse_document("query Settings { settings { location { country } } }"))
+    assert [(s.section, s.fields) for s in metrics.samples] == [("Settings", 1)]
+
+
+class _Down:
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self, document, variable_values=None):
+        self.calls += 1
+        raise ConnectionRefusedError("server down")
+
+
+def test_failed_request_is_recorded_with_all_its_retries(monkeypatch):
+    monkeypatch.setattr("instrumentation.RETRY_BACKOFF", 0.01)
+    metrics, down = Metrics(), _Down()
+    client = InstrumentedClient(down, metrics, retries=2)
+    with metrics.tag("NODES"), pytest.raises(ConnectionRefusedError):
+        client.execute(parse_document("query Settings { settings { location { country } } }"))
+    assert down.calls == 3
+    [sample] = metrics.samples
+    assert (sample.section, sample.retries, sample.errors, sample.response_bytes) == ("NODES", 2, 1, 0)
+    assert sample.seconds >= 0.03      # both back-offs are inside the timed span
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from batching import Op, OpResult
+from input_data import CREATE_NODE
+from journal import MutationJournal
+
+URL = "http://localhost:3030/graphql"
+
+
+def _op(name):
+    return Op(CREATE_NODE, {"node": {"name": name}}, name)
+
+
+def _record(journal, ops, ok=True):
+    sent = list(journal.pending(ops))
+    journal.record(sent, [OpResult(op.label, op.spec.field, None, [] if ok else ["failed"]) for op in sent])
+    return sent
+
+
+def test_resume_skips_what_was_applied(tmp_path):
+    path = str(tmp_path / "upload.journal")
+    with MutationJournal(path, URL) as journal:
+        _record(journal, [_op("a"), _op("b")])
+        _record(journal, [_op("c")], ok=False)
+    with MutationJournal(path, URL) as journal:
+        assert [op.label for op in journal.pending([_op("a"), _op("b"), _op("c")])] == ["c"]
+        assert journal.skipped == 2
+
+
+def test_identical_ops_are_counted(tmp_path):
+    path = str(tmp_path / "upload.journal")
+    with MutationJournal(path, URL) as journal:
+        _record(journal, [_op("a")])
+    with MutationJournal(path, URL) as journal:
+        assert len(list(journal.pending([_op("a"), _op("a")]))) == 1
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / "upload.journal")
+    with MutationJournal(path, URL) as journal:
+        _record(journal, [_op("a")])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"k": "0123')
+    with MutationJournal(path, URL) as journal:
+        assert journal.done and not list(journal.pending([_op("a")]))
+
+
+def test_other_url_is_refused(tmp_path):
+    path = str(tmp_path / "upload.journal")
+    MutationJournal(path, URL).close()
+    with pytest.raises(ValueError):
+        MutationJournal(path, "http://elsewhere:3030/graphql")
+
+
+def test_journal_without_header_is_refused(tmp_path):
+    path = tmp_path / "upload.journal"
+    path.write_text(json.dumps({"k": "00", "f": "createNode", "l": "a"}) + "\n")
+    with pytest.raises(ValueError):
+        MutationJournal(str(path), URL)
+
+
+class _Nodes:
+    """Answers the journal's node-name query with a fixed set of nodes."""
+
+    def __init__(self, *names):
+        self.names = names
+
+    def execute(self, document, variable_values=None):
+        return {"model": {"inputData": {"nodes": [{"name": n} for n in self.names]}}}
+
+
+def test_reset_server_is_detected(tmp_path):
+    path = str(tmp_path / "upload.journal")
+    with MutationJournal(path, URL) as journal:
+        _record(journal, [_op("a"), _op("b")])
+        journal.check_server(_Nodes("a", "b", "c"))
+    with MutationJournal(path, URL) as journal, pytest.raises(ValueError):
+        journal.check_server(_Nodes("b"))
+
+
+def test_finish_removes_the_journal(tmp_path):
+    path = tmp_path / "upload.journal"
+    journal = MutationJournal(str(path), URL)
+    journal.finish()
+    assert not path.exists()
@@ -0,0 +1,50 @@
+from array import array
+
+import numpy as np
+
+from input_data import SECTIONS, upload_model
+from minimise import PayloadStats, minimise_values, minimised_sections, round_sig, round_sig_series
+
+SCENARIOS = frozenset(("s1", "s2"))
+
+
+def test_constant_series_collapses():
+    out = minimise_values([{"scenario": "s1", "series": array("d", [4.0] * 24)},
+                           {"scenario": "s2", "series": array("d", [4.0] * 23 + [5.0])}], SCENARIOS)
+    assert out[0] == {"scenario": "s1", "constant": 4.0}
+    assert "series" in out[1] and "constant" not in out[1]
+
+
+def test_identical_scenarios_are_merged_only_when_all_are_covered():
+    series = array("d", [1.0, 2.0, 3.0])
+    both = [{"scenario": "s1", "series": series}, {"scenario": "s2", "series": array("d", series)}]
+    [merged] = minimise_values(both, SCENARIOS)
+    assert "scenario" not in merged and list(merged["series"]) == [1.0, 2.0, 3.0]
+    assert len(minimise_values(both, frozenset(("s1", "s2", "s3")))) == 2
+    forecast = [{"scenario": s, "forecast": "ElectricityPrice", "fType": "price"} for s in ("s1", "s2")]
+    assert minimise_values(forecast, SCENARIOS) == forecast
+
+
+def test_rounding_stays_a_float_buffer():
+    out = minimise_values([{"series": array("d", [8.999999999999982, 1.234567891, 0.0])},
+                           {"constant": 2.0000000001}], SCENARIOS, digits=6)
+    assert isinstance(out[0]["series"], np.ndarray) and out[0]["series"].dtype == np.float64
+    assert out[0]["series"].tolist() == [9.0, 1.23457, 0.0]
+    assert out[1] == {"constant": 2.0}
+
+
+def test_series_rounding_matches_round_sig():
+    values = np.random.default_rng(0).normal(size=1000) * 10.0 ** np.arange(-40, 40, 0.08)
+    values[:11] = [0.0, np.inf, -np.inf, np.nan, 1e-310, 5e-324, 123456.0, -0.5, 2.5, 9.5, 1e25]
+    got = round_sig_series(values, 6)
+    want = [round_sig(float(x), 6) for x in values]
+    assert np.array_equal(got, want, equal_nan=True)
+
+
+def test_minimised_upload_is_smaller_and_accepted(executor, model):
+    stats = PayloadStats()
+    report = upload_model(executor, model, sections=minimised_sections(SECTIONS, digits=6, stats=stats))
+    assert all(r.ok for results in report.values() for r in results)
+    totals = stats.report()
+    assert sum(s["bytesSaved"] for s in totals.values()) > 0
+    assert all(s["bytesSaved"] >= 0 for s in totals.values())
@@ -0,0 +1,37 @@
+from input_data import upload_model
+from model_sync import plan_sync, read_current, sync_model
+
+
+def _fields(steps):
+    return sorted(f"{op.spec.field} {op.label}" for _, ops in steps for op in ops)
+
+
+def test_uploaded_model_needs_no_ops(client, executor, model):
+    upload_model(executor, model)
+    plan = plan_sync(model, read_current(client))
+    assert plan.op_count == 0 and not plan.warnings
+
+
+def test_changed_series_recreates_only_its_entity(client, executor, model):
+    upload_model(executor, model)
+    model["markets"][0]["price"][0]["series"][0] += 1
+    plan = plan_sync(model, read_current(client))
+    assert _fields(plan.deletes) == ["deleteMarket npe"]
+    assert _fields(plan.creates) == ["createMarket npe"]
+
+
+def test_removed_entity_is_deleted(client, executor, model):
+    upload_model(executor, model)
+    del model["gen_constraints"]
+    plan = plan_sync(model, read_current(client))
+    assert "deleteGenConstraint c1" in _fields(plan.deletes)
+    assert not plan.creates
+
+
+def test_sync_reaches_the_desired_model(client, executor, model):
+    upload_model(executor, model)
+    model["markets"][0]["price"][0]["series"][0] += 1
+    del model["gen_constraints"]
+    report = sync_model(client, executor, model)
+    assert all(r.ok for results in report.values() for r in results)
+    assert plan_sync(model, read_current(client)).op_count == 0
@@ -0,0 +1,40 @@
+import copy
+import json
+from array import array
+
+from input_data import SECTIONS
+from minimise import minimised_sections
+from outcome_cache import model_fingerprint
+
+
+def test_fingerprint_ignores_key_order_and_number_spelling(model):
+    reordered = json.loads(json.dumps(model), object_pairs_hook=lambda pairs: dict(reversed(pairs)))
+    respelled = copy.deepcopy(model)
+    price = respelled["markets"][0]["price"][0]
+    price["series"] = array("d", price["series"])
+    assert model_fingerprint(reordered) == model_fingerprint(model) == model_fingerprint(respelled)
+
+
+def test_fingerprint_changes_with_a_value(model):
+    before = model_fingerprint(model)
+    model["markets"][0]["price"][0]["series"][3] += 0.5
+    assert model_fingerprint(model) != before
+
+
+def test_clock_start_is_not_fingerprinted(model):
+    model["timeline"]["start"] = {"clockChoice": "CURRENT_HOUR"}
+    assert model_fingerprint(model) is None
+
+
+def test_forecast_linked_value_is_not_fingerprinted(model):
+    model["markets"][0]["price"] = [{"scenario": "s1", "forecast": "ElectricityPrice", "fType": "price"}]
+    assert model_fingerprint(model) is None
+
+
+def test_rounded_upload_has_its_own_fingerprint(model):
+    model["markets"][0]["price"][0]["series"][3] += 0.001
+    exact = model_fingerprint(model)
+    rounded = model_fingerprint(model, minimised_sections(SECTIONS, digits=2))
+    assert rounded is not None and rounded != exact
+    assert model_fingerprint(model, SECTIONS) == exact
+    assert model_fingerprint(model, minimised_sections(SECTIONS, digits=2)) == rounded
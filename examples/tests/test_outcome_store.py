@@ -0,0 +1,41 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from outcome_store import OutcomeReader, save_outcome, write_outcome
+
+
+def test_round_trip_through_the_memory_map(tmp_path, outcome_payload):
+    index_path = write_outcome(str(tmp_path / "out"), outcome_payload)
+    assert os.path.exists(tmp_path / "out.f64")
+    signals = outcome_payload["outcome"]["controlSignals"]
+    with OutcomeReader(index_path) as reader:
+        assert (reader.job_id, reader.state) == (outcome_payload["jobId"], outcome_payload["state"])
+        assert reader.signal_names == [cs["name"] for cs in signals]
+        column = reader.column(signals[0]["name"])
+        assert isinstance(column, memoryview) and column.tolist() == signals[0]["signal"]
+        assert reader.array(signals[-1]["name"]).tolist() == signals[-1]["signal"]
+        assert np.array_equal(reader.matrix(), [cs["signal"] for cs in signals])
+        assert reader.to_payload() == outcome_payload
+        with pytest.raises(KeyError):
+            reader.column("no_such_signal")
+        del column
+
+
+def test_unfinished_job_has_no_data_file(tmp_path):
+    payload = {"jobId": 7, "state": "FAILED", "message": "solver error"}
+    index_path = write_outcome(str(tmp_path / "failed"), payload)
+    assert not os.path.exists(tmp_path / "failed.f64")
+    with OutcomeReader(index_path) as reader:
+        assert reader.to_payload() == payload
+
+
+def test_save_outcome_formats(tmp_path, outcome_payload):
+    assert save_outcome(str(tmp_path / "a"), outcome_payload).endswith(".idx.json")
+    json_path = save_outcome(str(tmp_path / "b"), outcome_payload, "json")
+    with open(json_path, "r", encoding="utf-8") as f:
+        assert json.load(f) == outcome_payload
+    with pytest.raises(ValueError):
+        save_outcome(str(tmp_path / "c"), outcome_payload, "csv")
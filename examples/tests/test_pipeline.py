@@ -0,0 +1,25 @@
+from batching import OpResult
+from pipeline import ForecastLink, run_pipeline
+
+LINKS = [ForecastLink("npe", "ElectricityPrice", "price")]
+
+
+def _reject_links(executor, monkeypatch):
+    execute = executor.execute
+    monkeypatch.setattr(executor, "execute", lambda ops: [
+        OpResult(r.label, r.field, None, ["rejected"]) if r.field.startswith("connect") else r
+        for r in execute(ops)])
+
+
+def test_linked_run_optimises(client, executor, model):
+    run = run_pipeline(client, executor, model, LINKS)
+    assert run.connected and not run.failed
+    assert run.payload is not None
+
+
+def test_rejected_link_counts_as_stale(client, executor, model, monkeypatch):
+    _reject_links(executor, monkeypatch)
+    run = run_pipeline(client, executor, model, LINKS)
+    assert run.failed and run.payload is None
+    run = run_pipeline(client, executor, model, LINKS, sync=True, allow_stale=True)
+    assert run.payload is not None
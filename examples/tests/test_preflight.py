@@ -0,0 +1,49 @@
+import pytest
+
+from preflight import PreflightError, check_model, timeline_steps, validate_model
+
+
+def _messages(model):
+    return [str(p) for p in validate_model(model)]
+
+
+def test_example_model_is_clean(model):
+    assert validate_model(model) == []
+    check_model(model)
+
+
+def test_unknown_references(model):
+    model["topologies"][0]["processName"] = "nope"
+    model["markets"][0]["price"][0]["scenario"] = "s9"
+    model["process_groups"][0]["processes"].append("ghost")
+    messages = _messages(model)
+    assert "TOPOLOGIES #0: unknown process 'nope'" in messages
+    assert any(m.endswith("unknown scenario in price[0] 's9'") for m in messages)
+    assert any(m.startswith("PROCESS GROUP MEMBERS") and m.endswith("unknown process 'ghost'") for m in messages)
+
+
+def test_duplicate_names(model):
+    model["nodes"].append(dict(model["nodes"][0]))
+    assert f"NODES {model['nodes'][0]['name']!r}: duplicate name" in _messages(model)
+
+
+def test_series_length_against_the_timeline(model):
+    steps = timeline_steps(model["timeline"])
+    model["markets"][0]["price"][1]["series"] = model["markets"][0]["price"][1]["series"][:-1]
+    assert any(m.endswith(f"price[1] has {steps - 1} values, timeline has {steps} steps") for m in _messages(model))
+
+
+def test_missing_fields_and_bad_enums(model):
+    del model["processes"][0]["eff"]
+    model["processes"][0]["conversion"] = "SIDEWAYS"
+    messages = [m for m in _messages(model) if m.startswith("PROCESSES ngchp")]
+    assert any("missing required fields: eff" in m for m in messages)
+    assert any("conversion='SIDEWAYS' is not one of" in m for m in messages)
+
+
+def test_check_model_reports_every_problem(model):
+    model["nodes"].append(dict(model["nodes"][0]))
+    model["topologies"][0]["processName"] = "nope"
+    with pytest.raises(PreflightError) as e:
+        check_model(model)
+    assert len(e.value.problems) >= 2
@@ -0,0 +1,35 @@
+import pytest
+
+from batching import OpResult
+from rolling import RollingHorizon, window_model
+
+
+def test_window_model_cuts_series_and_moves_start(model):
+    window = window_model(model, 2, 6)
+    assert window["timeline"]["start"] == {"customStartTime": "2025-09-23T18:00:00Z"}
+    assert window["timeline"]["duration"] == {"hours": 5, "minutes": 0, "seconds": 0}
+    price = window["markets"][0]["price"][0]
+    assert list(price["series"]) == model["markets"][0]["price"][0]["series"][2:8]
+    assert model["timeline"]["start"] == {"customStartTime": "2025-09-23T16:00:00Z"}
+
+
+def test_window_beyond_the_series_is_refused(model):
+    with pytest.raises(ValueError):
+        window_model(model, 20, 6)
+
+
+def test_failed_mutation_aborts_the_cycle(client, executor, model, monkeypatch):
+    driver = RollingHorizon(client, executor, model, horizon=6)
+    driver.step()
+    assert driver.cycle == 1 and driver._sent is not None
+
+    execute = executor.execute
+    monkeypatch.setattr(executor, "execute", lambda ops: [
+        OpResult(r.label, r.field, None, ["injected"]) for r in execute(ops)])
+    with pytest.raises(RuntimeError):
+        driver.step()
+    assert driver.cycle == 1 and driver._sent is None
+
+    monkeypatch.setattr(executor, "execute", execute)
+    driver.step()
+    assert driver.cycle == 2 and driver._sent is not None
@@ -0,0 +1,14 @@
+from shard import run_sharded, shard_model, shard_models
+
+
+def test_model_without_scenarios_runs_unsharded(server):
+    model = {"nodes": [{"name": "n1", "isCommodity": False, "isMarket": False, "isRes": False}]}
+    assert shard_models(model, 3) == [model]
+    runs = run_sharded(model, [server[1]])
+    assert len(runs) == 1 and isinstance(runs[0].job.job_id, int)
+
+
+def test_common_scenario_outside_the_shard_is_dropped(model):
+    model["setup"] = dict(model["setup"], commonScenarioName="s1", commonTimesteps=0)
+    assert "commonScenarioName" not in shard_model(model, ["s2"])["setup"]
+    assert shard_model(model, ["s1"])["setup"]["commonScenarioName"] == "s1"
@@ -0,0 +1,26 @@
+from input_data import upload_model
+from model_sync import read_current
+from teardown import CLEARED_SECTIONS, remaining, teardown
+
+
+def _failed(report):
+    return [f"{r.field} {r.label}: {r.errors}" for results in report.values() for r in results if not r.ok]
+
+
+def test_reset_then_full_upload(client, executor, model):
+    assert model["reserve_types"]
+    assert not _failed(upload_model(executor, model))
+
+    assert not _failed(teardown(client, executor))
+    current = read_current(client)
+    assert not remaining(current)
+    assert not any(current[section] for section in CLEARED_SECTIONS)
+
+    assert not _failed(upload_model(executor, model))
+
+
+def test_dry_run_sends_nothing(client, executor, model, server):
+    upload_model(executor, model)
+    sent = server[0].requests
+    teardown(client, executor, dry_run=True)
+    assert server[0].requests == sent + 1      # the read of the current model only
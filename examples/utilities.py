@@ -1,5 +1,50 @@
+import json
+import re
+from array import array
 from typing import Any, Dict, Iterable, List
 
+try:
+    import numpy as np
+except ImportError:  # optional: numpy arrays are only passed through when present
+    np = None
+
+# Series are carried as array('d') (or float64 ndarrays) rather than lists of
+# Python floats: casting is one C-level copy, pruning never descends into
+# them. json_dumps writes them into the request body directly, without a
+# list of Python floats; jsonable turns them back into lists for transports
+# that serialise with plain json.
+if np is not None:
+    FLOAT_ARRAY_TYPES = (array, np.ndarray)
+else:
+    FLOAT_ARRAY_TYPES = (array,)
+
+def float_series(values):
+    """
+    Series as a float64 buffer; array('d'), float64 ndarrays and mapped series
+    (series_refs.SeriesRef) pass through uncopied.
+    """
+    if isinstance(values, array) and values.typecode == "d":
+        return values
+    if hasattr(values, "mapped"):
+        values = values.mapped()
+    if np is not None and isinstance(values, np.ndarray):
+        return np.asarray(values, dtype=np.float64)
+    if isinstance(values, memoryview):
+        out = array("d")
+        out.frombytes(values)
+        return out
+    return array("d", values)
+
+def looks_numeric_leaf(x):
+    """
+    True for float buffers and for lists whose first item is a plain number. Only
+    x[0] is looked at: lists in model payloads hold one kind of item, and checking
+    every element would cost what skipping the series is meant to save.
+    """
+    if isinstance(x, FLOAT_ARRAY_TYPES):
+        return True
+    return isinstance(x, list) and bool(x) and type(x[0]) in (float, int)
+
 def normalize_value_inputs(arr):
     """Keep only ValueInput keys; cast numbers to floats; omit None."""
     norm = []
@@ -8,17 +53,87 @@ def normalize_value_inputs(arr):
         if v.get("scenario") is not None:
             vi["scenario"] = v["scenario"]
         if v.get("series") is not None:
-            vi["series"] = [float(x) for x in v["series"]]
+            vi["series"] = float_series(v["series"])
         if v.get("constant") is not None:
             vi["constant"] = float(v["constant"])
         norm.append(vi)
     return norm
 
+def _pruned_shell(v):
+    if isinstance(v, dict):
+        return {}
+    if isinstance(v, list) and not looks_numeric_leaf(v):
+        return []
+    return v
+
 def prune_nones(x):
+    """
+    Copy of `x` without None-valued dict entries, at any depth. Iterative, and
+    numeric leaf lists / float buffers are shared with the input, not copied.
+    """
+    out = _pruned_shell(x)
+    stack = [(x, out)] if out is not x else []
+    while stack:
+        src, dst = stack.pop()
+        if isinstance(src, dict):
+            for k, v in src.items():
+                if v is None:
+                    continue
+                w = dst[k] = _pruned_shell(v)
+                if w is not v:
+                    stack.append((v, w))
+        else:
+            for v in src:
+                w = _pruned_shell(v)
+                dst.append(w)
+                if w is not v:
+                    stack.append((v, w))
+    return out
+
+_BUFFER_TOKEN = re.compile(r'"\\u0000buf(\d+):(\d+)\\u0000"')
+
+def _buffer_text(buf):
+    """JSON array text of a float buffer, formatted straight from its memory."""
+    if np is not None and isinstance(buf, np.ndarray):
+        if buf.ndim != 1:
+            return json.dumps(buf.tolist())
+        buf = np.ascontiguousarray(buf, dtype=np.float64)
+    view = memoryview(buf)
+    text = ",".join(map(float.__repr__, view))
+    if "n" in text:     # nan / inf: let json spell them (NaN, Infinity)
+        return json.dumps(view.tolist())
+    return "[" + text + "]"
+
+def json_dumps(obj, **kwargs):
+    """
+    json.dumps that also writes float buffers, each formatted from its memory rather than
+    converted to a list first; usable as a transport's json_serialize.
+    """
+    buffers = []
+    tag = id(buffers)   # keeps a string that merely looks like a placeholder from matching
+
+    def default(o):
+        if isinstance(o, FLOAT_ARRAY_TYPES):
+            buffers.append(o)
+            return f"\0buf{tag}:{len(buffers) - 1}\0"     # placeholder, replaced below
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+    def splice(m):
+        return _buffer_text(buffers[int(m.group(2))]) if int(m.group(1)) == tag else m.group(0)
+
+    text = json.dumps(obj, default=default, **kwargs)
+    if not buffers:
+        return text
+    return _BUFFER_TOKEN.sub(splice, text)
+
+def jsonable(x):
+    """`x` with float buffers replaced by lists, for transports without a json_serialize hook."""
+    if isinstance(x, FLOAT_ARRAY_TYPES):
+        return x.tolist()
     if isinstance(x, dict):
-        return {k: prune_nones(v) for k, v in x.items() if v is not None}
-    if isinstance(x, list):
-        return [prune_nones(v) for v in x]
+        return {k: jsonable(v) for k, v in x.items()}
+    if isinstance(x, list) and not looks_numeric_leaf(x):
+        return [jsonable(v) for v in x]
     return x
 
 def pick_keys(d, allowed):
@@ -32,6 +147,14 @@ def _to_float(v: Any) -> float:
         return float(v.strip().replace(",", "."))
     raise TypeError(f"Cannot convert {v!r} to float")
 
+def to_int(v: Any) -> int:
+    # Int fields: 3.0 is accepted, 2.7 is an error rather than silently becoming 2
+    if isinstance(v, float):
+        if not v.is_integer():
+            raise ValueError(f"Expected an integer, got {v!r}")
+        return int(v)
+    return int(v)
+
 def normalize_point(p: Any) -> Dict[str, float]:
     """
     Normalize a single point to {'x': float, 'y': float}.